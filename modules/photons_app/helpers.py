@@ -8,6 +8,8 @@ import threading
 import tempfile
 import asyncio
 import logging
+import weakref
+import math
 import uuid
 import time
 import sys
@@ -179,6 +181,256 @@ async def tick(every, *, final_future=None, max_iterations=None, max_time=None):
         yield i
 
 
+class WheelTimer:
+    """
+    A callback registered with a :class:`TimerWheel`. This has the same
+    ``cancel()``, ``cancelled()`` and ``when()`` methods as the handle returned
+    by ``loop.call_later``.
+    """
+
+    __slots__ = ("wheel", "_when", "tick", "callback", "args", "bucket", "_cancelled")
+
+    def __init__(self, wheel, when, callback, args):
+        self.wheel = wheel
+        self._when = when
+        self.callback = callback
+        self.args = args
+
+        self.tick = None
+        self.bucket = None
+        self._cancelled = False
+
+    def when(self):
+        return self._when
+
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        if self._cancelled:
+            return
+
+        self._cancelled = True
+        if self.bucket is not None:
+            del self.bucket[self]
+            self.bucket = None
+            self.wheel.count -= 1
+
+    def __repr__(self):
+        return (
+            f"<WheelTimer {self.callback} at {self._when}{' cancelled' if self._cancelled else ''}>"
+        )
+
+
+class TimerWheel:
+    """
+    A hierarchical timer wheel for lots of short lived callbacks.
+
+    Every ``loop.call_later`` puts a handle on the event loop's heap and
+    cancelled handles stay on that heap until they would have been due. Photons
+    makes several of these for every message it sends and so instead we
+    register them with a timer wheel, which only ever has one handle on the
+    event loop. Adding and cancelling a callback is O(1).
+
+    .. code-block:: python
+
+        from photons_app import helpers as hp
+
+
+        timer = hp.timer_wheel().call_later(0.5, print, "hello")
+
+        # This removes the callback from the wheel straight away
+        timer.cancel()
+
+    Callbacks are called on the first tick at or after the time they are due,
+    so they are never early and are late by at most ``resolution`` seconds.
+
+    Each of the ``levels`` in the wheel has ``slots`` slots and a slot covers
+    ``slots`` times as many ticks as a slot in the level below it. Every time
+    one level goes all the way around, the callbacks in the next slot of the
+    level above it are moved down into the smaller slots.
+
+    Use :func:`timer_wheel` to get the shared wheel for an event loop.
+    """
+
+    def __init__(self, *, resolution=0.002, slots=256, levels=4, loop=None):
+        self.slots = slots
+        self.levels = levels
+        self.resolution = resolution
+
+        loop = loop or asyncio.get_event_loop()
+        self._loop = weakref.ref(loop)
+
+        self.count = 0
+        self.start = loop.time()
+        self.current = 0
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+
+        self.handle = None
+        self.wake_tick = None
+
+    @property
+    def loop(self):
+        return self._loop()
+
+    def __len__(self):
+        return self.count
+
+    def call_later(self, delay, callback, *args):
+        """Call ``callback(*args)`` after ``delay`` seconds"""
+        return self.call_at(self.loop.time() + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        """Call ``callback(*args)`` when ``loop.time()`` reaches ``when``"""
+        timer = WheelTimer(self, when, callback, args)
+
+        if self.count == 0:
+            # Nothing is on the wheel, so skip the ticks that passed while idle
+            now = math.floor((self.loop.time() - self.start) / self.resolution)
+            self.current = max(self.current, now)
+
+        tick = max(math.ceil((when - self.start) / self.resolution), self.current + 1)
+
+        self.count += 1
+        self._place(timer, tick)
+
+        if self.wake_tick is None or tick < self.wake_tick:
+            self._schedule(tick)
+
+        return timer
+
+    def _place(self, timer, tick):
+        timer.tick = tick
+        current = self.current
+        slots = self.slots
+
+        span = 1
+        for level in range(self.levels):
+            distance = tick // span - current // span
+            if distance < slots:
+                break
+            span *= slots
+        else:
+            # Further away than the wheel goes, so put it as far as we can
+            # and it'll be placed again when that slot is reached
+            span //= slots
+            tick = current + span * (slots - 1)
+
+        bucket = self.wheels[level][(tick // span) % slots]
+        bucket[timer] = True
+        timer.bucket = bucket
+
+    def _schedule(self, tick):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+
+        if self.handle is not None:
+            self.handle.cancel()
+
+        self.wake_tick = tick
+        self.handle = loop.call_at(self.start + tick * self.resolution, self._run)
+
+    def _run(self):
+        wake_tick = self.wake_tick
+        self.handle = None
+        self.wake_tick = None
+
+        now = max(math.floor((self.loop.time() - self.start) / self.resolution), wake_tick)
+
+        due = []
+        slots = self.slots
+        first = self.wheels[0]
+
+        while self.current < now:
+            if self.count == 0:
+                self.current = now
+                break
+
+            tick = self.current = self.current + 1
+
+            if tick % slots == 0:
+                self._cascade(tick)
+
+            index = tick % slots
+            if first[index]:
+                bucket = first[index]
+                first[index] = {}
+                self.count -= len(bucket)
+                for timer in bucket:
+                    timer.bucket = None
+                    due.append(timer)
+
+        for timer in due:
+            if timer._cancelled:
+                continue
+
+            try:
+                timer.callback(*timer.args)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as error:
+                self.loop.call_exception_handler(
+                    {
+                        "message": f"Exception in callback {timer.callback}",
+                        "exception": error,
+                        "handle": timer,
+                    }
+                )
+
+        self._schedule_next()
+
+    def _cascade(self, tick):
+        slots = self.slots
+
+        highest = 0
+        span = 1
+        while highest < self.levels - 1 and tick % (span * slots) == 0:
+            highest += 1
+            span *= slots
+
+        for level in range(highest, 0, -1):
+            index = (tick // span) % slots
+            bucket = self.wheels[level][index]
+            if bucket:
+                self.wheels[level][index] = {}
+                for timer in bucket:
+                    self._place(timer, timer.tick)
+            span //= slots
+
+    def _schedule_next(self):
+        if self.count == 0:
+            return
+
+        slots = self.slots
+        first = self.wheels[0]
+        boundary = (self.current // slots + 1) * slots
+
+        for tick in range(self.current + 1, boundary):
+            if first[tick % slots]:
+                break
+        else:
+            tick = boundary
+
+        if self.wake_tick is None or tick < self.wake_tick:
+            self._schedule(tick)
+
+
+_timer_wheels = weakref.WeakKeyDictionary()
+
+
+def timer_wheel(loop=None):
+    """
+    Return the shared :class:`TimerWheel` for this event loop, creating it if
+    it doesn't exist yet.
+    """
+    loop = loop or asyncio.get_event_loop()
+    wheel = _timer_wheels.get(loop)
+    if wheel is None:
+        wheel = _timer_wheels[loop] = TimerWheel(loop=loop)
+    return wheel
+
+
 class TaskHolder:
     """
     An object for managing asynchronous coroutines.
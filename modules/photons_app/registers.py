@@ -161,17 +161,32 @@ class MessagesRegister(object):
             [..]
             prot_register = collector.configuration["protocol_register"]
             prot_register.message_register(9001).add(MyAmazingMessages)
+
+    We keep ``by_type`` as a dictionary of ``{pkt_type: kls}`` for all the
+    messages in the classes we have. If two classes have the same pkt_type then
+    the class that was added first wins.
     """
 
     # Ensure delfick_project.option_merge gives back this instance without wrapping it
     _merged_options_formattable = True
 
-    def __init__(self):
+    def __init__(self, on_change=None):
+        self.by_type = {}
+        self.on_change = on_change
         self.message_classes = []
 
     def add(self, kls):
         self.message_classes.append(kls)
 
+        by_type = {}
+        for k in reversed(self.message_classes):
+            if isinstance(getattr(k, "by_type", None), dict):
+                by_type.update(k.by_type)
+        self.by_type = by_type
+
+        if self.on_change is not None:
+            self.on_change()
+
     def __iter__(self):
         return iter(self.message_classes)
 
@@ -193,15 +208,28 @@ class ProtocolRegister(object):
             [..]
             prot_register = collector.configuration["protocol_register"]
             prot_register.add(9001, MyProtocolPacket)
+
+    We keep ``packet_classes`` as a dictionary of
+    ``{(protocol, pkt_type): (Packet, kls)}`` for every message we know about.
+    This is remade whenever a protocol or messages class is added.
     """
 
     _merged_options_formattable = True
 
     def __init__(self):
+        self.packet_classes = {}
         self.protocol_classes = {}
 
     def add(self, protocol, kls):
-        self.protocol_classes[protocol] = (kls, MessagesRegister())
+        self.protocol_classes[protocol] = (kls, MessagesRegister(on_change=self.make_index))
+        self.make_index()
+
+    def make_index(self):
+        packet_classes = {}
+        for protocol, (Packet, messages_register) in self.protocol_classes.items():
+            for pkt_type, kls in messages_register.by_type.items():
+                packet_classes[(protocol, pkt_type)] = (Packet, kls)
+        self.packet_classes = packet_classes
 
     def __getitem__(self, protocol):
         return self.protocol_classes[protocol]
@@ -1,9 +1,10 @@
+from photons_app.errors import PhotonsAppError
 from photons_app.actions import an_action
 
-from photons_messages import Services
+from photons_messages import Services, DeviceMessages
 
 from delfick_project.addons import addon_hook
-from delfick_project.norms import sb
+from delfick_project.norms import sb, Meta
 import binascii
 
 # Get us our actions
@@ -77,3 +78,44 @@ async def find_ips(collector, target, reference, artifact, **kwargs):
             services = found[binascii.unhexlify(serial)]
             if Services.UDP in services:
                 print(f"{serial}: {services[Services.UDP].host}")
+
+
+@an_action(needs_target=True, special_reference=True)
+async def transport_metrics(collector, target, reference, artifact, **kwargs):
+    """
+    Send an EchoRequest to each device and print what the session knows about
+    sending messages to them::
+
+        lifx lan:transport_metrics
+
+    By default this is printed as json, but you can ask for openmetrics::
+
+        lifx lan:transport_metrics _ openmetrics
+
+    You can choose how many messages to send to each device with::
+
+        lifx lan:transport_metrics _ json -- '{"count": 20}'
+    """
+    fmt = "json"
+    if artifact not in (None, "", sb.NotSpecified):
+        fmt = artifact
+
+    if fmt not in ("json", "openmetrics"):
+        raise PhotonsAppError("Metrics can only be shown as json or openmetrics", got=fmt)
+
+    count = 1
+    extra = collector.photons_app.extra_as_json
+    if isinstance(extra, dict):
+        count = sb.integer_spec().normalise(Meta.empty().at("count"), extra.get("count", count))
+
+    msg = DeviceMessages.EchoRequest(echoing=b"photons")
+
+    async with target.session() as sender:
+        for _ in range(count):
+            async for _ in sender(msg, reference, error_catcher=[], message_timeout=2):
+                pass
+
+        if fmt == "json":
+            print(sender.metrics.as_json())
+        else:
+            print(sender.metrics.as_openmetrics(), end="")
@@ -1,3 +1,5 @@
+from photons_protocol.errors import BadConversion, BadSpecValue
+from photons_protocol.packing import PacketCodec, Fallback
 from photons_protocol.packets import dictobj
 from photons_protocol.messages import T
 
@@ -74,9 +76,17 @@ class LIFXPacket(dictobj.PacketSpec):
 
     @property
     def Key(self):
+        """
+        A hashable ``(protocol, pkt_type, payload)`` for this packet
+
+        Where ``payload`` is the packed bytes of the payload, so two packets of
+        the same class have equal keys when they would send the same payload.
+
+        This is cached on the packet and forgotten when a field is set.
+        """
         key = self.__dict__.get("Key", None)
         if key is None:
-            key = (self.protocol, self.pkt_type, repr(self.payload))
+            key = (self.protocol, self.pkt_type, self.payload_key())
             self.__dict__["Key"] = key
         return key
 
@@ -85,6 +95,35 @@ class LIFXPacket(dictobj.PacketSpec):
         if "Key" in self.__dict__:
             del self.__dict__["Key"]
 
+    def payload_key(self):
+        """
+        Return the packed bytes of our payload
+
+        If the payload can't be packed, for example when a required field
+        hasn't been given a value, then we use the repr of the payload instead.
+        """
+        if self.parent_packet:
+            return self.payload
+
+        if not self.Payload.Meta.all_names:
+            return b""
+
+        codec = PacketCodec.for_kls(self.Payload)
+        if codec is not None:
+            try:
+                return codec.pack(self, parent=self)
+            except Fallback:
+                pass
+
+        try:
+            return self.payload.pack(parent=self).tobytes()
+        except (BadConversion, BadSpecValue):
+            return repr(self.payload)
+
+    def __setitem__(self, key, val):
+        self.__dict__.pop("Key", None)
+        super().__setitem__(key, val)
+
     @property
     def serial(self):
         target = self.target
@@ -96,6 +135,10 @@ class LIFXPacket(dictobj.PacketSpec):
     def represents_ack(self):
         return self.Payload.represents_ack
 
+    @property
+    def represents_get(self):
+        return self.Payload.represents_get
+
     def __or__(self, kls):
         """
         Determine if this object is of type ``kls``. It does this by looking at
@@ -192,6 +235,7 @@ class LIFXPacket(dictobj.PacketSpec):
                     "fields": list(payload_fields),
                     "message_type": message_type,
                     "represents_ack": message_type == 45,
+                    "represents_get": name.startswith("Get"),
                 },
             )
             Payload.Meta.protocol = 1024
@@ -8,15 +8,18 @@ of ``photons_protocol.messages.Messages``.
 This class is a combination of a mixin class for functionality and a meta class
 for defining ``by_type`` on the class.
 """
+
 from photons_protocol.types import Type, MultiOptions
 from photons_protocol.errors import BadConversion
 
 from delfick_project.norms import Meta
 from bitarray import bitarray
+from functools import partial
 from textwrap import dedent
 import binascii
 import inspect
 import logging
+import struct
 
 log = logging.getLogger("photons_protocol.messages")
 
@@ -24,12 +27,114 @@ T = Type
 MultiOptions = MultiOptions
 
 
+class Header:
+    """
+    The values in the header of a LIFX datagram as found by
+    ``PacketTypeExtractor.header``
+
+    Only ``size`` and ``protocol`` are set if the protocol isn't 1024, and
+    everything else is ``None``.
+    """
+
+    __slots__ = [
+        "size",
+        "protocol",
+        "addressable",
+        "tagged",
+        "source",
+        "target",
+        "res_required",
+        "ack_required",
+        "sequence",
+        "pkt_type",
+    ]
+
+    def __init__(
+        self,
+        size,
+        protocol,
+        addressable=None,
+        tagged=None,
+        source=None,
+        target=None,
+        res_required=None,
+        ack_required=None,
+        sequence=None,
+        pkt_type=None,
+    ):
+        self.size = size
+        self.protocol = protocol
+        self.addressable = addressable
+        self.tagged = tagged
+        self.source = source
+        self.target = target
+        self.res_required = res_required
+        self.ack_required = ack_required
+        self.sequence = sequence
+        self.pkt_type = pkt_type
+
+    @property
+    def serial(self):
+        if self.target is None:
+            return None
+        return binascii.hexlify(self.target[:6]).decode()
+
+    @property
+    def key(self):
+        """The ``(source, sequence, target)`` used to find who is waiting for this packet"""
+        return (self.source, self.sequence, self.target)
+
+    def __repr__(self):
+        return (
+            f"<Header protocol: {self.protocol}, pkt_type: {self.pkt_type},"
+            f" source: {self.source}, sequence: {self.sequence}, serial: {self.serial}>"
+        )
+
+
 class PacketTypeExtractor:
+    # size, protocol and it's flags, source, target, reserved, flags, sequence, reserved, pkt_type
+    header_struct = struct.Struct("<HHI8s6sBB8sH")
+
+    @classmethod
+    def header(kls, data):
+        """
+        Return a ``Header`` from the start of this ``bytes``, ``bytearray`` or
+        ``memoryview`` without making any bitarray objects.
+        """
+        if len(data) < 4:
+            raise BadConversion("Data is too small to be a LIFX packet", got=len(data))
+
+        size, prot = struct.unpack_from("<HH", data)
+        protocol = prot & 0xFFF
+
+        if protocol != 1024:
+            return Header(size, protocol)
+
+        if len(data) < 36:
+            raise BadConversion(
+                "Data is too small to be a LIFX packet", need_atleast=36, got=len(data)
+            )
+
+        _, _, source, target, _, flags, sequence, _, pkt_type = kls.header_struct.unpack_from(data)
+
+        return Header(
+            size,
+            protocol,
+            addressable=bool(prot & 0x1000),
+            tagged=bool(prot & 0x2000),
+            source=source,
+            target=target,
+            res_required=bool(flags & 0x1),
+            ack_required=bool(flags & 0x2),
+            sequence=sequence,
+            pkt_type=pkt_type,
+        )
+
     @classmethod
     def packet_type(kls, data):
         if isinstance(data, dict):
             return kls.packet_type_from_dict(data)
-        elif isinstance(data, bytes):
+        elif isinstance(data, (bytes, bytearray, memoryview)):
             return kls.packet_type_from_bytes(data)
         elif isinstance(data, bitarray):
             return kls.packet_type_from_bitarray(data)
@@ -59,10 +164,7 @@ class PacketTypeExtractor:
         if len(data) < 28:
             raise BadConversion("Data is too small to be a LIFX packet", got=len(data) // 8)
 
-        b = bitarray(endian="little")
-        b.extend(data[16 : 16 + 12])
-        protbts = b.tobytes()
-        protocol = protbts[0] + (protbts[1] << 8)
+        protocol = int.from_bytes(data[16 : 16 + 12].tobytes(), "little")
 
         pkt_type = None
 
@@ -72,31 +174,14 @@ class PacketTypeExtractor:
                     "Data is too small to be a LIFX packet", need_atleast=36, got=len(data) // 8
                 )
 
-            ptbts = data[256 : 256 + 16].tobytes()
-            pkt_type = ptbts[0] + (ptbts[1] << 8)
+            pkt_type = int.from_bytes(data[256 : 256 + 16].tobytes(), "little")
 
         return protocol, pkt_type
 
     @classmethod
     def packet_type_from_bytes(kls, data):
-        if len(data) < 4:
-            raise BadConversion("Data is too small to be a LIFX packet", got=len(data))
-
-        b = bitarray(endian="little")
-        b.frombytes(data[2:4])
-        protbts = b[:12].tobytes()
-        protocol = protbts[0] + (protbts[1] << 8)
-
-        pkt_type = None
-
-        if protocol == 1024:
-            if len(data) < 36:
-                raise BadConversion(
-                    "Data is too small to be a LIFX packet", need_atleast=36, got=len(data)
-                )
-            pkt_type = data[32] + (data[33] << 8)
-
-        return protocol, pkt_type
+        header = kls.header(data)
+        return header.protocol, header.pkt_type
 
 
 def sources_for(kls):
@@ -128,6 +213,26 @@ def sources_for(kls):
             yield in_kls, dedent("\n".join(buf))
 
 
+class LazySources:
+    """
+    Holds the result of ``sources_for`` for a class, which is only worked out
+    the first time we ask for the source of one of it's attributes.
+    """
+
+    def __init__(self, kls):
+        self.kls = kls
+        self.sources = None
+
+    def source_for(self, attr):
+        if self.sources is None:
+            self.sources = dict(sources_for(self.kls))
+
+        if attr not in self.sources:
+            raise AttributeError("caller_source")
+
+        return self.sources[attr]
+
+
 class MessagesMixin:
     """
     Functionality for a collection of Protocol Messages
@@ -167,6 +272,23 @@ class MessagesMixin:
             data = binascii.unhexlify(data)
 
         protocol, pkt_type = PacketTypeExtractor.packet_type(data)
+        Packet, mkls = kls.packet_kls_for(protocol, pkt_type, protocol_register)
+        return protocol, pkt_type, Packet, mkls, data
+
+    @classmethod
+    def packet_kls_for(kls, protocol, pkt_type, protocol_register):
+        """
+        Return ``(Packet, kls)`` for this protocol and pkt_type as described by
+        ``get_packet_type``.
+
+        We use ``packet_classes`` on the ``protocol_register`` if it has one
+        and only look through each messages class if it doesn't.
+        """
+        packet_classes = getattr(protocol_register, "packet_classes", None)
+        if isinstance(packet_classes, dict):
+            found = packet_classes.get((protocol, pkt_type))
+            if found is not None:
+                return found
 
         prot = protocol_register.get(protocol)
         if prot is None:
@@ -175,13 +297,16 @@ class MessagesMixin:
             )
         Packet, messages_register = prot
 
+        if isinstance(packet_classes, dict):
+            return Packet, None
+
         mkls = None
         for k in messages_register:
             if pkt_type in k.by_type:
                 mkls = k.by_type[pkt_type]
                 break
 
-        return protocol, pkt_type, Packet, mkls, data
+        return Packet, mkls
 
     @classmethod
     def unpack_bytes(kls, data, protocol, pkt_type, protocol_register, unknown_ok=False):
@@ -193,18 +318,7 @@ class MessagesMixin:
             b.frombytes(data)
             data = b
 
-        prot = protocol_register.get(protocol)
-        if prot is None:
-            raise BadConversion(
-                "Unknown packet protocol", wanted=protocol, available=list(protocol_register)
-            )
-        Packet, messages_register = prot
-
-        mkls = None
-        for k in messages_register:
-            if pkt_type in k.by_type:
-                mkls = k.by_type[pkt_type]
-                break
+        Packet, mkls = kls.packet_kls_for(protocol, pkt_type, protocol_register)
 
         if mkls is None:
             if unknown_ok:
@@ -239,9 +353,17 @@ class MessagesMixin:
         Given some payload data as a dictionary and it's ``pkt_type``, return a
         hexlified string of the payload.
         """
-        for k in messages_register or [kls]:
-            if int(pkt_type) in k.by_type:
-                return k.by_type[int(pkt_type)].Payload.normalise(Meta.empty(), data).pack()
+        message_type = int(pkt_type)
+
+        by_type = getattr(messages_register, "by_type", None)
+        if isinstance(by_type, dict):
+            if message_type in by_type:
+                return by_type[message_type].Payload.normalise(Meta.empty(), data).pack()
+        else:
+            for k in messages_register or [kls]:
+                if message_type in k.by_type:
+                    return k.by_type[message_type].Payload.normalise(Meta.empty(), data).pack()
+
         raise BadConversion("Unknown message type!", pkt_type=pkt_type)
 
     @classmethod
@@ -271,7 +393,8 @@ class MessagesMeta(type):
     ``kls.Payload.message_type`` where kls is each message defined on the class.
 
     As a bonus, this puts ``caller_source`` on the ``Meta`` of each message which
-    is the lines that make up it's definition. This is used for ``photons-docs``.
+    is the lines that make up it's definition. This is used for ``photons-docs``
+    and is only worked out the first time it is accessed.
     """
 
     def __new__(metaname, classname, baseclasses, attrs):
@@ -290,10 +413,21 @@ class MessagesMeta(type):
         attrs["by_type"] = by_type
         kls = type.__new__(metaname, classname, baseclasses, attrs)
 
-        for attr, source in sources_for(kls):
-            if attr in attrs:
-                if not hasattr(attrs[attr].Meta, "caller_source"):
-                    attrs[attr].Meta.caller_source = source
+        sources = LazySources(kls)
+        for attr, val in attrs.items():
+            if not attr[0].isupper() or not hasattr(val, "Payload"):
+                continue
+
+            M = val.Meta
+            if "caller_source" in M.__dict__:
+                continue
+
+            lazy = M.__dict__.get("lazy_attributes")
+            if lazy is None:
+                lazy = M.lazy_attributes = {}
+
+            if "caller_source" not in lazy:
+                lazy["caller_source"] = partial(sources.source_for, attr)
 
         return kls
 
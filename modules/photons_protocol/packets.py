@@ -22,6 +22,7 @@ Usage looks like:
 where the ``*_type`` objects have information related to the type for that
 field. See ``photons_protocol.types`` for builtin types.
 """
+
 from photons_protocol.packing import PacketPacking, val_to_bitarray
 from photons_protocol.types import Optional, Type as T
 
@@ -103,15 +104,40 @@ class PacketSpecMixin:
         return packing_kls.pack(self, payload, parent, serial)
 
     @classmethod
-    def unpack(kls, value, packing_kls=PacketPacking):
+    def pack_many(kls, rows, packing_kls=PacketPacking):
+        """
+        Pack many packets of this class into a single buffer.
+
+        ``rows`` is a sequence of instances of this class or dictionaries of
+        fields to create instances from.
+
+        Return a list of ``memoryview`` objects, one for each row, that all
+        share the one underlying ``bytearray``.
+        """
+        pkts = [row if isinstance(row, kls) else kls(**row) for row in rows]
+        return packing_kls.pack_many(kls, pkts)
+
+    @classmethod
+    def unpack(kls, value, packing_kls=PacketPacking, lazy=False):
         """
         Unpack a ``value`` into an instance of this class.
+
+        If ``lazy`` is True then the payload fields are only decoded when they
+        are first accessed.
         """
+        if lazy:
+            return packing_kls.unpack_lazy(kls, value)
         return packing_kls.unpack(kls, value)
 
+    def _load_lazy_payload(self):
+        """Decode the payload if we were made by ``unpack(lazy=True)``"""
+        lazy = self.__dict__.pop("_lazy_payload", None)
+        if lazy is not None:
+            lazy.load_into(self)
+
     @classmethod
     def size_bits(kls, values):
-        """Return the number of bits this packet requires. """
+        """Return the number of bits this packet requires."""
         total = 0
         for name, typ in kls.Meta.field_types:
             if callable(typ.size_bits):
@@ -161,14 +187,21 @@ class PacketSpecMixin:
         return any(k == key for k in self.Meta.all_names) or any(k == key for k in self.Meta.groups)
 
     def keys(self):
+        self._load_lazy_payload()
         for k in dictobj.__iter__(self):
             yield k
 
+    def get(self, key, default=None):
+        self._load_lazy_payload()
+        return super().get(key, default)
+
     def actual_items(self):
+        self._load_lazy_payload()
         for key in self.keys():
             yield key, super().__getitem__(key)
 
     def actual_values(self):
+        self._load_lazy_payload()
         for key in self.keys():
             yield super().__getitem__(key)
 
@@ -206,6 +239,10 @@ class PacketSpecMixin:
         """
         M = object.__getattribute__(self, "Meta")
 
+        lazy = self.__dict__.get("_lazy_payload")
+        if lazy is not None and key in lazy.names:
+            self._load_lazy_payload()
+
         # If we're requesting one of the groups, then we must assemble from the keys in that group
         # Unless the group is an empty Payload (message_type of 0 on the type)
         # In that case, there are no fields, so we return as it is found on the class
@@ -262,8 +299,12 @@ class PacketSpecMixin:
             if callable(actual):
                 actual = actual(parent or self, serial)
 
-        spec = typ.spec(self, unpacking, transform=False)
-        res = spec.normalise(Meta.empty().at(key), actual)
+        try:
+            meta = object.__getattribute__(self, "Meta").field_metas[key]
+        except (AttributeError, KeyError):
+            meta = Meta.empty().at(key)
+
+        res = typ.normalise(self, meta, actual, unpacking=unpacking)
 
         if do_transform and unpacking and res is not sb.NotSpecified and res is not Optional:
             res = typ.untransform(self, res)
@@ -297,6 +338,10 @@ class PacketSpecMixin:
 
         We also see if a field has a transform option and use it if it's there
         """
+        lazy = self.__dict__.get("_lazy_payload")
+        if lazy is not None and (key in lazy.names or key in self.Meta.groups):
+            self._load_lazy_payload()
+
         if key in self.Meta.groups:
             if val is Initial:
                 # Special case because of the logic in dictobj that sets default values on initialization
@@ -432,12 +477,38 @@ class PacketSpecMixin:
         else:
             return self.simplify(serial).pack().tobytes()
 
+    def __eq__(self, other):
+        self._load_lazy_payload()
+        if isinstance(other, PacketSpecMixin):
+            other._load_lazy_payload()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
     def as_dict(self, transformed=True):
-        """Return this packet as a normal python dictionary"""
+        """
+        Return this packet as a normal python dictionary
+
+        Values are made from what is stored on the packet using the same specs
+        as ``__getitem__``, without going through ``__getitem__`` for each field.
+        """
+        self._load_lazy_payload()
+
+        M = self.Meta
         final = {}
-        groups = self.Meta.groups
-        for name in self.Meta.all_names:
-            val = self.__getitem__(name, do_transform=transformed)
+        name_to_group = M.name_to_group
+        field_types = M.all_field_types_dict
+        for name in M.all_names:
+            typ = field_types[name]
+            if typ._multiple:
+                val = self.__getitem__(name, do_transform=transformed)
+            else:
+                actual = dict.get(self, name, sb.NotSpecified)
+                val = self.getitem_spec(typ, name, actual, None, None, transformed, False, True)
 
             if val is Optional:
                 continue
@@ -451,16 +522,16 @@ class PacketSpecMixin:
                         newval.append(thing)
                 val = newval
 
-            gs = [group for group, names in groups.items() if name in names]
-            if gs:
-                if gs[0] not in final:
-                    final[gs[0]] = {}
-                final[gs[0]][name] = val
-            else:
+            group = name_to_group.get(name)
+            if group is None:
                 final[name] = val
+            elif group in final:
+                final[group][name] = val
+            else:
+                final[group] = {name: val}
 
-        if self.Meta.groups and getattr(self, "parent_packet", False):
-            name, typ = self.Meta.field_types[-1]
+        if M.groups and getattr(self, "parent_packet", False):
+            name, typ = M.field_types[-1]
             if getattr(typ, "message_type", None) == 0:
                 final[name] = self.__getitem__(name, do_transform=transformed)
 
@@ -570,7 +641,19 @@ class PacketSpecMetaKls(dictobj.Field.metaclass):
             def __repr__(self):
                 return "<type {0}.Meta>".format(classname)
 
-        Meta = type.__new__(
+            def __getattr__(self, key):
+                """
+                Attributes in ``lazy_attributes`` are made on first access by
+                calling the function for them, and then stored on the Meta
+                """
+                lazy = self.__dict__.get("lazy_attributes")
+                if lazy and key in lazy:
+                    value = lazy.pop(key)()
+                    setattr(self, key, value)
+                    return value
+                raise AttributeError(key)
+
+        MetaKls = type.__new__(
             MetaRepr,
             "Meta",
             (),
@@ -585,10 +668,11 @@ class PacketSpecMetaKls(dictobj.Field.metaclass):
                 "original_fields": fields,
                 "field_types_dict": dict(field_types),
                 "all_field_types_dict": dict(all_fields),
+                "field_metas": {name: Meta.empty().at(name) for name in all_names},
             },
         )
 
-        attrs["Meta"] = Meta
+        attrs["Meta"] = MetaKls
 
         def dflt(in_group):
             return Initial if in_group else sb.NotSpecified
@@ -26,6 +26,31 @@ def val_to_bitarray(val, doing):
     return b
 
 
+def unpack_values(typ, val, size_bits, number):
+    """
+    Return a list of ``number`` values of ``typ`` from ``val``, where each value
+    takes ``size_bits`` bits, using a single ``struct.iter_unpack`` call.
+
+    Return None if ``typ`` doesn't have a struct format that fills exactly
+    ``size_bits`` bits or ``val`` isn't exactly ``number`` of those values. The
+    caller should unpack each value with ``BitarraySlice`` in that case.
+    """
+    fmt = typ.struct_format
+    if type(fmt) is not str or size_bits % 8 != 0 or len(val) != size_bits * number:
+        return None
+
+    if getattr(typ, "original_size", size_bits) != size_bits:
+        return None
+
+    try:
+        if struct.calcsize(fmt) * 8 != size_bits:
+            return None
+    except struct.error:
+        return None
+
+    return [v for v, in struct.iter_unpack(fmt, val.tobytes())]
+
+
 class BitarraySlice(dictobj):
     fields = ["name", "typ", "val", "size_bits", "group"]
 
@@ -142,6 +167,345 @@ class FieldInfo(dictobj):
         return b
 
 
+class Fallback(Exception):
+    """Used by PacketCodec to say a value needs the bitarray path"""
+
+
+class CodecField:
+    """
+    A single field in a ``PacketCodec``
+
+    ``shift`` is the position of this field's bits inside the integer that
+    represents the bitfield it belongs to. It is ``None`` for fields that have
+    their own slot in the struct.
+    """
+
+    __slots__ = ["name", "typ", "fmt", "size_bits", "original_size", "left_cut", "shift", "mask"]
+
+    def __init__(self, name, typ, shift=None):
+        self.name = name
+        self.typ = typ
+        self.fmt = typ.struct_format
+        self.size_bits = typ.size_bits
+        self.original_size = getattr(typ, "original_size", typ.size_bits)
+        self.left_cut = getattr(typ, "left_cut", False)
+        self.shift = shift
+        self.mask = (1 << self.size_bits) - 1
+
+    @property
+    def is_reserved(self):
+        return self.typ.__class__.__name__ == "Reserved"
+
+    def bits_from(self, val):
+        """Return the bits for this value as an integer"""
+        if val is sb.NotSpecified:
+            if self.is_reserved:
+                return 0
+            raise Fallback()
+
+        fmt = self.fmt
+
+        if fmt is bool:
+            if type(val) is not bool:
+                raise Fallback()
+            return int(val)
+
+        if fmt is None:
+            if type(val) is not bitarray or len(val) != self.size_bits:
+                raise Fallback()
+            return int.from_bytes(val.tobytes(), "little")
+
+        if val is Optional:
+            val = 0
+        elif type(val) is bitarray:
+            raise Fallback()
+
+        raw = int.from_bytes(struct.pack(fmt, val), "little")
+        if self.size_bits < self.original_size:
+            if self.left_cut:
+                raw >>= self.original_size - self.size_bits
+            else:
+                raw &= self.mask
+        return raw
+
+    def value_from(self, bits):
+        """Return the value for these bits as BitarraySlice.unpackd would"""
+        fmt = self.fmt
+
+        if fmt is bool:
+            return bool(bits)
+
+        if fmt is None:
+            b = bitarray(endian="little")
+            b.frombytes(bits.to_bytes((self.size_bits + 7) // 8, "little"))
+            return b[: self.size_bits]
+
+        if self.left_cut:
+            bits <<= self.original_size - self.size_bits
+        return struct.unpack(fmt, bits.to_bytes(self.original_size // 8, "little"))[0]
+
+
+class PacketCodec:
+    """
+    A precomputed ``struct.Struct`` for packets with a fixed layout.
+
+    Fields that are byte aligned and fill their struct format get their own
+    slot in the struct. Runs of fields that aren't byte aligned (for example
+    ``protocol``, ``addressable``, ``tagged`` and ``reserved1`` in the frame
+    header) are combined into a single integer slot using masks and shifts.
+
+    A codec is only made for packets where every field has a static size and
+    isn't a ``multiple``. ``PacketCodec.for_kls`` returns ``None`` for all
+    other packets, and those use the bitarray path in ``PacketPacking``.
+
+    The codec is created once per packet class and stored on it's ``Meta``.
+
+    Fields that have their own slot are in ``offsets`` as
+    ``{name: (offset, struct.Struct)}`` so they can be changed in already
+    packed bytes.
+    """
+
+    bitfield_formats = {8: "B", 16: "H", 32: "I", 64: "Q"}
+
+    def __init__(self, slots, size_bits):
+        self.slots = slots
+        self.size_bits = size_bits
+        self.size_bytes = size_bits // 8
+        self.names = [field.name for _, fields in slots for field in fields]
+
+        fmt = ["<"]
+        offset = 0
+        self.offsets = {}
+        for code, fields in slots:
+            fmt.append(code)
+            slot = struct.Struct("<" + code)
+            if fields[0].shift is None:
+                self.offsets[fields[0].name] = (offset, slot)
+            offset += slot.size
+        self.struct = struct.Struct("".join(fmt))
+
+    @classmethod
+    def for_kls(kls, pkt_kls):
+        """Return the codec for this class, or None if it can't have one"""
+        M = getattr(pkt_kls, "Meta", None)
+        if M is None:
+            return None
+
+        codec = M.__dict__.get("codec", sb.NotSpecified)
+        if codec is sb.NotSpecified:
+            codec = kls.make(getattr(M, "all_field_types", None))
+            try:
+                M.codec = codec
+            except (TypeError, AttributeError):
+                pass
+        return codec
+
+    @classmethod
+    def make(kls, all_field_types):
+        """Make a codec from these fields, or return None if they don't have a fixed layout"""
+        if not isinstance(all_field_types, list) or not all_field_types:
+            return None
+
+        slots = []
+        bitfield = []
+        offset = 0
+        bitfield_start = 0
+
+        for name, typ in all_field_types:
+            size_bits = getattr(typ, "size_bits", None)
+            if typ._multiple or type(size_bits) is not int or size_bits <= 0:
+                return None
+
+            fmt = typ.struct_format
+            full_size = None
+            if type(fmt) is str:
+                if not fmt.startswith("<"):
+                    return None
+                full_size = struct.calcsize(fmt) * 8
+                if getattr(typ, "original_size", size_bits) != full_size or size_bits > full_size:
+                    return None
+            elif fmt is bool:
+                if size_bits != 1:
+                    return None
+            elif fmt is not None:
+                return None
+
+            aligned = offset % 8 == 0 and size_bits % 8 == 0
+            if not bitfield and aligned and (fmt is None or full_size == size_bits):
+                if fmt is None:
+                    code = "{0}s".format(size_bits // 8)
+                else:
+                    code = fmt[1:]
+                slots.append((code, [CodecField(name, typ)]))
+            else:
+                if not bitfield:
+                    bitfield_start = offset
+                bitfield.append(CodecField(name, typ, shift=offset - bitfield_start))
+
+            offset += size_bits
+
+            if bitfield and offset % 8 == 0:
+                slots.append((kls.bitfield_code(offset - bitfield_start), bitfield))
+                bitfield = []
+
+        if bitfield:
+            return None
+
+        return kls(slots, offset)
+
+    @classmethod
+    def bitfield_code(kls, size_bits):
+        if size_bits in kls.bitfield_formats:
+            return kls.bitfield_formats[size_bits]
+        return "{0}s".format(size_bits // 8)
+
+    def pack(self, pkt, parent=None, serial=None):
+        """
+        Return the bytes for this packet.
+
+        Values are retrieved the same way ``PacketPacking.fields_in`` does. If
+        any value is not something we can pack directly, then ``Fallback`` is
+        raised and the caller should use the bitarray path instead.
+        """
+        try:
+            return self.struct.pack(*self.values(pkt, parent, serial))
+        except struct.error:
+            raise Fallback()
+
+    def pack_into(self, buf, offset, pkt, parent=None, serial=None):
+        """
+        Write the bytes for this packet into ``buf`` starting at ``offset``.
+
+        This raises ``Fallback`` in the same situations as ``pack``.
+        """
+        try:
+            self.struct.pack_into(buf, offset, *self.values(pkt, parent, serial))
+        except struct.error:
+            raise Fallback()
+
+    def values(self, pkt, parent=None, serial=None):
+        """Return the values from this packet for each slot in our struct"""
+        values = []
+        for code, fields in self.slots:
+            if fields[0].shift is None:
+                field = fields[0]
+                val = pkt.__getitem__(
+                    field.name,
+                    parent=parent,
+                    serial=serial,
+                    allow_bitarray=True,
+                    unpacking=False,
+                    do_transform=False,
+                )
+
+                if field.fmt is None:
+                    if val is sb.NotSpecified and field.is_reserved:
+                        val = bytes(field.size_bits // 8)
+                    elif type(val) is bitarray and len(val) == field.size_bits:
+                        val = val.tobytes()
+                    else:
+                        raise Fallback()
+                elif val is Optional:
+                    val = 0
+                elif val is sb.NotSpecified or type(val) is bitarray:
+                    raise Fallback()
+
+                values.append(val)
+                continue
+
+            total = 0
+            for field in fields:
+                val = pkt.__getitem__(
+                    field.name,
+                    parent=parent,
+                    serial=serial,
+                    allow_bitarray=True,
+                    unpacking=False,
+                    do_transform=False,
+                )
+                try:
+                    total |= field.bits_from(val) << field.shift
+                except (struct.error, TypeError, ValueError, OverflowError):
+                    raise Fallback()
+
+            if code.endswith("s"):
+                total = total.to_bytes(int(code[:-1]), "little")
+            values.append(total)
+
+        return values
+
+    def unpack_into(self, final, data):
+        """
+        Set values from ``data`` onto ``final``, as ``pkt_from_bitarray`` would.
+
+        ``data`` must be a bytes like object with at least ``size_bytes`` bytes.
+        """
+        return self.set_values(final, self.struct.unpack_from(data))
+
+    def unpack_many(self, pkt_kls, data):
+        """
+        Return a list of ``pkt_kls`` instances, one for every ``size_bytes`` in
+        ``data``, using a single ``struct.iter_unpack`` call.
+
+        The length of ``data`` must be a multiple of ``size_bytes``.
+
+        Every field is set from the struct, so we don't need the instances to go
+        through dictobj's setup to give each field a NotSpecified value first.
+        """
+        new = pkt_kls.__new__
+        return [self.set_values(new(pkt_kls), values) for values in self.struct.iter_unpack(data)]
+
+    def set_values(self, final, values):
+        """Set values that came from our struct onto ``final``"""
+        for (code, fields), val in zip(self.slots, values):
+            if fields[0].shift is None:
+                field = fields[0]
+                if field.fmt is None:
+                    b = bitarray(endian="little")
+                    b.frombytes(val)
+                    val = b
+                dictobj.__setitem__(final, field.name, val)
+                continue
+
+            if type(val) is bytes:
+                val = int.from_bytes(val, "little")
+
+            for field in fields:
+                bits = (val >> field.shift) & field.mask
+                dictobj.__setitem__(final, field.name, field.value_from(bits))
+
+        return final
+
+
+class LazyPayload:
+    """
+    The undecoded payload of a packet made by ``PacketPacking.unpack_lazy``
+
+    ``data`` is a ``memoryview`` over the bytes after the header and is only
+    decoded into the fields of ``Payload`` when ``load_into`` is called.
+    """
+
+    __slots__ = ["Payload", "data", "names"]
+
+    def __init__(self, Payload, data):
+        self.data = data
+        self.Payload = Payload
+        self.names = frozenset(Payload.Meta.all_names)
+
+    def load_into(self, pkt):
+        """Set the values for our payload fields onto ``pkt``"""
+        codec = PacketCodec.for_kls(self.Payload)
+        if codec is not None and len(self.data) >= codec.size_bytes:
+            codec.unpack_into(pkt, self.data)
+            return
+
+        value = bitarray(endian="little")
+        value.frombytes(bytes(self.data))
+        payload, _ = PacketPacking.pkt_from_bitarray(self.Payload, value)
+        for name, val in payload.actual_items():
+            dictobj.__setitem__(pkt, name, val)
+
+
 class PacketPacking(object):
     @classmethod
     def fields_in(kls, pkt, parent, serial):
@@ -200,13 +564,15 @@ class PacketPacking(object):
 
             if multiple:
                 if typ.struct_format:
-                    res = []
-                    j = 0
-                    for _ in range(multiple):
-                        v = val[j : j + single_size_bits]
-                        j += single_size_bits
-                        info = BitarraySlice(name, typ, v, single_size_bits, pkt_kls.__name__)
-                        res.append(info.unpackd)
+                    res = unpack_values(typ, val, single_size_bits, multiple)
+                    if res is None:
+                        res = []
+                        j = 0
+                        for _ in range(multiple):
+                            v = val[j : j + single_size_bits]
+                            j += single_size_bits
+                            info = BitarraySlice(name, typ, v, single_size_bits, pkt_kls.__name__)
+                            res.append(info.unpackd)
                     val = res
                 final[name] = val
             else:
@@ -226,20 +592,50 @@ class PacketPacking(object):
 
         This code assumes the packet has little endian.
 
+        If the packet has a fixed layout then we use it's ``PacketCodec`` to
+        pack all the fields with one ``struct`` call instead.
+
         If ``payload`` is provided and this packet is a ``parent_packet`` and
         it's last field has a ``message_type`` property of 0, then that payload
         is converted into a bitarray and added to the end of the result.
         """
-        final = bitarray(endian="little")
+        final = None
+
+        codec = PacketCodec.for_kls(type(pkt))
+        if codec is not None:
+            try:
+                bts = codec.pack(pkt, parent, serial)
+            except Fallback:
+                pass
+            else:
+                final = bitarray(endian="little")
+                final.frombytes(bts)
 
-        for info in kls.fields_in(pkt, parent, serial):
-            result = info.to_sized_bitarray()
+        if final is None:
+            final = bitarray(endian="little")
 
-            if result is None:
-                raise BadConversion("Failed to convert field into a bitarray", field=info.as_dict())
+            for info in kls.fields_in(pkt, parent, serial):
+                result = info.to_sized_bitarray()
+
+                if result is None:
+                    raise BadConversion(
+                        "Failed to convert field into a bitarray", field=info.as_dict()
+                    )
 
-            final += result
+                final += result
 
+        trailing = kls.trailing_payload(pkt, payload)
+        if trailing is not None:
+            final += trailing
+
+        return final
+
+    @classmethod
+    def trailing_payload(kls, pkt, payload=None):
+        """
+        Return the payload that goes after the fields of this packet as a
+        bitarray, or None if it doesn't have one
+        """
         # If this is a parent packet with a Payload of message_type 0
         # Then this means we have no payload fields and so must append
         # The entire payload at the end
@@ -247,11 +643,57 @@ class PacketPacking(object):
         if getattr(pkt, "parent_packet", False) and pkt.Meta.field_types:
             name, typ = pkt.Meta.field_types[-1]
             if getattr(typ, "message_type", None) == 0:
-                final += val_to_bitarray(
+                return val_to_bitarray(
                     payload or pkt[name], doing="Adding payload when packing a packet"
                 )
 
-        return final
+    @classmethod
+    def pack_many(kls, pkt_kls, pkts, parent=None, serial=None):
+        """
+        Pack many instances of ``pkt_kls`` into one ``bytearray`` and return a
+        list of ``memoryview`` slices of that buffer, one for each packet.
+
+        If ``pkt_kls`` has a fixed layout, the buffer is allocated once and each
+        packet is written straight into it with ``PacketCodec.pack_into``,
+        followed by the payload of parent packets that carry their payload as
+        bytes. Otherwise each packet is packed as normal and the results are
+        joined into the one buffer.
+        """
+        codec = PacketCodec.for_kls(pkt_kls)
+
+        if codec is None:
+            packed = [kls.pack(pkt, parent=parent, serial=serial).tobytes() for pkt in pkts]
+            buf = bytearray(b"".join(packed))
+            sizes = [len(bts) for bts in packed]
+        else:
+            size = codec.size_bytes
+            trailing = []
+            for pkt in pkts:
+                payload = kls.trailing_payload(pkt)
+                trailing.append(b"" if payload is None else payload.tobytes())
+
+            sizes = [size + len(payload) for payload in trailing]
+            buf = bytearray(sum(sizes))
+
+            offset = 0
+            for pkt, payload, total in zip(pkts, trailing, sizes):
+                try:
+                    codec.pack_into(buf, offset, pkt, parent, serial)
+                except Fallback:
+                    bts = kls.pack(pkt, parent=parent, serial=serial).tobytes()
+                    buf[offset : offset + total] = bts
+                else:
+                    buf[offset + size : offset + total] = payload
+                offset += total
+
+        view = memoryview(buf)
+
+        result = []
+        offset = 0
+        for size in sizes:
+            result.append(view[offset : offset + size])
+            offset += size
+        return result
 
     @classmethod
     def unpack(kls, pkt_kls, value):
@@ -266,13 +708,59 @@ class PacketPacking(object):
         If this is a ``parent_packet`` and the last field has a ``message_type``
         property of 0, then the remainder of the ``value`` is assigned as
         bytes to that field on the final instance.
+
+        If the value is bytes and ``pkt_kls`` has a fixed layout, then the
+        fields are unpacked with it's ``PacketCodec`` instead.
         """
-        value = val_to_bitarray(value, doing="Making bitarray to unpack")
-        final, index = kls.pkt_from_bitarray(pkt_kls, value)
+        if type(value) is str:
+            value = binascii.unhexlify(value.encode())
 
-        if getattr(pkt_kls, "parent_packet", False) and index < len(value):
+        codec = PacketCodec.for_kls(pkt_kls)
+        if codec is not None and type(value) is bytes and len(value) >= codec.size_bytes:
+            final = codec.unpack_into(pkt_kls(), value)
+            remainder = value[codec.size_bytes :]
+        else:
+            value = val_to_bitarray(value, doing="Making bitarray to unpack")
+            final, index = kls.pkt_from_bitarray(pkt_kls, value)
+            remainder = value[index:]
+
+        if getattr(pkt_kls, "parent_packet", False) and remainder:
             for name, typ in pkt_kls.Meta.field_types:
                 if getattr(typ, "message_type", None) == 0:
-                    final[name] = value[index:]
+                    final[name] = val_to_bitarray(remainder, doing="Getting payload to unpack")
+
+        return final
+
+    @classmethod
+    def unpack_lazy(kls, pkt_kls, value):
+        """
+        Unpack ``value`` into an instance of ``pkt_kls`` without decoding the
+        payload.
+
+        The header fields are decoded straight away from fixed offsets in a
+        ``memoryview`` of the ``value`` using the ``PacketCodec`` of the
+        ``parent`` of ``pkt_kls``. The payload fields are decoded from that same
+        ``memoryview`` when one of them is first accessed.
+
+        If ``pkt_kls`` doesn't have a parent with a fixed layout, or ``value``
+        isn't a bytes like object, then we use ``unpack`` instead.
+        """
+        if type(value) is str:
+            value = binascii.unhexlify(value.encode())
+
+        parent = getattr(pkt_kls.Meta, "parent", None)
+        if parent is None or type(value) not in (bytes, bytearray, memoryview):
+            return kls.unpack(pkt_kls, value)
+
+        codec = PacketCodec.for_kls(parent)
+        if codec is None or len(value) < codec.size_bytes:
+            return kls.unpack(pkt_kls, bytes(value))
+
+        data = memoryview(value)
+        final = codec.unpack_into(pkt_kls(), data)
+
+        Payload = getattr(pkt_kls, "Payload", None)
+        if Payload is not None and Payload.Meta.all_names:
+            final.__dict__["_lazy_payload"] = LazyPayload(Payload, data[codec.size_bytes :])
 
         return final
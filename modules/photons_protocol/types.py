@@ -243,6 +243,76 @@ class Type(object):
         else:
             return spec
 
+    def normalise(self, pkt, meta, val, unpacking=False):
+        """
+        Equivalent to ``self.spec(pkt, unpacking, transform=False).normalise(meta, val)``
+
+        But we use the memoized spec from ``static_spec`` when this type doesn't
+        need the packet to create it and apply the default, override and optional
+        options here instead of creating wrapper specs.
+        """
+        spec = self.static_spec(unpacking)
+        if spec is None:
+            return self.spec(pkt, unpacking, transform=False).normalise(meta, val)
+
+        if self._allow_callable:
+            if val is sb.NotSpecified or callable(val):
+                return val
+
+        elif self._override is not sb.NotSpecified:
+            return self._override(pkt)
+
+        elif self._default is not sb.NotSpecified:
+            if val is sb.NotSpecified:
+                val = self._default(pkt)
+
+        elif self._optional:
+            if val is sb.NotSpecified or val is Optional:
+                return Optional
+
+        return spec.normalise(meta, val)
+
+    def static_spec(self, unpacking=False):
+        """
+        Return a spec for this type that doesn't depend on the packet, or None
+        if the packet is needed to create the spec.
+
+        This spec doesn't have the callable, override, default, optional or
+        multiple options applied to it and is only made once per type.
+        """
+        cache = self.__dict__.get("_static_specs")
+        if cache is None:
+            cache = self.__dict__["_static_specs"] = {}
+
+        if unpacking not in cache:
+            spec = None
+            if self.is_static:
+                spec = self._spec(None, unpacking=unpacking)
+            cache[unpacking] = spec
+
+        return cache[unpacking]
+
+    @property
+    def is_static(self):
+        """
+        Whether the spec for this type can be made without a packet
+
+        Dynamic and multiple fields, callable sizes, and enums or bitmasks
+        that are made from the packet all need the packet. Enums and bitmasks
+        that are an Enum class are static.
+        """
+        if self._dynamic is not sb.NotSpecified or self._multiple:
+            return False
+
+        if callable(self.size_bits):
+            return False
+
+        for option in (self._enum, self._bitmask):
+            if option is not sb.NotSpecified and type(option) is not enum.EnumMeta:
+                return False
+
+        return True
+
     def _maybe_transform_spec(self, pkt, spec, unpacking, transform=True):
         """
         Return a wrapped spec with do_transform
@@ -416,26 +486,65 @@ class multiple_spec(sb.Spec):
             return self.pack(meta, val)
 
     def unpack_bytes(self, meta, val, kls, number):
+        bts = self.bytes_spec.normalise(meta, val)
+
+        res = self.unpack_all_bytes(meta, bts, kls, number)
+        if res is None:
+            res = self.unpack_each_bytes(meta, bts, kls)
+
+        return MultipleWrapper(res, kls, number, meta, self.val_to_kls)
+
+    def unpack_all_bytes(self, meta, bts, kls, number):
+        """
+        Unpack all the items in one go if they have a fixed layout
+
+        Items of a ``kls`` with a ``PacketCodec`` are made straight from the
+        codec's struct, and items without a ``kls`` are unpacked with a single
+        struct call before being normalised.
+
+        Return None if we can't do this.
+        """
+        from photons_protocol.packing import PacketCodec, unpack_values
+
+        if number <= 0 or len(bts) != self.per_size * number:
+            return None
+
+        if not kls:
+            values = unpack_values(self.typ, bts, self.per_size, number)
+            if values is None:
+                return None
+            return [self.spec.normalise(meta.indexed_at(i), v) for i, v in enumerate(values)]
+
+        if getattr(kls, "parent_packet", False):
+            return None
+
+        codec = PacketCodec.for_kls(kls)
+        if codec is None or codec.size_bits != self.per_size:
+            return None
+
+        return codec.unpack_many(kls, bts.tobytes())
+
+    def unpack_each_bytes(self, meta, bts, kls):
         from photons_protocol.packing import BitarraySlice
 
         res = []
-        bts = self.bytes_spec.normalise(meta, val)
 
         i = -1
+        start = 0
         while True:
             i += 1
-            v = bts[: self.per_size]
+            v = bts[start : start + self.per_size]
             info = BitarraySlice("", self.typ, v, self.per_size, type(self.pkt).__name__)
             nxt = self.spec.normalise(meta.indexed_at(i), info.unpackd)
             if kls:
                 nxt = kls.unpack(nxt)
 
             res.append(nxt)
-            bts = bts[self.per_size :]
-            if not bts:
+            start += self.per_size
+            if start >= len(bts):
                 break
 
-        return MultipleWrapper(res, kls, number, meta, self.val_to_kls)
+        return res
 
     def unpack_list(self, meta, val, kls, number):
         if len(val) > number:
@@ -626,6 +735,66 @@ class version_number_spec(sb.Spec):
             return (major << 0x10) + minor
 
 
+class EnumLookup:
+    """
+    Precomputed lookups for the ways we accept members of an enum
+
+    ``by_name``
+        From the name and repr of each member to that member
+
+    ``by_any``
+        From the name, repr and value of each member to that member
+
+    Where more than one member matches a key, the first member wins, which is
+    the same as looping through the members in order.
+    """
+
+    cache = {}
+
+    @classmethod
+    def for_enum(kls, em):
+        lookup = kls.cache.get(em)
+        if lookup is None:
+            lookup = kls.cache[em] = kls(em)
+        return lookup
+
+    def __init__(self, em):
+        self.members = list(em.__members__.items())
+        self.available = [(name, member.value) for name, member in self.members]
+
+        self.zero_name = None
+        self.by_name = {}
+        self.by_any = {}
+
+        for name, member in self.members:
+            if member.value == 0 and self.zero_name is None:
+                self.zero_name = name
+
+            for key in (name, repr(member)):
+                self.by_name.setdefault(key, member)
+                self.by_any.setdefault(key, member)
+
+            try:
+                self.by_any.setdefault(member.value, member)
+            except TypeError:
+                pass
+
+    def find(self, val, with_value=True):
+        """
+        Return the member that matches this val by name, repr or (if
+        ``with_value``) value, or None if there isn't one.
+
+        Only str and int values use the tables so that objects with unusual hash
+        and equality behaviour are still compared against each member in order.
+        """
+        if type(val) is str or type(val) is int:
+            return (self.by_any if with_value else self.by_name).get(val)
+
+        for name, member in self.members:
+            if val == name or val == repr(member) or (with_value and val == member.value):
+                return member
+
+
 class integer_spec(sb.Spec):
     """
     Normalise an integer
@@ -645,6 +814,13 @@ class integer_spec(sb.Spec):
         if self.enum and self.bitmask:
             raise ProgrammerError("Sorry, can't specify enum and bitmask for the same type")
 
+        if self.enum:
+            self.spec = enum_spec(pkt, enum, unpacking=unpacking, allow_unknown=unknown_enum_values)
+        elif self.bitmask:
+            self.spec = bitmask_spec(pkt, bitmask, unpacking=unpacking)
+        else:
+            self.spec = sb.integer_spec()
+
     def normalise_filled(self, meta, val):
         """
         If we don't have an enum or bitmask
@@ -661,15 +837,8 @@ class integer_spec(sb.Spec):
         if self.enum is None and self.bitmask is None:
             if self.allow_float and type(val) is float:
                 return val
-            return sb.integer_spec().normalise(meta, val)
 
-        if self.enum:
-            kwargs = dict(unpacking=self.unpacking, allow_unknown=self.unknown_enum_values)
-            return enum_spec(self.pkt, self.enum, **kwargs).normalise(meta, val)
-        else:
-            return bitmask_spec(self.pkt, self.bitmask, unpacking=self.unpacking).normalise(
-                meta, val
-            )
+        return self.spec.normalise(meta, val)
 
 
 class bitmask_spec(sb.Spec):
@@ -743,13 +912,13 @@ class bitmask_spec(sb.Spec):
         except TypeError:
             raise ProgrammerError("Bitmask is not an enum! got {0}".format(repr(bitmask)))
 
-        for name, member in bitmask.__members__.items():
-            if member.value == 0:
-                raise ProgrammerError(
-                    "A bitmask with a zero value item makes no sense: {0} in {1}".format(
-                        name, repr(bitmask)
-                    )
+        zero = EnumLookup.for_enum(bitmask).zero_name
+        if zero is not None:
+            raise ProgrammerError(
+                "A bitmask with a zero value item makes no sense: {0} in {1}".format(
+                    zero, repr(bitmask)
                 )
+            )
 
         return bitmask
 
@@ -768,19 +937,16 @@ class bitmask_spec(sb.Spec):
                     meta=meta,
                 )
             else:
+                lookup = EnumLookup.for_enum(bitmask)
                 if type(v) is int:
-                    for name, member in bitmask.__members__.items():
-                        if type(v) is int and v & member.value:
+                    for name, member in lookup.members:
+                        if v & member.value:
                             result.append(member)
                 else:
-                    found = False
-                    for name, member in bitmask.__members__.items():
-                        if v == name or v == repr(member):
-                            result.append(member)
-                            found = True
-                            break
-
-                    if not found:
+                    member = lookup.find(v, with_value=False)
+                    if member is not None:
+                        result.append(member)
+                    else:
                         raise BadConversion(
                             "Can't convert value into value from mask", val=v, wanted=bitmask
                         )
@@ -805,16 +971,12 @@ class bitmask_spec(sb.Spec):
                     meta=meta,
                 )
             else:
-                found = False
-                for name, member in bitmask.__members__.items():
-                    if v == name or v == repr(member) or v == member.value:
-                        if member not in used:
-                            final += member.value
-                            used.append(member)
-                        found = True
-                        break
-
-                if not found:
+                member = EnumLookup.for_enum(bitmask).find(v)
+                if member is not None:
+                    if member not in used:
+                        final += member.value
+                        used.append(member)
+                else:
                     raise BadConversion("Can't convert value into mask", mask=bitmask, got=v)
 
         return final
@@ -854,11 +1016,10 @@ class enum_spec(sb.Spec):
                 "Can't convert value of wrong Enum", val=val, wanted=em, got=type(val), meta=meta
             )
 
-        available = []
-        for name, member in em.__members__.items():
-            available.append((name, member.value))
-            if val == name or val == repr(member) or val == member.value:
-                return member
+        lookup = EnumLookup.for_enum(em)
+        member = lookup.find(val)
+        if member is not None:
+            return member
 
         if self.allow_unknown:
             if isinstance(val, int) and not isinstance(val, bool):
@@ -875,17 +1036,19 @@ class enum_spec(sb.Spec):
             "Value is not a valid value of the enum",
             val=val,
             enum=em,
-            available=available,
+            available=lookup.available,
             meta=meta,
         )
 
     def pack(self, em, meta, val):
         """Get us the value of the specified member of the enum"""
-        available = []
-        for name, member in em.__members__.items():
-            available.append((name, member.value))
-            if val == name or val == repr(member) or val == member.value or val is member:
-                return member.value
+        if isinstance(val, em):
+            return val.value
+
+        lookup = EnumLookup.for_enum(em)
+        member = lookup.find(val)
+        if member is not None:
+            return member.value
 
         if self.allow_unknown:
             if isinstance(val, int) and not isinstance(val, bool):
@@ -903,7 +1066,7 @@ class enum_spec(sb.Spec):
             )
         else:
             raise BadConversion(
-                "Value wasn't a valid enum value", val=val, available=available, meta=meta
+                "Value wasn't a valid enum value", val=val, available=lookup.available, meta=meta
             )
 
     def determine_enum(self):
@@ -7,6 +7,8 @@ or more connections to your devices that it uses to send a receive messages.
 """
 
 from photons_transport.retry_options import RetryOptions, RetryIterator
+from photons_transport.congestion import CongestionLimit
+from photons_transport.metrics import TransportMetrics
 from photons_app.errors import RunErrors, PhotonsAppError
 from photons_app import helpers as hp
 
@@ -18,6 +20,8 @@ log = logging.getLogger("photons_transport")
 
 RetryOptions = RetryOptions
 RetryIterator = RetryIterator
+CongestionLimit = CongestionLimit
+TransportMetrics = TransportMetrics
 
 
 @contextmanager
@@ -46,4 +50,10 @@ def catch_errors(error_catcher=None):
         raise RunErrors(_errors=error_catcher)
 
 
-__all__ = ["RetryOptions", "RetryIterator", "catch_errors"]
+__all__ = [
+    "RetryOptions",
+    "RetryIterator",
+    "CongestionLimit",
+    "TransportMetrics",
+    "catch_errors",
+]
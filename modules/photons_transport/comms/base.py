@@ -2,17 +2,17 @@ from photons_transport.errors import FailedToFindDevice
 from photons_transport.comms.receiver import Receiver
 from photons_transport.comms.waiter import Waiter
 from photons_transport.comms.writer import Writer
+from photons_transport.metrics import TransportMetrics
 
 from photons_app.errors import TimedOut, FoundNoDevices, RunErrors, BadRunWithResults
 from photons_app import helpers as hp
 
 from photons_protocol.packets import Information
-from photons_protocol.messages import Messages
+from photons_protocol.messages import Messages, PacketTypeExtractor
 
 import binascii
 import logging
 import asyncio
-import struct
 import random
 import json
 
@@ -182,13 +182,23 @@ class Sender:
 class Communication:
     _merged_options_formattable = True
 
+    # Received packets only decode their payload when it is first accessed
+    unpack_lazily = False
+
     def __init__(self, target):
         self.transport_target = target
 
         self.found = Found()
         self.stop_fut = hp.ChildOfFuture(self.transport_target.final_future)
         self.receiver = Receiver()
-        self.received_data_tasks = []
+        self.metrics = self.receiver.metrics = TransportMetrics(self.receiver)
+        self.received_data_tasks = hp.TaskHolder(self.stop_fut)
+
+        if getattr(self.transport_target, "unpack_lazily", False) is True:
+            self.unpack_lazily = True
+
+        self.in_flight_requests = {}
+        self.coalesce_requests = getattr(self.transport_target, "coalesce_requests", False) is True
 
         self.make_plans = __import__("photons_control.planner").planner.make_plans
 
@@ -206,16 +216,16 @@ class Communication:
 
     async def finish(self):
         self.stop_fut.cancel()
+        for fut in list(self.in_flight_requests.values()):
+            fut.cancel()
+
         for serial in self.found.serials:
             try:
                 await self.forget(serial)
             except Exception as error:
                 log.error(hp.lc("Failed to close transport", error=error, serial=serial))
 
-        if self.received_data_tasks:
-            for t in self.received_data_tasks:
-                t.cancel()
-            await asyncio.wait(self.received_data_tasks)
+        await self.received_data_tasks.finish()
 
     @hp.memoized_property
     def source(self):
@@ -223,13 +233,41 @@ class Communication:
         return random.randrange(1, 1 << 32)
 
     def seq(self, target):
-        """Create the next sequence for this target"""
+        """
+        Create the next sequence for this target
+
+        Sequences that are still in flight for this target are skipped unless
+        all of them are in flight.
+        """
         if not hasattr(self, "_seq"):
             self._seq = {}
         if target not in self._seq:
             self._seq[target] = 0
-        self._seq[target] = (self._seq[target] + 1) % pow(2, 8)
-        return self._seq[target]
+
+        nxt = (self._seq[target] + 1) % 256
+
+        in_flight = self.receiver.sequences_for(target)
+        if in_flight and nxt in in_flight and len(in_flight) < 256:
+            while nxt in in_flight:
+                nxt = (nxt + 1) % 256
+
+        self._seq[target] = nxt
+        return nxt
+
+    async def free_seq(self, target):
+        """
+        Return the next sequence for this target that isn't in flight, waiting
+        for one to be released if they are all in use
+        """
+        while True:
+            nxt = self.seq(target)
+            if not self.receiver.sequence_in_use(target, nxt):
+                return nxt
+
+            freed = self.receiver.sequence_freed(target)
+            await asyncio.wait([freed, self.stop_fut], return_when=asyncio.FIRST_COMPLETED)
+            if self.stop_fut.done():
+                raise asyncio.CancelledError()
 
     async def forget(self, serial):
         if serial not in self.found:
@@ -249,30 +287,46 @@ class Communication:
                 )
 
     async def add_service(self, serial, service, **kwargs):
-        new = await self.make_transport(serial, service, kwargs)
+        await self.add_services({(serial, service): kwargs})
 
-        if serial not in self.found:
-            self.found[serial] = {}
+    async def add_services(self, services):
+        """
+        Add a dictionary of ``{(serial, service): kwargs}`` to found in one go
 
-        existing = self.found[serial].get(service)
+        Transports that are the same as the ones we already have are left alone
+        and the old transports that we replace are closed together at the end.
+        """
+        replaced = []
 
-        if existing != new:
-            if existing:
-                try:
-                    await existing.close()
-                except asyncio.CancelledError:
-                    raise
-                except Exception as error:
-                    log.error(
-                        hp.lc(
-                            "Failed to close old transport",
-                            service=service,
-                            error=error,
-                            serial=serial,
-                        )
-                    )
-
-            self.found[serial][service] = new
+        for (serial, service), kwargs in services.items():
+            new = await self.make_transport(serial, service, kwargs)
+
+            target = self.found.cleanse_serial(serial)
+            existing_services = self.found.found.get(target)
+            if existing_services is None:
+                existing_services = self.found[target] = {}
+
+            existing = existing_services.get(service)
+
+            if existing != new:
+                if existing:
+                    replaced.append((serial, service, existing))
+                existing_services[service] = new
+
+        if replaced:
+            await asyncio.gather(
+                *[self._close_replaced(serial, service, t) for serial, service, t in replaced]
+            )
+
+    async def _close_replaced(self, serial, service, transport):
+        try:
+            await transport.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            log.error(
+                hp.lc("Failed to close old transport", service=service, error=error, serial=serial)
+            )
 
     async def find_devices(self, *, ignore_lost=False, raise_on_none=False, **kwargs):
         """Hook for finding devices"""
@@ -342,7 +396,96 @@ class Communication:
         broadcast=False,
         connect_timeout=10,
     ):
+        key = self.coalesce_key(
+            original,
+            packet,
+            timeout=timeout,
+            no_retry=no_retry,
+            transport=transport,
+            broadcast=broadcast,
+        )
+        if key is None:
+            return await self._send_single(
+                original,
+                packet,
+                timeout=timeout,
+                limit=limit,
+                no_retry=no_retry,
+                transport=transport,
+                broadcast=broadcast,
+                connect_timeout=connect_timeout,
+            )
 
+        fut = self.in_flight_requests.get(key)
+        if fut is None:
+            fut = self.in_flight_requests[key] = hp.async_as_background(
+                self._send_single(
+                    original,
+                    packet,
+                    timeout=timeout,
+                    limit=limit,
+                    no_retry=no_retry,
+                    connect_timeout=connect_timeout,
+                ),
+                silent=True,
+            )
+
+            def forget(res):
+                if self.in_flight_requests.get(key) is fut:
+                    del self.in_flight_requests[key]
+
+            fut.add_done_callback(forget)
+        else:
+            self.metrics.coalesced(packet.serial)
+
+        # Everyone gets their own copy of the replies that says it was their
+        # message that was sent
+        replies = []
+        for pkt in await asyncio.shield(fut):
+            reply = pkt.clone()
+            reply.Information.update(
+                remote_addr=pkt.Information.remote_addr, sender_message=original
+            )
+            replies.append(reply)
+        return replies
+
+    def coalesce_key(self, original, packet, *, timeout, no_retry, transport, broadcast):
+        """
+        Return what identifies this request when ``coalesce_requests`` is True
+
+        A Get message to the same device with the same payload and timeout as
+        one we are already waiting on gets the replies to that message rather
+        than being sent again. Messages that are broadcast or given their own
+        transport, and any message that isn't a Get, return None and are always
+        sent.
+        """
+        if not self.coalesce_requests or transport is not None or broadcast:
+            return None
+
+        if packet.target is None or not getattr(original, "represents_get", False):
+            return None
+
+        return (
+            packet.serial,
+            original.Key,
+            original.ack_required,
+            original.res_required,
+            timeout,
+            no_retry,
+        )
+
+    async def _send_single(
+        self,
+        original,
+        packet,
+        *,
+        timeout,
+        limit=None,
+        no_retry=False,
+        transport=None,
+        broadcast=False,
+        connect_timeout=10,
+    ):
         transport, is_broadcast = await self._transport_for_send(
             transport, packet, original, broadcast, connect_timeout
         )
@@ -383,37 +526,64 @@ class Communication:
         await transport.spawn(original, timeout=connect_timeout)
         return transport, is_broadcast
 
-    def sync_received_data(self, *args, **kwargs):
-        task = hp.async_as_background(self.received_data(*args, **kwargs))
-        self.received_data_tasks.append(task)
-        return task
+    def sync_received_data(self, data, addr, allow_zero=False):
+        """
+        Used by transports to give us data from inside their protocol callbacks.
+
+        The packet is given to the receiver straight away and we only make a task
+        if the receiver's ``message_catcher`` gives us something to await.
+        """
+        unpacked = self.unpack_received_data(data, addr)
+        if unpacked is None:
+            return
+
+        pkt, header = unpacked
+        caught = self.receiver.recv_sync(pkt, addr, allow_zero=allow_zero, header=header)
+        if caught is not None:
+
+            async def catch():
+                await caught
+
+            return self.received_data_tasks.add(catch())
 
     async def received_data(self, data, addr, allow_zero=False):
         """What to do when we get some data"""
-        if type(data) is bytes:
+        unpacked = self.unpack_received_data(data, addr)
+        if unpacked is not None:
+            pkt, header = unpacked
+            await self.receiver.recv(pkt, addr, allow_zero=allow_zero, header=header)
+
+    def unpack_received_data(self, data, addr):
+        """
+        Return ``(pkt, header)`` for this data, or None if we couldn't unpack it
+        """
+        if type(data) is bytes and log.isEnabledFor(logging.DEBUG):
             log.debug(hp.lc("Received bytes", bts=binascii.hexlify(data).decode()))
 
         try:
-            protocol_register = self.transport_target.protocol_register
-            protocol, pkt_type, Packet, PacketKls, data = Messages.get_packet_type(
-                data, protocol_register
-            )
+            if isinstance(data, str):
+                data = binascii.unhexlify(data)
 
-            if protocol == 1024 and pkt_type == 45:
-                source = struct.unpack("<I", data[4:8])[0]
-                target = data[8:16]
-                sequence = data[23]
+            header = PacketTypeExtractor.header(data)
 
-                serial = binascii.hexlify(target[:6]).decode()
-                pkt = FakeAck(source, sequence, target, serial, addr)
+            if header.protocol == 1024 and header.pkt_type == 45:
+                pkt = FakeAck(header.source, header.sequence, header.target, header.serial, addr)
             else:
+                protocol_register = self.transport_target.protocol_register
+                Packet, PacketKls = Messages.packet_kls_for(
+                    header.protocol, header.pkt_type, protocol_register
+                )
                 if PacketKls is None:
                     PacketKls = Packet
-                pkt = PacketKls.unpack(data)
+                if self.unpack_lazily:
+                    pkt = PacketKls.unpack(data, lazy=True)
+                else:
+                    pkt = PacketKls.unpack(data)
         except Exception as error:
             log.exception(error)
         else:
-            await self.receiver.recv(pkt, addr, allow_zero=allow_zero)
+            self.metrics.received(header.serial, len(data))
+            return pkt, header
 
     async def _get_response(self, packet, timeout, waiter, limit=None):
         errf = hp.ResettableFuture()
@@ -421,21 +591,36 @@ class Communication:
 
         response = []
 
+        if hasattr(limit, "for_packet"):
+            limit = limit.for_packet(packet)
+
         async def wait_for_responses():
-            async with (limit or NoLimit()):
+            async with limit or NoLimit():
                 if hasattr(asyncio, "current_task"):
                     current_task = asyncio.current_task()
                 else:
                     current_task = asyncio.Task.current_task()
 
-                asyncio.get_event_loop().call_later(
+                timer = hp.timer_wheel().call_later(
                     timeout, timeout_task, current_task, errf, packet.serial
                 )
 
                 try:
                     for info in await waiter:
                         response.append(info)
+                except asyncio.CancelledError:
+                    # timeout_task sets errf before it cancels us
+                    if errf.done() and not errf.cancelled():
+                        self.metrics.timed_out(packet.serial)
+                        if hasattr(limit, "timed_out"):
+                            limit.timed_out()
+                    raise
+                else:
+                    if hasattr(limit, "replied"):
+                        writer = getattr(waiter, "writer", None)
+                        limit.replied(retried=getattr(writer, "sent", 1) > 1)
                 finally:
+                    timer.cancel()
                     if hasattr(waiter, "finish"):
                         await waiter.finish()
 
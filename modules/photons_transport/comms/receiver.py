@@ -1,6 +1,9 @@
+from photons_transport.metrics import BROADCAST_SERIAL
+
 from photons_app import helpers as hp
 
 from bitarray import bitarray
+import inspect
 import logging
 import asyncio
 
@@ -13,64 +16,152 @@ class Receiver(object):
     message_catcher = NotImplemented
 
     def __init__(self):
+        self.freed = {}
+        self.metrics = None
         self.results = {}
+        self.in_flight = {}
         self.blank_target = bitarray("0" * 8 * 8).tobytes()
 
     @property
     def loop(self):
         return asyncio.get_event_loop()
 
+    @property
+    def wheel(self):
+        return hp.timer_wheel(self.loop)
+
+    def sequences_for(self, serial):
+        """
+        Return the sequences in flight for this serial
+
+        Broadcasts are stored under ``000000000000`` regardless of whether the
+        packet has an empty target or no target.
+        """
+        return self.in_flight.get(serial or BROADCAST_SERIAL)
+
     def register(self, packet, result, original):
         """Register a future waiting for a result"""
-        key = (packet.source, packet.sequence, packet.target)
+        serial = packet.serial or BROADCAST_SERIAL
+        sequence = packet.sequence
+        key = (packet.source, sequence, packet.target)
         self.results[key] = (original, result)
 
+        sequences = self.in_flight.get(serial)
+        if sequences is None:
+            sequences = self.in_flight[serial] = {}
+        sequences[sequence] = sequences.get(sequence, 0) + 1
+
         def cleanup(res):
             """
             Remove the future from our results after a small delay
             """
 
             def remove():
-                if key in self.results:
+                if key in self.results and self.results[key][1] is result:
                     del self.results[key]
+                self.release(serial, sequence)
 
-            self.loop.call_later(0.5, remove)
+            self.wheel.call_later(0.5, remove)
 
         result.add_done_callback(cleanup)
 
-    async def recv(self, pkt, addr, allow_zero=False):
-        """Find the result for this packet and add the packet"""
+    def sequence_in_use(self, serial, sequence):
+        """Return whether this sequence is registered for this serial"""
+        sequences = self.sequences_for(serial)
+        return sequences is not None and sequence in sequences
+
+    def release(self, serial, sequence):
+        """
+        Record that a registration for this serial and sequence is gone and wake
+        up anything waiting for a sequence for this serial
+        """
+        serial = serial or BROADCAST_SERIAL
+        sequences = self.in_flight.get(serial)
+        if sequences is not None and sequence in sequences:
+            if sequences[sequence] > 1:
+                sequences[sequence] -= 1
+            else:
+                del sequences[sequence]
+                if not sequences:
+                    del self.in_flight[serial]
+
+        fut = self.freed.pop(serial, None)
+        if fut is not None and not fut.done():
+            fut.set_result(True)
+
+    def sequence_freed(self, serial):
+        """Return a future that resolves next time a sequence for this serial is released"""
+        serial = serial or BROADCAST_SERIAL
+        fut = self.freed.get(serial)
+        if fut is None or fut.done():
+            fut = self.freed[serial] = asyncio.Future()
+        return fut
+
+    async def recv(self, pkt, addr, allow_zero=False, header=None):
+        """
+        Find the result for this packet and add the packet
+
+        If we have the ``header`` for the packet from
+        ``PacketTypeExtractor.header`` then we use the values on it instead of
+        getting them from the packet.
+        """
+        caught = self.recv_sync(pkt, addr, allow_zero=allow_zero, header=header)
+        if caught is not None:
+            await caught
+
+    def recv_sync(self, pkt, addr, allow_zero=False, header=None):
+        """
+        Same as ``recv`` but without waiting for ``message_catcher``.
+
+        If the ``message_catcher`` gives back something to await then that is
+        returned, otherwise this returns None.
+        """
+        if header is None:
+            header = pkt
+
         if getattr(pkt, "represents_ack", False):
-            log.debug(hp.lc("Got ACK", source=pkt.source, sequence=pkt.sequence, serial=pkt.serial))
+            log.debug(
+                hp.lc(
+                    "Got ACK",
+                    source=header.source,
+                    sequence=header.sequence,
+                    serial=header.serial,
+                )
+            )
         else:
             log.debug(
                 hp.lc(
                     "Got RES",
-                    source=pkt.source,
-                    sequence=pkt.sequence,
-                    serial=pkt.serial,
-                    pkt_type=pkt.pkt_type,
+                    source=header.source,
+                    sequence=header.sequence,
+                    serial=header.serial,
+                    pkt_type=header.pkt_type,
                 )
             )
 
-        key = (pkt.source, pkt.sequence, pkt.target)
-        broadcast_key = (pkt.source, pkt.sequence, self.blank_target)
+        key = (header.source, header.sequence, header.target)
+        broadcast_key = (header.source, header.sequence, self.blank_target)
 
-        if pkt.source == 0 and pkt.sequence == 0:
+        if header.source == 0 and header.sequence == 0:
             if not allow_zero:
                 log.warning("Received message with 0 source and sequence")
                 return
 
         if key not in self.results and broadcast_key not in self.results:
+            if self.metrics is not None:
+                self.metrics.unexpected(header.serial)
+
             if self.message_catcher is not NotImplemented and callable(self.message_catcher):
-                await self.message_catcher(pkt)
+                caught = self.message_catcher(pkt)
+                if inspect.isawaitable(caught):
+                    return caught
             else:
                 # This usually happens when Photons retries a message
                 # But gets a reply from multiple of these requests
                 # The first one back will unregister the future
                 # And so there's nothing to resolve with this newly received data
                 log.debug(
-                    hp.lc("Received a message that wasn't expected", key=key, serial=pkt.serial)
+                    hp.lc("Received a message that wasn't expected", key=key, serial=header.serial)
                 )
             return
 
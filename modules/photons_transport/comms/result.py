@@ -1,3 +1,5 @@
+from photons_app import helpers as hp
+
 import asyncio
 import time
 
@@ -9,12 +11,14 @@ class Result(asyncio.Future):
     options
     """
 
-    def __init__(self, request, did_broadcast, retry_options):
+    def __init__(self, request, did_broadcast, retry_options, metrics=None):
         self.request = request
+        self.metrics = metrics
         self.did_broadcast = did_broadcast
         self.retry_options = retry_options
 
         self.results = []
+        self.sent_at = None
         self.last_ack_received = None
         self.last_res_received = None
 
@@ -24,7 +28,22 @@ class Result(asyncio.Future):
             self.set_result([])
 
     def add_packet(self, pkt):
-        """Determine if we should call add_ack or add_result"""
+        """
+        Determine if we should call add_ack or add_result
+
+        The time between being sent and the first reply is given to our
+        retry_options if it wants to know about round trip times and to our
+        metrics.
+        """
+        if self.sent_at is not None:
+            took = time.time() - self.sent_at
+            record_rtt = getattr(self.retry_options, "record_rtt", None)
+            if record_rtt is not None:
+                record_rtt(took)
+            if self.metrics is not None:
+                self.metrics.rtt.observe(took)
+            self.sent_at = None
+
         if getattr(pkt, "represents_ack", False):
             self.add_ack()
         else:
@@ -79,7 +98,13 @@ class Result(asyncio.Future):
         result
         """
         current = getattr(self, attr)
-        asyncio.get_event_loop().call_later(
+
+        # Only the latest finisher can do anything, so forget about the last one
+        finisher = getattr(self, "_finisher", None)
+        if finisher is not None:
+            finisher.cancel()
+
+        self._finisher = hp.timer_wheel().call_later(
             self.retry_options.finish_multi_gap, self.maybe_finish, current, attr
         )
 
@@ -27,6 +27,7 @@ class Waiter(object):
         self.writer = writer
         self.write_tasks = []
 
+        self.timer = None
         self.results = []
         self.no_retry = no_retry
         self.written_once = False
@@ -39,6 +40,13 @@ class Waiter(object):
                 self._writings.cancel()
                 del self._writings
                 del self._writings_cb
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            # Results that never finished would keep their sequence in flight
+            for result in self.results:
+                result.cancel()
             self.results = []
 
             # I don't care about the exception from final_future
@@ -97,7 +105,7 @@ class Waiter(object):
         * retry_options.next_check_after_wait_for_result after detecting a partial result
         * When a result is done
         """
-        if args:
+        if args and not args[0].cancelled():
             # prevent "Task exception was never retrieved" errors
             args[0].exception()
 
@@ -111,8 +119,7 @@ class Waiter(object):
         loop = asyncio.get_event_loop()
 
         if any(result.wait_for_result() for result in self.results):
-            next_check = self.retry_options.next_check_after_wait_for_result
-            loop.call_later(next_check, self._writings_cb)
+            self.schedule_writings(self.retry_options.next_check_after_wait_for_result)
             return
 
         if not self.no_retry or not self.written_once:
@@ -122,7 +129,17 @@ class Waiter(object):
             self.write_tasks.append(t)
             self.write_tasks = [t for t in self.write_tasks if not t.done()]
 
-        loop.call_later(self.retry_options.next_time, self._writings_cb)
+        self.schedule_writings(self.retry_options.next_time)
+
+    def schedule_writings(self, delay):
+        """
+        Call writings again after this many seconds
+
+        Only the latest timer can do anything, so we forget about the last one
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = hp.timer_wheel(asyncio.get_event_loop()).call_later(delay, self._writings_cb)
 
     async def do_write(self):
         """
@@ -137,6 +154,10 @@ class Waiter(object):
             return
 
         result = await self.writer()
+        if self.final_future.done():
+            result.cancel()
+            return
+
         self.results.append(result)
 
         if result.done():
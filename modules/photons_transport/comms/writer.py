@@ -1,9 +1,11 @@
 from photons_transport.comms.result import Result
 
+from photons_protocol.packing import PacketCodec
 from photons_app import helpers as hp
 
 import binascii
 import logging
+import time
 
 log = logging.getLogger("photons_transport.comms.writer")
 
@@ -21,6 +23,8 @@ class Writer:
         connect_timeout=10,
     ):
         self.sent = 0
+        self.sent_at = None
+        self.packed = None
         self.clone = packet.clone()
         self.session = session
         self.original = original
@@ -32,8 +36,14 @@ class Writer:
 
     async def __call__(self):
         self.modify_sequence()
+        await self.ensure_free_sequence()
         result = self.register()
-        bts = await self.write()
+        try:
+            bts = await self.write(result)
+        except BaseException:
+            # Let the receiver know this sequence isn't waiting on anything
+            result.cancel()
+            raise
 
         lc = hp.lc.using(
             serial=self.clone.serial,
@@ -55,15 +65,63 @@ class Writer:
             self.clone.sequence = self.session.seq(self.original.serial)
         self.sent += 1
 
+    async def ensure_free_sequence(self):
+        """
+        Wait for a sequence that isn't in flight if our sequence is already being
+        used by another message to this device
+        """
+        if self.receiver.sequence_in_use(self.clone.serial, self.clone.sequence):
+            self.clone.sequence = await self.session.free_seq(self.clone.serial)
+
+    def tobytes(self):
+        """
+        Return the bytes for our clone
+
+        We keep the bytes from the first time we pack the clone and for retries
+        we only change the ``sequence`` and ``source`` in those bytes. If the
+        clone doesn't have a fixed header layout then we pack it every time.
+        """
+        if self.packed is not None:
+            codec = PacketCodec.for_kls(type(self.clone))
+            if codec is not None:
+                offsets = codec.offsets
+                if "sequence" in offsets and "source" in offsets:
+                    for name in ("sequence", "source"):
+                        offset, slot = offsets[name]
+                        slot.pack_into(self.packed, offset, self.clone[name])
+                    return bytes(self.packed)
+
+        bts = self.clone.tobytes(self.clone.serial)
+        self.packed = bytearray(bts)
+        return bts
+
     def register(self):
-        result = Result(self.original, self.did_broadcast, self.retry_options)
+        metrics = getattr(self.session, "metrics", None)
+        if metrics is not None:
+            metrics = metrics.for_serial(self.clone.serial)
+
+        result = Result(self.original, self.did_broadcast, self.retry_options, metrics=metrics)
         if not result.done():
             result.add_done_callback(hp.silent_reporter)
             self.receiver.register(self.clone, result, self.original)
         return result
 
-    async def write(self):
-        bts = self.clone.tobytes(self.clone.serial)
+    async def write(self, result=None):
+        """
+        Write our packet to the transport
+
+        The ``result`` is told when we sent it before we write, in case the
+        reply arrives before the write returns.
+        """
+        bts = self.tobytes()
         t = await self.transport.spawn(self.original, timeout=self.connect_timeout)
+        self.sent_at = time.time()
+        if result is not None:
+            result.sent_at = self.sent_at
         await self.transport.write(t, bts, self.original)
+
+        metrics = getattr(self.session, "metrics", None)
+        if metrics is not None:
+            metrics.sent(self.clone.serial, len(bts), retry=self.sent > 1)
+
         return bts
@@ -0,0 +1,172 @@
+from collections import deque
+import asyncio
+import time
+
+
+class Window:
+    """
+    A number of messages that may be in flight at once, where that number goes
+    up a little for every reply and halves when messages go missing.
+    """
+
+    def __init__(self, size, minimum, maximum, decrease=0.5):
+        self.size = float(size)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+
+        self.in_flight = 0
+        self.waiting = deque()
+        self.last_decrease = 0
+
+    @property
+    def limit(self):
+        return max(1, int(self.size))
+
+    def locked(self):
+        return self.in_flight >= self.limit
+
+    async def acquire(self):
+        if not self.waiting and not self.locked():
+            self.in_flight += 1
+            return
+
+        fut = asyncio.Future()
+        self.waiting.append(fut)
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # We were given a slot before we got cancelled
+                self.release()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self.wake()
+
+    def wake(self):
+        """Hand out slots to anything waiting for one"""
+        while self.waiting and not self.locked():
+            fut = self.waiting.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(True)
+
+    def grow(self):
+        """Additive increase, so a full window of replies grows the window by one"""
+        self.size = min(self.maximum, self.size + 1 / self.size)
+        self.wake()
+
+    def shrink(self, started):
+        """
+        Multiplicative decrease, but only once for the messages that were in
+        flight at the time of the last decrease
+        """
+        if started < self.last_decrease:
+            return
+        self.size = max(self.minimum, self.size * self.decrease)
+        self.last_decrease = time.time()
+
+
+class CongestionSlot:
+    """
+    The async context manager used for one message when a
+    :class:`CongestionLimit` is given as the ``limit``.
+    """
+
+    def __init__(self, limit, serial):
+        self.limit = limit
+        self.serial = serial
+        self.window = limit.window_for(serial)
+        self.started = None
+
+    async def __aenter__(self):
+        await self.window.acquire()
+        try:
+            await self.limit.total.acquire()
+        except:
+            self.window.release()
+            raise
+        self.started = time.time()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.limit.total.release()
+        self.window.release()
+
+    def replied(self, *, retried=False):
+        """Record that we got our reply and whether we had to retry for it"""
+        if retried:
+            self.window.shrink(self.started)
+            self.limit.total.shrink(self.started)
+        else:
+            self.window.grow()
+            self.limit.total.grow()
+
+    def timed_out(self):
+        """
+        Record that we never got a reply
+
+        This only affects the window for this device because it's more likely
+        the device is gone than the whole network being congested.
+        """
+        self.window.shrink(self.started)
+
+
+class CongestionLimit:
+    """
+    A ``limit`` for sending messages that changes how many messages may be in
+    flight based on how the network is coping.
+
+    .. code-block:: python
+
+        from photons_transport import CongestionLimit
+
+
+        limit = CongestionLimit()
+        await target.script(msgs).run_all(reference, limit=limit)
+
+    Each device gets a window that starts at ``initial`` messages and every
+    message also needs a slot in a window for all messages that starts at
+    ``initial_total``. Every reply grows these windows a little and needing
+    to retry a message halves them. A message that times out only halves the
+    window for that device.
+
+    When used as an async context manager by itself this only uses the window
+    for all messages, which makes it usable anywhere an ``asyncio.Semaphore``
+    is.
+    """
+
+    def __init__(self, *, initial=4, minimum=1, maximum=32, initial_total=30, maximum_total=256):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+
+        self.windows = {}
+        self.total = Window(initial_total, minimum, maximum_total)
+
+    def window_for(self, serial):
+        window = self.windows.get(serial)
+        if window is None:
+            window = self.windows[serial] = Window(self.initial, self.minimum, self.maximum)
+        return window
+
+    def for_packet(self, packet):
+        return CongestionSlot(self, packet.serial)
+
+    async def acquire(self):
+        await self.total.acquire()
+
+    def release(self):
+        self.total.release()
+
+    def locked(self):
+        return self.total.locked()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,181 @@
+"""
+Numbers about what a session has been sending and receiving.
+
+Every session has a ``metrics`` attribute that is a :class:`TransportMetrics`.
+
+.. code-block:: python
+
+    async with target.session() as sender:
+        await sender(DeviceMessages.GetPower(), reference)
+
+        print(sender.metrics.as_dict())
+        print(sender.metrics.as_openmetrics())
+"""
+
+from bisect import bisect_left
+import json
+
+BROADCAST_SERIAL = "000000000000"
+
+
+class Histogram:
+    """Counts of values that are less than or equal to each of our ``buckets``"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return ``[(le, count)]`` where the last ``le`` is ``"+Inf"``"""
+        result = []
+        total = 0
+        for le, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            result.append((le, total))
+        return result
+
+    def as_dict(self):
+        return {
+            "buckets": {str(le): count for le, count in self.cumulative()},
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class DeviceMetrics:
+    """What we know about the messages for one device"""
+
+    def __init__(self):
+        self.rtt = Histogram()
+        self.sent = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.received = 0
+        self.unexpected = 0
+        self.coalesced = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def as_dict(self, in_flight=0):
+        return {
+            "rtt": self.rtt.as_dict(),
+            "sent": self.sent,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "received": self.received,
+            "unexpected": self.unexpected,
+            "coalesced": self.coalesced,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "in_flight": in_flight,
+        }
+
+
+class TransportMetrics:
+    """
+    Counters for each device that the Writer, Result, Receiver and session
+    add to as messages are sent and replies come back.
+
+    Messages without a serial are recorded against ``000000000000``.
+    The number of messages in flight comes from the ``receiver``.
+    """
+
+    # The name and help for each counter in openmetrics output
+    COUNTERS = [
+        ("sent", "Messages written to the device, including retries"),
+        ("retries", "Messages written again because we didn't get a reply in time"),
+        ("timeouts", "Messages that never got a reply"),
+        ("received", "Messages received from the device"),
+        ("unexpected", "Messages received that we weren't waiting for"),
+        ("coalesced", "Messages that used the replies to the same message already in flight"),
+        ("bytes_sent", "Bytes written to the device"),
+        ("bytes_received", "Bytes received from the device"),
+    ]
+
+    def __init__(self, receiver=None):
+        self.devices = {}
+        self.receiver = receiver
+
+    def for_serial(self, serial):
+        serial = serial or BROADCAST_SERIAL
+        device = self.devices.get(serial)
+        if device is None:
+            device = self.devices[serial] = DeviceMetrics()
+        return device
+
+    def sent(self, serial, amount, *, retry=False):
+        """Record that we sent ``amount`` bytes to this device"""
+        device = self.for_serial(serial)
+        device.sent += 1
+        device.bytes_sent += amount
+        if retry:
+            device.retries += 1
+
+    def received(self, serial, amount):
+        """Record that we received ``amount`` bytes from this device"""
+        device = self.for_serial(serial)
+        device.received += 1
+        device.bytes_received += amount
+
+    def timed_out(self, serial):
+        self.for_serial(serial).timeouts += 1
+
+    def unexpected(self, serial):
+        self.for_serial(serial).unexpected += 1
+
+    def coalesced(self, serial):
+        self.for_serial(serial).coalesced += 1
+
+    def in_flight(self, serial):
+        """Return how many messages to this device are waiting for replies"""
+        if self.receiver is None:
+            return 0
+        sequences = self.receiver.sequences_for(serial)
+        if not sequences:
+            return 0
+        return sum(sequences.values())
+
+    def as_dict(self):
+        return {
+            serial: device.as_dict(in_flight=self.in_flight(serial))
+            for serial, device in sorted(self.devices.items())
+        }
+
+    def as_json(self):
+        return json.dumps(self.as_dict(), sort_keys=True, indent="  ")
+
+    def as_openmetrics(self):
+        """Return our metrics in the OpenMetrics text format"""
+        devices = sorted(self.devices.items())
+        lines = []
+
+        for name, help_text in self.COUNTERS:
+            lines.append(f"# TYPE photons_{name} counter")
+            lines.append(f"# HELP photons_{name} {help_text}")
+            for serial, device in devices:
+                lines.append(f'photons_{name}_total{{serial="{serial}"}} {getattr(device, name)}')
+
+        lines.append("# TYPE photons_in_flight gauge")
+        lines.append("# HELP photons_in_flight Messages waiting for a reply")
+        for serial, _ in devices:
+            lines.append(f'photons_in_flight{{serial="{serial}"}} {self.in_flight(serial)}')
+
+        lines.append("# TYPE photons_rtt_seconds histogram")
+        lines.append("# HELP photons_rtt_seconds Time between sending a message and a reply")
+        for serial, device in devices:
+            for le, count in device.rtt.cumulative():
+                lines.append(f'photons_rtt_seconds_bucket{{serial="{serial}",le="{le}"}} {count}')
+            lines.append(f'photons_rtt_seconds_count{{serial="{serial}"}} {device.rtt.count}')
+            lines.append(f'photons_rtt_seconds_sum{{serial="{serial}"}} {device.rtt.sum}')
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
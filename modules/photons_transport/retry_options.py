@@ -1,5 +1,12 @@
+from photons_app import helpers as hp
+
+import logging
 import asyncio
+import json
 import time
+import os
+
+log = logging.getLogger("photons_transport.retry_options")
 
 
 class RetryIterator:
@@ -164,3 +171,141 @@ class RetryOptions:
     def iterator(self, *, end_after, min_wait=0.1, get_now=time.time):
         end_at = get_now() + end_after
         return RetryIterator(end_at, lambda: self.next_time, min_wait=min_wait, get_now=get_now)
+
+
+class RTTEstimator:
+    """
+    Keeps a smoothed round trip time and it's variance for one device, the same
+    way TCP works out how long to wait before retransmitting.
+
+    ``rto`` is ``srtt + 4 * rttvar`` kept between ``minimum`` and ``maximum``.
+    """
+
+    alpha = 1 / 8
+    beta = 1 / 4
+
+    minimum = 0.02
+    maximum = 5
+
+    def __init__(self, srtt=None, rttvar=None, samples=0):
+        self.srtt = srtt
+        self.rttvar = rttvar
+        self.samples = samples
+
+    def add(self, rtt):
+        """Add a measured round trip time in seconds"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+        self.samples += 1
+
+    @property
+    def rto(self):
+        if self.srtt is None:
+            return None
+        return min(self.maximum, max(self.minimum, self.srtt + 4 * self.rttvar))
+
+    def as_dict(self):
+        return {"srtt": self.srtt, "rttvar": self.rttvar, "samples": self.samples}
+
+
+class RTTProfiles:
+    """
+    An :class:`RTTEstimator` for each serial, that can be saved to and loaded
+    from ``filename`` if one is given.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = os.path.expanduser(filename) if filename else None
+        self.estimators = {}
+
+    def for_serial(self, serial):
+        estimator = self.estimators.get(serial)
+        if estimator is None:
+            estimator = self.estimators[serial] = RTTEstimator()
+        return estimator
+
+    def load(self):
+        if not self.filename or not os.path.exists(self.filename):
+            return
+
+        try:
+            with open(self.filename) as fle:
+                profiles = json.load(fle)
+            for serial, profile in profiles.items():
+                self.estimators[serial] = RTTEstimator(
+                    srtt=float(profile["srtt"]),
+                    rttvar=float(profile["rttvar"]),
+                    samples=int(profile["samples"]),
+                )
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as error:
+            log.warning(
+                hp.lc("Failed to load round trip times", filename=self.filename, error=error)
+            )
+
+    def save(self):
+        if not self.filename:
+            return
+
+        profiles = {
+            serial: estimator.as_dict()
+            for serial, estimator in self.estimators.items()
+            if estimator.samples
+        }
+
+        try:
+            tmp = f"{self.filename}.tmp"
+            with open(tmp, "w") as fle:
+                json.dump(profiles, fle, sort_keys=True, indent=2)
+            os.replace(tmp, self.filename)
+        except OSError as error:
+            log.warning(
+                hp.lc("Failed to save round trip times", filename=self.filename, error=error)
+            )
+
+
+class AdaptiveRetryOptions(RetryOptions):
+    """
+    RetryOptions that use how quickly a device has been replying.
+
+    Until the ``estimator`` has a round trip time this behaves like
+    :class:`RetryOptions`. After that the first retry is after the ``rto`` of
+    the estimator, each retry after that waits twice as long up to
+    ``max_retry_gap``, and we check for partial results more often.
+
+    Results give this object the round trip time of the first reply to each
+    write with ``record_rtt``. That reply is usually the acknowledgement, so
+    the gaps between an acknowledgement and the replies, and between
+    multiple replies, are left as they are because they include the time the
+    device takes to make its replies.
+    """
+
+    max_retry_gap = 5
+
+    def __init__(self, estimator, timeouts=None):
+        super().__init__(timeouts=timeouts)
+        self.estimator = estimator
+
+        rto = estimator.rto
+        if rto is not None:
+            self.next_check_after_wait_for_result = min(
+                RetryOptions.next_check_after_wait_for_result, max(0.01, rto / 2)
+            )
+
+    @property
+    def next_time(self):
+        rto = self.estimator.rto
+        if rto is None:
+            return super().next_time
+
+        if self.timeout is None:
+            self.timeout = rto
+        else:
+            self.timeout = min(self.max_retry_gap, self.timeout * 2)
+        return self.timeout
+
+    def record_rtt(self, rtt):
+        self.estimator.add(rtt)
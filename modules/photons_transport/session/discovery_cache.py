@@ -0,0 +1,55 @@
+from photons_app import helpers as hp
+
+import logging
+import json
+import os
+
+log = logging.getLogger("photons_transport.session.discovery_cache")
+
+
+class DiscoveryCache:
+    """
+    Remembers where devices were found so that a new session can start talking
+    to them without waiting for broadcast discovery.
+
+    The file is json of ``{serial: {"host": host, "port": port}}``.
+    """
+
+    def __init__(self, filename):
+        self.filename = os.path.expanduser(filename)
+        self.devices = {}
+
+    def __contains__(self, serial):
+        return serial in self.devices
+
+    def update(self, serial, host, port):
+        self.devices[serial] = {"host": host, "port": port}
+
+    def remove(self, serial):
+        if serial in self.devices:
+            del self.devices[serial]
+
+    def load(self):
+        if not os.path.exists(self.filename):
+            return
+
+        try:
+            with open(self.filename) as fle:
+                devices = json.load(fle)
+            for serial, info in devices.items():
+                self.update(serial, str(info["host"]), int(info["port"]))
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as error:
+            log.warning(
+                hp.lc("Failed to load discovery cache", filename=self.filename, error=error)
+            )
+
+    def save(self):
+        try:
+            tmp = f"{self.filename}.tmp"
+            with open(tmp, "w") as fle:
+                json.dump(self.devices, fle, sort_keys=True, indent=2)
+            os.replace(tmp, self.filename)
+        except OSError as error:
+            log.warning(
+                hp.lc("Failed to save discovery cache", filename=self.filename, error=error)
+            )
@@ -2,6 +2,7 @@ from photons_messages import Services
 
 from delfick_project.norms import dictobj, sb, BadSpecValue, Meta
 from delfick_project.option_merge import MergedOptions
+import ipaddress
 import binascii
 import json
 import os
@@ -118,6 +119,28 @@ class serial_filter_spec(sb.Spec):
         return sb.listof(serial_spec()).normalise(meta, val)
 
 
+class subnets_spec(sb.Spec):
+    def normalise(self, meta, val):
+        if val in (sb.NotSpecified, None):
+            return val
+
+        val = sb.listof(sb.string_spec()).normalise(meta, val)
+
+        subnets = []
+        for i, subnet in enumerate(val):
+            try:
+                subnets.append(str(ipaddress.IPv4Network(subnet, strict=False)))
+            except ValueError as error:
+                raise BadSpecValue(
+                    "Expected an ipv4 network like 192.168.0.0/24",
+                    got=subnet,
+                    error=str(error),
+                    meta=meta.indexed_at(i),
+                )
+
+        return subnets
+
+
 class DiscoveryOptions(dictobj.Spec):
     """
     Used by NetworkSession to determine if we do broadcast discovery or hardcoded
@@ -130,6 +153,11 @@ class DiscoveryOptions(dictobj.Spec):
     serial_filter must be a list of serials or None. If a list of serials, then
     discovery will never give back serials not in the list.
 
+    subnets may be a list of networks like ``192.168.0.0/24``. If there are
+    subnets then instead of broadcasting, discovery sends a GetService to every
+    address in those networks, at most subnet_sweep_rate (default 1000)
+    messages a second.
+
     Note that regardless of what you specify, if you have an HARDCODED_DISCOVERY
     in your environment, then hardcoded_discovery will be based off that, and
     the same goes for serial_filter and SERIAL_FILTER env variable.
@@ -137,6 +165,8 @@ class DiscoveryOptions(dictobj.Spec):
 
     serial_filter = dictobj.Field(serial_filter_spec)
     hardcoded_discovery = dictobj.Field(hardcoded_discovery_spec)
+    subnets = dictobj.Field(subnets_spec)
+    subnet_sweep_rate = dictobj.NullableField(sb.integer_spec)
 
     async def discover(self, add_service):
         found_now = set()
@@ -156,15 +186,32 @@ class DiscoveryOptions(dictobj.Spec):
     def has_hardcoded_discovery(self):
         return self.hardcoded_discovery and self.hardcoded_discovery is not sb.NotSpecified
 
+    @property
+    def has_subnets(self):
+        return bool(self.subnets) and self.subnets is not sb.NotSpecified
+
+    @property
+    def sweep_rate(self):
+        return self.subnet_sweep_rate or 1000
+
+    def sweep_hosts(self, skip=()):
+        """Yield every host in our subnets that isn't in ``skip``"""
+        for subnet in self.subnets:
+            for host in ipaddress.IPv4Network(subnet).hosts():
+                host = str(host)
+                if host not in skip:
+                    yield host
+
 
 class NoDiscoveryOptions(DiscoveryOptions):
     """
-    A DiscoveryOptions object that will never have hardcoded_discovery or
-    serial_filter
+    A DiscoveryOptions object that will never have hardcoded_discovery,
+    serial_filter or subnets
     """
 
     serial_filter = dictobj.Field(sb.overridden(None))
     hardcoded_discovery = dictobj.Field(sb.overridden(None))
+    subnets = dictobj.Field(sb.overridden(None))
 
 
 class NoEnvDiscoveryOptions(DiscoveryOptions):
@@ -205,4 +252,12 @@ class discovery_options_spec(sb.Spec):
         elif isinstance(base.serial_filter, list):
             base.serial_filter = list(base.serial_filter)
 
+        if val.subnets is not sb.NotSpecified:
+            base.subnets = val.subnets
+        elif isinstance(base.subnets, list):
+            base.subnets = list(base.subnets)
+
+        if val.subnet_sweep_rate is not None:
+            base.subnet_sweep_rate = val.subnet_sweep_rate
+
         return base
@@ -1,13 +1,15 @@
 from photons_transport.errors import InvalidBroadcast, UnknownService, NoDesiredService
-from photons_transport.retry_options import RetryOptions
+from photons_transport.retry_options import RetryOptions, AdaptiveRetryOptions, RTTProfiles
+from photons_transport.session.discovery_cache import DiscoveryCache
 from photons_transport.comms.base import Communication
-from photons_transport.transports.udp import UDP
+from photons_transport.transports.udp import UDP, SharedUDP, WriteQueue
 
 from photons_app import helpers as hp
 
-from photons_messages import DiscoveryMessages, Services
+from photons_messages import DiscoveryMessages, DeviceMessages, Services
 
 import binascii
+import weakref
 import logging
 import asyncio
 import time
@@ -19,6 +21,21 @@ class UDPRetryOptions(RetryOptions):
     pass
 
 
+class AdaptiveUDPRetryOptions(AdaptiveRetryOptions, UDPRetryOptions):
+    pass
+
+
+class SweepReplies(asyncio.Future):
+    """Given to the receiver to pass on replies to a subnet sweep as they arrive"""
+
+    def __init__(self, on_packet):
+        super().__init__()
+        self.on_packet = on_packet
+
+    def add_packet(self, pkt):
+        self.on_packet(pkt)
+
+
 class NetworkSession(Communication):
     """
     Knows how to discover by broadcasting GetService. It then knows per packet
@@ -26,12 +43,57 @@ class NetworkSession(Communication):
     """
 
     UDPTransport = UDP
+    SharedUDPTransport = SharedUDP
+
+    # How long to wait for devices from the discovery cache to reply
+    cache_verify_timeout = 1
+
+    # How many replies to discovery we collect before adding them to found
+    discovery_batch_size = 200
 
     def setup(self):
         self.broadcast_transports = {}
 
+        self.write_queues = weakref.WeakKeyDictionary()
+        self.coalesce_writes = getattr(self.transport_target, "coalesce_writes", False) is True
+
+        self.shared_sockets = {}
+        self.num_shared_sockets = getattr(self.transport_target, "shared_sockets", 0)
+        if not isinstance(self.num_shared_sockets, int):
+            self.num_shared_sockets = 0
+
+        self.rtt_profiles = None
+        adaptive_retries = getattr(self.transport_target, "adaptive_retries", False)
+        rtt_profiles_file = getattr(self.transport_target, "rtt_profiles_file", None)
+        if not isinstance(rtt_profiles_file, str):
+            rtt_profiles_file = None
+
+        if adaptive_retries is True or rtt_profiles_file:
+            self.rtt_profiles = RTTProfiles(rtt_profiles_file)
+            self.rtt_profiles.load()
+
+        self.discovery_cache = None
+        self.discovery_refresh = None
+        discovery_cache_file = getattr(self.transport_target, "discovery_cache_file", None)
+        if isinstance(discovery_cache_file, str):
+            self.discovery_cache = DiscoveryCache(discovery_cache_file)
+            self.discovery_cache.load()
+
     async def finish(self):
+        if self.discovery_refresh is not None:
+            self.discovery_refresh.cancel()
+            await asyncio.wait([self.discovery_refresh])
+
+        if self.discovery_cache is not None:
+            self.discovery_cache.save()
+
+        # Send anything still queued before the sockets get closed
+        for queue in list(self.write_queues.values()):
+            queue.flush()
+
         await super().finish()
+        if self.rtt_profiles is not None:
+            self.rtt_profiles.save()
         for t in self.broadcast_transports.values():
             try:
                 await t.close()
@@ -40,8 +102,23 @@ class NetworkSession(Communication):
             except Exception as error:
                 log.error(hp.lc("Failed to close broadcast transport", error=error))
 
+        for t in self.shared_sockets.values():
+            try:
+                await t.close()
+            except asyncio.CancelledError:
+                pass
+            except Exception as error:
+                log.error(hp.lc("Failed to close shared socket", error=error))
+
     def retry_options_for(self, packet, transport):
-        return UDPRetryOptions()
+        if self.rtt_profiles is None:
+            return UDPRetryOptions()
+
+        serial = packet.serial
+        if serial is None or serial == "000000000000":
+            return UDPRetryOptions()
+
+        return AdaptiveUDPRetryOptions(self.rtt_profiles.for_serial(serial))
 
     async def determine_needed_transport(self, packet, services):
         return [Services.UDP]
@@ -70,6 +147,189 @@ class NetworkSession(Communication):
             log.info("Using hard coded discovery information")
             return await discovery_options.discover(self.add_service)
 
+        if self.discovery_cache is not None and kwargs.get("broadcast", True) in (True, False):
+            found_now = await self._search_cache(serials)
+
+            if serials is None:
+                satisfied = bool(found_now)
+            else:
+                satisfied = all(binascii.unhexlify(serial)[:6] in found_now for serial in serials)
+
+            if satisfied:
+                if self.discovery_refresh is None:
+                    self.discovery_refresh = hp.async_as_background(
+                        self._network_search(None, timeout, set(), **kwargs), silent=True
+                    )
+
+                # We only checked the devices we were asked about, so the other
+                # devices we already know about aren't lost
+                if serials is not None:
+                    found_now.update(self.found.found)
+
+                return list(found_now)
+
+        return list(await self._network_search(serials, timeout, found_now, **kwargs))
+
+    async def _search_cache(self, serials):
+        """
+        Add the devices we have in our discovery cache to found and send them an
+        EchoRequest to make sure they are still there. We don't use GetService
+        here because we would have to wait to see if there are more replies.
+
+        Devices that don't reply are removed from the cache, and from found if
+        it was the cache that put them there.
+        """
+        found_now = set()
+        discovery_options = self.transport_target.discovery_options
+
+        cached = {
+            serial: info
+            for serial, info in self.discovery_cache.devices.items()
+            if discovery_options.want(serial) and (serials is None or serial in serials)
+        }
+        if not cached:
+            return found_now
+
+        added = [serial for serial in cached if serial not in self.found]
+        await self.add_services({(serial, Services.UDP): cached[serial] for serial in added})
+
+        echo = DeviceMessages.EchoRequest(echoing=b"photons")
+
+        kwargs = {
+            "accept_found": True,
+            "error_catcher": [],
+            "message_timeout": self.cache_verify_timeout,
+        }
+
+        async for pkt in self(echo, list(cached), **kwargs):
+            found_now.add(pkt.target[:6])
+
+        for serial in cached:
+            if binascii.unhexlify(serial)[:6] not in found_now:
+                self.discovery_cache.remove(serial)
+                if serial in added:
+                    await self.forget(serial)
+
+        return found_now
+
+    async def _network_search(self, serials, timeout, found_now, **kwargs):
+        if self.transport_target.discovery_options.has_subnets:
+            return await self._sweep_search(serials, timeout, found_now, **kwargs)
+        return await self._broadcast_search(serials, timeout, found_now, **kwargs)
+
+    async def _sweep_search(self, serials, timeout, found_now, **kwargs):
+        """
+        Find devices by sending a GetService to every address in the subnets
+        from our discovery_options.
+
+        Each attempt from our search retry iterator only goes to addresses we
+        haven't heard from yet and stops when we run out of time. Devices are
+        added to found as their replies arrive.
+        """
+        found_hosts = set()
+        discovery_options = self.transport_target.discovery_options
+        tasks = hp.TaskHolder(self.stop_fut)
+
+        async def add(pkt):
+            addr = pkt.Information.remote_addr
+            await self.add_service(pkt.serial, pkt.service, host=addr[0], port=pkt.port)
+            if self.discovery_cache is not None and pkt.service == Services.UDP:
+                self.discovery_cache.update(pkt.serial, addr[0], pkt.port)
+
+        def on_packet(pkt):
+            if pkt | DiscoveryMessages.StateService and discovery_options.want(pkt.serial):
+                found_hosts.add(pkt.Information.remote_addr[0])
+                found_now.add(pkt.target[:6])
+                tasks.add(add(pkt))
+
+        def have_all():
+            return serials is not None and all(
+                binascii.unhexlify(serial)[:6] in found_now for serial in serials
+            )
+
+        try:
+            async for time_left, time_till_next in self._search_retry_iterator(timeout):
+                started = time.time()
+
+                def stop():
+                    return have_all() or time.time() - started >= time_left
+
+                replies = SweepReplies(on_packet)
+                try:
+                    await self._sweep(
+                        discovery_options.sweep_hosts(skip=found_hosts),
+                        discovery_options.sweep_rate,
+                        replies,
+                        stop,
+                        kwargs.get("connect_timeout", 10),
+                    )
+
+                    # Give the last devices time to reply
+                    if not have_all():
+                        await asyncio.sleep(max(0.2, time_till_next - (time.time() - started)))
+                finally:
+                    replies.cancel()
+
+                if serials is None:
+                    if found_now:
+                        break
+                elif have_all():
+                    break
+        finally:
+            await tasks.finish()
+
+        return found_now
+
+    async def _sweep(self, hosts, rate, replies, stop, connect_timeout):
+        """
+        Send the same GetService to each host, at most ``rate`` a second, until
+        we run out of hosts or ``stop()`` says we are done.
+        """
+        get_service = DiscoveryMessages.GetService(
+            target=None, tagged=True, addressable=True, res_required=True, ack_required=False
+        )
+        packet = get_service.clone()
+        packet.update(dict(source=self.source, sequence=self.seq(packet.serial)))
+        self.receiver.register(packet, replies, get_service)
+
+        bts = packet.tobytes(None)
+        sock = await self.shared_udp_socket(None, connect_timeout)
+
+        # Check how we're going every 10ms worth of messages
+        chunk = max(1, rate // 100)
+
+        sent = 0
+        start = time.time()
+        for host in hosts:
+            sock.sendto(bts, (host, 56700))
+            self.metrics.sent(None, len(bts))
+            sent += 1
+
+            if sent % chunk == 0:
+                if stop():
+                    break
+                await asyncio.sleep(max(0, sent / rate - (time.time() - start)))
+
+    async def _broadcast_search(self, serials, timeout, found_now, **kwargs):
+        """
+        Broadcast a GetService till we find the devices we want
+
+        Replies are collected and added to found ``discovery_batch_size`` at a
+        time, ignoring replies we've already seen with the same address.
+        """
+        seen = {}
+        pending = {}
+        discovery_options = self.transport_target.discovery_options
+
+        async def add_pending():
+            services = dict(pending)
+            pending.clear()
+            await self.add_services(services)
+            if self.discovery_cache is not None:
+                for (serial, service), options in services.items():
+                    if service == Services.UDP:
+                        self.discovery_cache.update(serial, options["host"], options["port"])
+
         get_service = DiscoveryMessages.GetService(
             target=None, tagged=True, addressable=True, res_required=True, ack_required=False
         )
@@ -83,10 +343,24 @@ class NetworkSession(Communication):
             kwargs["message_timeout"] = time_till_next
 
             async for pkt in self(get_service, **kwargs):
-                if discovery_options.want(pkt.serial):
-                    addr = pkt.Information.remote_addr
-                    found_now.add(pkt.target[:6])
-                    await self.add_service(pkt.serial, pkt.service, host=addr[0], port=pkt.port)
+                serial = pkt.serial
+                if not discovery_options.want(serial):
+                    continue
+
+                found_now.add(pkt.target[:6])
+
+                key = (serial, pkt.service)
+                options = {"host": pkt.Information.remote_addr[0], "port": pkt.port}
+                if seen.get(key) == options:
+                    continue
+
+                seen[key] = pending[key] = options
+                if len(pending) >= self.discovery_batch_size:
+                    await add_pending()
+                    log.info(hp.lc("Added discovered devices", found=len(found_now)))
+
+            if pending:
+                await add_pending()
 
             if serials is None:
                 if found_now:
@@ -94,7 +368,7 @@ class NetworkSession(Communication):
             elif all(binascii.unhexlify(serial)[:6] in found_now for serial in serials):
                 break
 
-        return list(found_now)
+        return found_now
 
     async def _search_retry_iterator(self, end_after, get_now=time.time):
         timeouts = [(0.6, 1.8), (1, 4)]
@@ -110,8 +384,33 @@ class NetworkSession(Communication):
         if service != Services.UDP:
             raise UnknownService(service=service)
 
+        if self.num_shared_sockets > 0:
+            return self.SharedUDPTransport(self, kwargs["host"], kwargs["port"], serial=serial)
+
         return self.UDPTransport(self, kwargs["host"], kwargs["port"], serial=serial)
 
+    def write_queue_for(self, transport):
+        """Return the WriteQueue for this socket"""
+        queue = self.write_queues.get(transport)
+        if queue is None:
+            queue = self.write_queues[transport] = WriteQueue(transport)
+        return queue
+
+    async def shared_udp_socket(self, address, timeout):
+        """
+        Return the shared socket used for sending to this address
+
+        Addresses are spread over ``num_shared_sockets`` sockets, which are
+        made when they are first needed.
+        """
+        index = hash(address) % self.num_shared_sockets if self.num_shared_sockets > 1 else 0
+
+        transport = self.shared_sockets.get(index)
+        if transport is None:
+            transport = self.shared_sockets[index] = self.UDPTransport(self, "0.0.0.0", 0)
+
+        return await transport.spawn(None, timeout=timeout)
+
     async def make_broadcast_transport(self, broadcast):
         if broadcast is True:
             broadcast = self.transport_target.default_broadcast
@@ -127,6 +426,10 @@ class NetworkSession(Communication):
         if broadcast in self.broadcast_transports:
             return self.broadcast_transports[broadcast]
 
-        transport = UDP(self, *broadcast)
+        if self.num_shared_sockets > 0:
+            transport = self.SharedUDPTransport(self, *broadcast)
+        else:
+            transport = UDP(self, *broadcast)
+
         self.broadcast_transports[broadcast] = transport
         return transport
@@ -2,6 +2,7 @@
 A target encapsulates the logic for finding devices over a particular medium and
 then talking to them over that medium.
 """
+
 from photons_transport.session.discovery_options import discovery_options_spec
 from photons_transport.session.memory import makeMemorySession
 from photons_transport.session.network import NetworkSession
@@ -15,11 +16,40 @@ class LanTarget(Target):
     Knows how to talk to a device over the local network. It's one configuration
     option is default_broadcast which says what address to broadcast discovery
     if broadcast is given to run calls as True.
+
+    If ``shared_sockets`` is more than zero, then instead of a socket for each
+    device, the session will send to every device using that many sockets.
+
+    If ``coalesce_writes`` is True, then datagrams for each socket are queued
+    and sent together once per iteration of the event loop.
+
+    If ``coalesce_requests`` is True, then a Get message sent to a device while
+    the same message with the same timeout is already waiting for replies from
+    that device will use copies of the replies to that message instead of being
+    sent again.
+
+    If ``adaptive_retries`` is True, then retries are timed from how quickly each
+    device has been replying. Setting ``rtt_profiles_file`` also turns this on
+    and keeps those round trip times in that file between runs.
+
+    If ``unpack_lazily`` is True, then the payload of received messages is only
+    decoded when one of its fields is first accessed.
+
+    If ``discovery_cache_file`` is set, then where devices were found is kept in
+    that file so that the next session can use those devices straight away.
     """
 
     default_broadcast = dictobj.Field(sb.defaulted(sb.string_spec(), "255.255.255.255"))
     discovery_options = dictobj.Field(discovery_options_spec)
 
+    shared_sockets = dictobj.Field(sb.integer_spec, default=0)
+    coalesce_writes = dictobj.Field(sb.boolean, default=False)
+    coalesce_requests = dictobj.Field(sb.boolean, default=False)
+    unpack_lazily = dictobj.Field(sb.boolean, default=False)
+    adaptive_retries = dictobj.Field(sb.boolean, default=False)
+    rtt_profiles_file = dictobj.NullableField(sb.string_spec)
+    discovery_cache_file = dictobj.NullableField(sb.string_spec)
+
     session_kls = NetworkSession
 
 
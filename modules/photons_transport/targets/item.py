@@ -4,8 +4,12 @@ from photons_app.errors import TimedOut, DevicesNotFound
 from photons_app.special import SpecialReference
 from photons_app import helpers as hp
 
+from photons_protocol.packing import PacketCodec
+
 from delfick_project.norms import sb
+from collections import defaultdict, deque
 from functools import partial
+import binascii
 import asyncio
 import logging
 
@@ -24,6 +28,114 @@ def choose_source(pkt, source):
         return source
 
 
+class Template:
+    """
+    The bytes for a part that is being sent to many devices.
+
+    The part is packed once and the packets for each device are a
+    :class:`FannedPacket` that writes it's target, source and sequence over a
+    copy of these bytes. Many parts of the same class can also be packed into
+    one buffer together with :meth:`make_many`.
+    """
+
+    fields = ("target", "source", "sequence")
+
+    def __init__(self, pkt, offsets, bts=None):
+        self.pkt = pkt
+        self.offsets = offsets
+        self.bts = pkt.tobytes(None) if bts is None else bts
+
+    @classmethod
+    def offsets_for(kls, pkt_kls):
+        """Return where our fields are for this class or None if it has no fixed header"""
+        codec = PacketCodec.for_kls(pkt_kls)
+        if codec is None or any(name not in codec.offsets for name in kls.fields):
+            return None
+        return [codec.offsets[name] for name in kls.fields]
+
+    @classmethod
+    def make(kls, pkt):
+        """Return a template for this packet or None if it doesn't have a fixed header"""
+        offsets = kls.offsets_for(type(pkt))
+        if offsets is None:
+            return None
+        return kls(pkt, offsets)
+
+    @classmethod
+    def make_many(kls, pkts):
+        """
+        Return a template for each of these packets of the same class, all packed
+        into one buffer with ``pack_many``, or None if they don't have a fixed header
+        """
+        pkt_kls = type(pkts[0])
+        offsets = kls.offsets_for(pkt_kls)
+        if offsets is None:
+            return None
+        return [kls(pkt, offsets, bts) for pkt, bts in zip(pkts, pkt_kls.pack_many(pkts))]
+
+    def packet_for(self, serial, sequence):
+        """
+        Return a FannedPacket for this serial or None if the serial isn't
+        something we can write into our bytes
+        """
+        try:
+            if isinstance(serial, str):
+                serial = binascii.unhexlify(serial)
+            target = bytes(serial[:8]).ljust(8, b"\x00")
+        except (TypeError, ValueError):
+            return None
+
+        # An empty target changes the tagged bit in the header
+        if target == bytes(8):
+            return None
+
+        return FannedPacket(self, target, self.pkt.source, sequence)
+
+    def fill(self, target, source, sequence):
+        bts = bytearray(self.bts)
+        for (offset, slot), val in zip(self.offsets, (target, source, sequence)):
+            slot.pack_into(bts, offset, val)
+        return bytes(bts)
+
+
+class FannedPacket:
+    """
+    Stands in for a clone of a part when that part is sent to many devices.
+
+    It only has what the Writer and Receiver need from a packet and our bytes
+    come from the :class:`Template`.
+    """
+
+    __slots__ = ["template", "target", "serial", "source", "sequence"]
+
+    def __init__(self, template, target, source, sequence):
+        self.target = target
+        self.source = source
+        self.template = template
+        self.sequence = sequence
+        self.serial = binascii.hexlify(target[:6]).decode()
+
+    @property
+    def pkt_type(self):
+        return self.template.pkt.pkt_type
+
+    @property
+    def protocol(self):
+        return self.template.pkt.protocol
+
+    def clone(self):
+        return self.__class__(self.template, self.target, self.source, self.sequence)
+
+    def tobytes(self, serial=None):
+        return self.template.fill(self.target, self.source, self.sequence)
+
+    def __repr__(self):
+        return (
+            f"<FannedPacket pkt_type: {self.pkt_type}, serial: {self.serial},"
+            f" source: {self.source}, sequence: {self.sequence}>"
+        )
+
+
 class Item(object):
     def __init__(self, parts):
         self.parts = parts
@@ -91,11 +203,19 @@ class Item(object):
                 async with limit:
                     send_and_wait_for_reply(message)
 
-            For example, an ``asyncio.Semaphore(30)``
+            For example, an ``asyncio.Semaphore(30)``, or a
+            ``photons_transport.CongestionLimit()`` which changes how many messages
+            may be in flight for each device based on replies and retries.
 
             Note that if you saying ``target.script(msgs).run(....)`` then limit will be set
             to a semaphore with max 30 by default. You may specify just a number and it will turn it
             into a semaphore.
+
+        workers
+            Defaults to None. If this is a positive integer then only that many
+            packets are being sent at any one time, by that many workers that take
+            packets from a queue. Otherwise every packet is given to it's own task straight
+            away and those tasks wait on the ``limit``.
         """
         if "timeout" in kwargs:
             log.warning(hp.lc("Please use message_timeout instead of timeout when calling run"))
@@ -173,30 +293,66 @@ class Item(object):
         This means that for each reference and each part we create a clone of
         the part with the target set to the reference, complete with a source and
         sequence
+
+        When a part that isn't dynamic goes to many serials, only the first
+        serial gets a clone and the rest get a :class:`FannedPacket` made from
+        the packed bytes of that clone.
+
+        Parts that already have a target and aren't dynamic are packed together
+        with ``pack_many`` when there are many of the same class, and are sent as
+        a :class:`FannedPacket` over their part of that buffer.
         """
         # Simplify our parts
         simplified_parts = self.simplify_parts()
 
         packets = []
+        targeted = defaultdict(list)
         for original, p in simplified_parts:
             if p.target is sb.NotSpecified:
+                template = None
                 for serial in serials:
-                    clone = p.clone()
-                    clone.update(
-                        dict(
-                            target=serial,
-                            source=choose_source(clone, sender.source),
-                            sequence=sender.seq(serial),
+                    sequence = sender.seq(serial)
+
+                    clone = None
+                    if template is not None:
+                        clone = template.packet_for(serial, sequence)
+
+                    if clone is None:
+                        clone = p.clone()
+                        clone.update(
+                            dict(
+                                target=serial,
+                                source=choose_source(clone, sender.source),
+                                sequence=sequence,
+                            )
                         )
-                    )
+                        if template is None and len(serials) > 1 and not p.is_dynamic:
+                            template = Template.make(clone)
+
                     packets.append((original, clone))
             else:
                 clone = p.clone()
                 clone.update(
                     dict(source=choose_source(clone, sender.source), sequence=sender.seq(p.serial))
                 )
+                if not p.is_dynamic:
+                    targeted[type(clone)].append(len(packets))
                 packets.append((original, clone))
 
+        for indexes in targeted.values():
+            if len(indexes) < 2:
+                continue
+
+            templates = Template.make_many([packets[i][1] for i in indexes])
+            if templates is None:
+                continue
+
+            for i, template in zip(indexes, templates):
+                original, clone = packets[i]
+                fanned = template.packet_for(clone.target, clone.sequence)
+                if fanned is not None:
+                    packets[i] = (original, fanned)
+
         return packets
 
     async def search(self, sender, found, accept_found, packets, broadcast, find_timeout, kwargs):
@@ -219,7 +375,7 @@ class Item(object):
         queue = asyncio.Queue()
         error_catcher = kwargs["error_catcher"]
 
-        def on_done(packet, res):
+        def record(packet, res):
             if res.cancelled():
                 hp.add_error(error_catcher, TimedOut("Message was cancelled", serial=packet.serial))
             else:
@@ -227,14 +383,31 @@ class Item(object):
                 if exc:
                     hp.add_error(error_catcher, exc)
 
+        def on_done(packet, res):
+            if packet is not None:
+                record(packet, res)
+
             if all(f.done() for f in fs):
                 hp.async_as_background(queue.put(Done))
 
-        for original, packet in packets:
-            coro = self.do_send(sender, original, packet, queue, kwargs)
-            f = hp.async_as_background(coro, silent=True)
-            f.add_done_callback(partial(on_done, packet))
-            fs.append(f)
+        workers = kwargs.get("workers")
+
+        if workers:
+            pending = deque(packets)
+            for _ in range(min(workers, len(pending))):
+                coro = self.send_worker(sender, pending, queue, record, kwargs)
+                f = hp.async_as_background(coro, silent=True)
+                f.add_done_callback(partial(on_done, None))
+                fs.append(f)
+        else:
+            for original, packet in packets:
+                coro = self.do_send(sender, original, packet, queue, kwargs)
+                f = hp.async_as_background(coro, silent=True)
+                f.add_done_callback(partial(on_done, packet))
+                fs.append(f)
+
+        if not fs:
+            return
 
         try:
             while True:
@@ -248,6 +421,19 @@ class Item(object):
             for f in fs:
                 f.cancel()
 
+    async def send_worker(self, sender, pending, queue, record, kwargs):
+        """Send packets from ``pending`` one at a time until there are none left"""
+        while pending:
+            original, packet = pending.popleft()
+            f = hp.async_as_background(
+                self.do_send(sender, original, packet, queue, kwargs), silent=True
+            )
+            try:
+                await asyncio.wait([f])
+            finally:
+                f.cancel()
+            record(packet, f)
+
     async def do_send(self, sender, original, packet, queue, kwargs):
         res = await sender.send_single(
             original,
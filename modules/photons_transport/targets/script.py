@@ -1,4 +1,4 @@
-from photons_app.errors import RunErrors, BadRunWithResults
+from photons_app.errors import RunErrors, BadRunWithResults, BadOption
 
 from delfick_project.norms import sb
 import asyncio
@@ -12,6 +12,13 @@ class SenderWrapper:
         self.owns_sender = self.sender is sb.NotSpecified
 
     async def __aenter__(self):
+        if self.kwargs is not None:
+            workers = self.kwargs.get("workers")
+            if workers is not None and (
+                isinstance(workers, bool) or not isinstance(workers, int) or workers < 1
+            ):
+                raise BadOption("workers must be a positive integer", got=workers)
+
         if self.owns_sender:
             self.sender = await self.target.make_sender()
 
@@ -1,5 +1,8 @@
 from photons_transport.transports.socket import Socket
 
+from photons_app import helpers as hp
+
+from collections import deque
 import platform
 import logging
 import asyncio
@@ -8,6 +11,58 @@ import socket
 log = logging.getLogger("photons_transport.transports.udp")
 
 
+class WriteQueue:
+    """
+    Datagrams for one socket that are sent together once per loop iteration.
+
+    ``depth`` is how many datagrams are waiting, ``flushes`` and ``sent`` are
+    how many times we've flushed and how many datagrams that sent, and
+    ``last_flush`` and ``largest_flush`` are sizes of flushes.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+        self.queue = deque()
+        self.handle = None
+
+        self.sent = 0
+        self.flushes = 0
+        self.last_flush = 0
+        self.largest_flush = 0
+
+    @property
+    def depth(self):
+        return len(self.queue)
+
+    def sendto(self, bts, address):
+        self.queue.append((bts, address))
+        if self.handle is None:
+            self.handle = asyncio.get_event_loop().call_soon(self.flush)
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+        queue, self.queue = self.queue, deque()
+        if not queue:
+            return
+
+        if self.transport.is_closing():
+            log.warning(hp.lc("Dropping datagrams for a closed socket", amount=len(queue)))
+            return
+
+        sendto = self.transport.sendto
+        for bts, address in queue:
+            sendto(bts, address)
+
+        self.flushes += 1
+        self.sent += len(queue)
+        self.last_flush = len(queue)
+        self.largest_flush = max(self.largest_flush, len(queue))
+
+
 class UDP(Socket):
     """Knows how to send and receive over udp"""
 
@@ -24,7 +79,10 @@ class UDP(Socket):
         return await fut
 
     async def write(self, transport, bts, original_message):
-        transport.sendto(bts, self.address)
+        if getattr(self.session, "coalesce_writes", False) is True:
+            self.session.write_queue_for(transport).sendto(bts, self.address)
+        else:
+            transport.sendto(bts, self.address)
 
     def make_socket_protocol(self):
         fut, Protocol = super().make_socket_protocol()
@@ -43,3 +101,19 @@ class UDP(Socket):
         if platform.system() == "Windows":
             sock.bind(("", 0))
         return sock
+
+
+class SharedUDP(UDP):
+    """
+    Sends to it's address using one of the sockets shared by the whole session.
+
+    Replies come back on the shared socket and are given to the session like
+    any other reply, where the Receiver finds the result they belong to.
+    """
+
+    async def spawn_transport(self, timeout):
+        return await self.session.shared_udp_socket(self.address, timeout)
+
+    async def close_transport(self, transport):
+        # The session owns the shared socket
+        pass
@@ -0,0 +1,131 @@
+# coding: spec
+
+from photons_app import helpers as hp
+
+from unittest import mock
+import asyncio
+import pytest
+
+describe "TimerWheel":
+
+    @pytest.fixture()
+    def wheel(self):
+        return hp.TimerWheel(resolution=0.001, slots=4, levels=3)
+
+    async it "calls callbacks when they are due and never before", wheel:
+        loop = asyncio.get_event_loop()
+        called = []
+
+        def cb(name, delay, start):
+            called.append((name, loop.time() - start >= delay))
+
+        start = loop.time()
+        for name, delay in [("c", 0.03), ("a", 0.001), ("b", 0.01), ("d", 0.1)]:
+            wheel.call_later(delay, cb, name, delay, start)
+
+        assert len(wheel) == 4
+        await asyncio.sleep(0.15)
+
+        assert called == [("a", True), ("b", True), ("c", True), ("d", True)]
+        assert len(wheel) == 0
+
+    async it "can cancel callbacks", wheel:
+        called = []
+
+        one = wheel.call_later(0.01, called.append, 1)
+        two = wheel.call_later(0.02, called.append, 2)
+        three = wheel.call_later(0.2, called.append, 3)
+
+        assert not two.cancelled()
+        two.cancel()
+        three.cancel()
+        assert two.cancelled()
+        assert len(wheel) == 1
+
+        # Cancelling twice is fine
+        two.cancel()
+        assert len(wheel) == 1
+
+        await asyncio.sleep(0.05)
+        assert called == [1]
+
+        # And so is cancelling after it was called
+        one.cancel()
+        assert len(wheel) == 0
+
+    async it "can place callbacks further away than the wheel goes", wheel:
+        loop = asyncio.get_event_loop()
+        fut = asyncio.Future()
+
+        # slots ** levels * resolution is 0.064 seconds
+        start = loop.time()
+        timer = wheel.call_later(0.1, lambda: fut.set_result(loop.time() - start))
+        assert timer.when() == pytest.approx(start + 0.1, abs=0.001)
+
+        assert await fut >= 0.1
+
+    async it "gives errors to the exception handler and keeps going", wheel:
+        loop = asyncio.get_event_loop()
+        error = ValueError("NOPE")
+        called = []
+
+        def bad():
+            raise error
+
+        handler = mock.Mock(name="handler")
+        with mock.patch.object(loop, "call_exception_handler", handler):
+            wheel.call_later(0.005, bad)
+            wheel.call_later(0.01, called.append, 1)
+            await asyncio.sleep(0.05)
+
+        assert called == [1]
+        handler.assert_called_once_with(
+            {"message": mock.ANY, "exception": error, "handle": mock.ANY}
+        )
+
+    async it "doesn't step through the ticks that passed while it was idle", wheel:
+        loop = asyncio.get_event_loop()
+        now = [loop.time()]
+        called = []
+
+        cascade = mock.Mock(name="cascade", side_effect=wheel._cascade)
+
+        with mock.patch.object(loop, "time", lambda: now[0]):
+            wheel.call_later(0.01, called.append, 1)
+            now[0] += 0.01
+            wheel._run()
+            assert called == [1]
+            assert len(wheel) == 0
+
+            now[0] += 3 * 60 * 60
+            wheel.call_later(0.01, called.append, 2)
+            assert wheel.current >= (now[0] - wheel.start) / wheel.resolution - 1
+
+            now[0] += 0.01
+            with mock.patch.object(wheel, "_cascade", cascade):
+                wheel._run()
+
+        if wheel.handle is not None:
+            wheel.handle.cancel()
+
+        assert called == [1, 2]
+        assert len(cascade.mock_calls) <= 3
+
+    async it "only has one handle on the event loop", wheel:
+        loop = asyncio.get_event_loop()
+        original = loop.call_at
+        call_at = mock.Mock(name="call_at", side_effect=original)
+
+        with mock.patch.object(loop, "call_at", call_at):
+            for _ in range(100):
+                wheel.call_later(0.02, lambda: None)
+
+        assert len(call_at.mock_calls) == 1
+
+describe "Shared timer wheel":
+    async it "has one wheel per loop":
+        wheel = hp.timer_wheel()
+        assert isinstance(wheel, hp.TimerWheel)
+        assert hp.timer_wheel() is wheel
+        assert hp.timer_wheel(asyncio.get_event_loop()) is wheel
+        assert wheel.loop is asyncio.get_event_loop()
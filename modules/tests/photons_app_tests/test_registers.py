@@ -67,6 +67,30 @@ describe "MessageRegister":
         register.add(kls2)
         assert list(register) == [kls, kls2]
 
+    it "keeps a by_type index with the first class winning":
+        one = mock.Mock(name="one")
+        two = mock.Mock(name="two")
+        three = mock.Mock(name="three")
+
+        kls = mock.Mock(name="kls", by_type={1: one, 2: two})
+        kls2 = mock.Mock(name="kls2", by_type={2: three, 3: three})
+
+        register = MessagesRegister()
+        assert register.by_type == {}
+
+        register.add(kls)
+        assert register.by_type == {1: one, 2: two}
+
+        register.add(kls2)
+        assert register.by_type == {1: one, 2: two, 3: three}
+
+    it "calls on_change when a class is added":
+        on_change = mock.Mock(name="on_change")
+        register = MessagesRegister(on_change=on_change)
+
+        register.add(mock.Mock(name="kls", by_type={}))
+        on_change.assert_called_once_with()
+
 describe "ProtocolRegister":
     it "can be formatted":
         assert ProtocolRegister._merged_options_formattable is True
@@ -123,6 +147,31 @@ describe "ProtocolRegister":
         register.add(protocol, kls)
         assert register.message_register(protocol) is register.protocol_classes[protocol][1]
 
+    it "keeps an index of (protocol, pkt_type) to (Packet, kls)":
+        one = mock.Mock(name="one")
+        two = mock.Mock(name="two")
+        three = mock.Mock(name="three")
+
+        Packet = mock.Mock(name="Packet")
+        Packet2 = mock.Mock(name="Packet2")
+
+        register = ProtocolRegister()
+        assert register.packet_classes == {}
+
+        register.add(1024, Packet)
+        assert register.packet_classes == {}
+
+        register.message_register(1024).add(mock.Mock(name="kls", by_type={1: one, 2: two}))
+        assert register.packet_classes == {(1024, 1): (Packet, one), (1024, 2): (Packet, two)}
+
+        register.add(9001, Packet2)
+        register.message_register(9001).add(mock.Mock(name="kls2", by_type={1: three}))
+        assert register.packet_classes == {
+            (1024, 1): (Packet, one),
+            (1024, 2): (Packet, two),
+            (9001, 1): (Packet2, three),
+        }
+
     it "can be pickled (for the docs)":
         register = ProtocolRegister()
         pickled = pickle.dumps(register)
@@ -0,0 +1,50 @@
+# coding: spec
+
+import subprocess
+import textwrap
+import pytest
+import sys
+
+# Generous budgets so a slow machine doesn't fail, but a regression that
+# brings back work at import time (like finding the source of every message)
+# will show up
+BUDGETS = {"photons_messages": 1.5, "photons_core": 3}
+
+
+def run_python(code):
+    output = subprocess.check_output([sys.executable, "-c", textwrap.dedent(code)])
+    return output.decode().strip()
+
+
+describe "Import time":
+
+    @pytest.mark.parametrize("module", sorted(BUDGETS))
+    it "imports within budget", module:
+        took = run_python(
+            f"""
+            import time
+            start = time.perf_counter()
+            import {module}
+            print(time.perf_counter() - start)
+            """
+        )
+        assert float(took) < BUDGETS[module]
+
+    it "doesn't look at the source of messages when importing":
+        found = run_python(
+            """
+            from photons_protocol import messages
+            called = []
+            original = messages.sources_for
+            def sources_for(kls):
+                called.append(kls)
+                return original(kls)
+            messages.sources_for = sources_for
+
+            from photons_messages import LightMessages
+            print(len(called))
+            LightMessages.SetColor.Meta.caller_source
+            print(len(called))
+            """
+        )
+        assert found.split() == ["0", "1"]
@@ -290,6 +290,15 @@ describe "LIFXPacket":
             msg = frame.LIFXPacket.message(46, *fields)("Name")
             assert msg.Payload.represents_ack is False
 
+        it "represents_get if the name starts with Get":
+            msg = frame.LIFXPacket.message(52)("GetThing")
+            assert msg.Payload.represents_get is True
+            assert msg().represents_get is True
+
+            msg = frame.LIFXPacket.message(53)("StateThing")
+            assert msg.Payload.represents_get is False
+            assert msg().represents_get is False
+
         it "has a _lifx_packet_message property":
             fields = [("one", T.Bool), ("two", T.String)]
             msg = frame.LIFXPacket.message(52, *fields)
@@ -338,21 +347,112 @@ describe "LIFXPacket":
 
     describe "Key":
         it "is able to get a memoized Key from the packet":
-            fields = [("one", T.Bool), ("two", T.String)]
+            fields = [("one", T.Bool), ("two", T.String(64))]
             msg = frame.LIFXPacket.message(52, *fields)("SetAmze")
 
             pkt1 = msg(one=True, two="hello")
             pkt2 = msg(one=False, two="there")
 
-            assert pkt1.Key == (1024, 52, '{"one": true, "two": "hello"}')
-            assert pkt2.Key == (1024, 52, '{"one": false, "two": "there"}')
+            assert pkt1.Key == (1024, 52, pkt1.payload.pack().tobytes())
+            assert pkt2.Key == (1024, 52, pkt2.payload.pack().tobytes())
+            assert pkt1.Key != pkt2.Key
+            assert pkt1.Key == msg(one=True, two="hello").Key
 
-            # For efficiency, the Key is cached, so if you change the payload
-            # The key stays the same, but we can delete the key for it to be recreated
+            # For efficiency, the Key is cached
+            assert pkt1.__dict__["Key"] is pkt1.Key
+
+            # But it is forgotten when we set a field
             pkt1.two = "tree"
-            assert pkt1.Key == (1024, 52, '{"one": true, "two": "hello"}')
+            assert "Key" not in pkt1.__dict__
+            assert pkt1.Key == (1024, 52, msg(one=True, two="tree").payload.pack().tobytes())
+
+            # And can be deleted for it to be recreated
             del pkt1.Key
-            assert pkt1.Key == (1024, 52, '{"one": true, "two": "tree"}')
+            assert "Key" not in pkt1.__dict__
+
+        it "uses the packed payload from the payload codec":
+            fields = [("one", T.Uint8), ("two", T.Uint16)]
+            msg = frame.LIFXPacket.message(52, *fields)("SetAmze")
+            assert msg(one=1, two=2).Key == (1024, 52, b"\x01\x02\x00")
+
+        it "uses an empty payload when there are no fields":
+            msg = frame.LIFXPacket.message(52)("GetAmze")
+            assert msg().Key == (1024, 52, b"")
+
+        it "uses the repr of the payload if it can't be packed":
+            fields = [("one", T.Uint8), ("two", T.Uint16)]
+            msg = frame.LIFXPacket.message(52, *fields)("SetAmze")
+            pkt = msg(one=1)
+            assert pkt.Key == (1024, 52, repr(pkt.payload))
+
+        it "uses the payload as is for the parent packet":
+            pkt = frame.LIFXPacket(pkt_type=52, payload=b"\x01\x02")
+            assert pkt.Key == (1024, 52, b"\x01\x02")
+
+    describe "lazy unpacking":
+
+        @pytest.fixture()
+        def msg(self):
+            fields = [("one", T.Bool), ("two", T.String(64)), ("three", T.Uint16)]
+            return frame.LIFXPacket.message(52, *fields)("SetAmze")
+
+        it "decodes the header straight away but the payload on first access", msg:
+            data = msg(
+                one=True, two="hello", three=9001, source=2, sequence=3, target="d073d5001337"
+            ).tobytes(None)
+
+            pkt = msg.unpack(data, lazy=True)
+            assert "_lazy_payload" in pkt.__dict__
+            assert pkt | msg
+            assert pkt.serial == "d073d5001337"
+            assert pkt.source == 2
+            assert pkt.sequence == 3
+            assert "_lazy_payload" in pkt.__dict__
+
+            assert pkt.three == 9001
+            assert "_lazy_payload" not in pkt.__dict__
+            assert pkt.two == "hello"
+            assert pkt.one is True
+
+        it "decodes the payload for dictionary access", msg:
+            data = msg(
+                one=True, two="hello", three=9001, source=2, sequence=3, target="d073d5001337"
+            ).tobytes(None)
+
+            pkt = msg.unpack(data, lazy=True)
+            assert pkt.get("three") == msg.unpack(data).get("three")
+            assert "_lazy_payload" not in pkt.__dict__
+
+            for attr in ("keys", "items", "values"):
+                pkt = msg.unpack(data, lazy=True)
+                assert list(getattr(pkt, attr)()) == list(getattr(msg.unpack(data), attr)())
+                assert "_lazy_payload" not in pkt.__dict__
+
+        it "is the same as a packet that isn't lazy", msg:
+            data = msg(
+                one=True, two="hello", three=9001, source=2, sequence=3, target="d073d5001337"
+            ).tobytes(None)
+
+            for val in (data, memoryview(data), bytearray(data)):
+                assert msg.unpack(val, lazy=True) == msg.unpack(data)
+                assert repr(msg.unpack(val, lazy=True)) == repr(msg.unpack(data))
+                assert msg.unpack(val, lazy=True).Key == msg.unpack(data).Key
+                assert msg.unpack(val, lazy=True).payload == msg.unpack(data).payload
+                assert msg.unpack(val, lazy=True).tobytes(None) == data
+
+        it "keeps fields that are set before the payload is decoded", msg:
+            data = msg(
+                one=True, two="hello", three=9001, source=2, sequence=3, target="d073d5001337"
+            ).tobytes(None)
+
+            pkt = msg.unpack(data, lazy=True)
+            pkt.three = 20
+            assert pkt.three == 20
+            assert pkt.two == "hello"
+
+            clone = msg.unpack(data, lazy=True).clone()
+            assert "_lazy_payload" not in clone.__dict__
+            assert clone.three == 9001
 
 describe "MultiOptions":
     it "complains if we don't give it two functions":
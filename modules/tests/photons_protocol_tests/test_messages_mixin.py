@@ -173,6 +173,61 @@ describe "PacketTypeExtractor":
             assert protocol == 1024
             assert pkt_type == 78
 
+    describe "header":
+        it "complains if the data is too small":
+            msg = "Data is too small to be a LIFX packet"
+
+            with assertRaises(BadConversion, msg, got=2):
+                PacketTypeExtractor.header(b"AA")
+
+            bts = LIFXPacket.empty_normalise(source=1, sequence=1, target=None).pack().tobytes()
+            with assertRaises(BadConversion, msg, need_atleast=36, got=20):
+                PacketTypeExtractor.header(bts[:20])
+
+        it "only has size and protocol if protocol isn't 1024":
+            pkt = LIFXPacket.empty_normalise(
+                protocol=234, pkt_type=15, source=1, sequence=1, target=None
+            )
+
+            header = PacketTypeExtractor.header(pkt.pack().tobytes())
+            assert header.size == 36
+            assert header.protocol == 234
+            assert header.pkt_type is None
+            assert header.source is None
+            assert header.serial is None
+
+        it "gets all the header fields for 1024":
+            pkt = LIFXPacket.empty_normalise(
+                pkt_type=78,
+                source=9001,
+                sequence=3,
+                target="d073d5001337",
+                ack_required=False,
+                res_required=True,
+                payload=b"things",
+            )
+            bts = pkt.pack().tobytes()
+
+            for data in (bts, bytearray(bts), memoryview(bts)):
+                header = PacketTypeExtractor.header(data)
+                assert header.size == 36
+                assert header.protocol == 1024
+                assert header.addressable is True
+                assert header.tagged is False
+                assert header.source == 9001
+                assert header.target == binascii.unhexlify("d073d50013370000")
+                assert header.serial == "d073d5001337"
+                assert header.res_required is True
+                assert header.ack_required is False
+                assert header.sequence == 3
+                assert header.pkt_type == 78
+                assert header.key == (9001, 3, header.target)
+
+            pkt = LIFXPacket.empty_normalise(pkt_type=2, source=1, sequence=1, target=None)
+            header = PacketTypeExtractor.header(pkt.pack().tobytes())
+            assert header.tagged is True
+            assert header.target == b"\x00" * 8
+
 describe "sources_for":
     it "can get the source for packets":
         result = list(sources_for(M))
@@ -203,6 +258,17 @@ describe "sources_for":
 
         assert result[2][1] == dedent(three).lstrip()
 
+    it "only works out caller_source when it's asked for":
+        class N(Messages):
+            Four = msg(80)
+
+        with mock.patch("photons_protocol.messages.sources_for", wraps=sources_for) as sf:
+            assert "caller_source" not in N.Four.Meta.__dict__
+            assert N.Four.Meta.caller_source == "Four = msg(80)\n"
+            assert N.Four.Meta.caller_source == "Four = msg(80)\n"
+
+        sf.assert_called_once_with(N)
+
 describe "MessagesMixin":
 
     @pytest.fixture()
@@ -271,6 +337,23 @@ describe "MessagesMixin":
 
             packet_type.assert_called_once_with(asbytes)
 
+    describe "packet_kls_for":
+        it "uses the packet_classes index on the register", protocol_register:
+            assert protocol_register.packet_classes[(1024, 78)] == (LIFXPacket, M.One)
+
+            Packet = mock.Mock(name="Packet")
+            kls = mock.Mock(name="kls")
+            protocol_register.packet_classes[(1024, 78)] = (Packet, kls)
+
+            assert Messages.packet_kls_for(1024, 78, protocol_register) == (Packet, kls)
+            assert Messages.packet_kls_for(1024, 99, protocol_register) == (LIFXPacket, M.Two)
+            assert Messages.packet_kls_for(1024, 88, protocol_register) == (LIFXPacket, None)
+
+        it "looks through the messages classes if there is no index", protocol_register:
+            register = {1024: (LIFXPacket, [M])}
+            assert Messages.packet_kls_for(1024, 78, register) == (LIFXPacket, M.One)
+            assert Messages.packet_kls_for(1024, 88, register) == (LIFXPacket, None)
+
     describe "unpack":
         it "works", protocol_register:
             bts = M.One(source=1, sequence=2, target="d073d5000001", one="bl").pack()
@@ -63,6 +63,36 @@ describe "The multiple modifier":
 
         self.assertProperties(thing, test_thing)
 
+    it "unpacks fixed layout items the same as one at a time":
+
+        class Other(dictobj.PacketSpec):
+            fields = [("one", T.Uint16), ("two", T.Bool), ("three", T.Reserved(7))]
+
+        class Thing(dictobj.PacketSpec):
+            fields = [
+                ("one", T.Uint16.multiple(3)),
+                ("two", T.Bytes(24).multiple(3, kls=Other)),
+            ]
+
+        thing = Thing(
+            one=[1, 2, 3],
+            two=[{"one": 20, "two": True}, {"one": 30, "two": False}, {"one": 40, "two": True}],
+        )
+        bts = thing.pack()
+
+        unpacked = Thing.unpack(bts)
+        assert unpacked.one == [1, 2, 3]
+        assert list_of_dicts(unpacked.two) == [
+            {"one": 20, "two": True, "three": b"\x00"},
+            {"one": 30, "two": False, "three": b"\x00"},
+            {"one": 40, "two": True, "three": b"\x00"},
+        ]
+
+        spec = Thing.Meta.all_field_types_dict["two"].spec(unpacked, unpacking=True)
+        each = spec.unpack_each_bytes(Meta.empty(), bts[16 * 3 :], Other)
+        assert [list(o.items()) for o in unpacked.two] == [list(o.items()) for o in each]
+        assert unpacked.pack() == bts
+
     it "create items from nothing":
 
         class E(enum.Enum):
@@ -7,7 +7,7 @@ from photons_app.errors import ProgrammerError
 from photons_app import helpers as hp
 
 from delfick_project.errors_pytest import assertRaises
-from delfick_project.norms import sb
+from delfick_project.norms import sb, Meta
 from unittest import mock
 import pytest
 import uuid
@@ -182,6 +182,31 @@ describe "PacketSpecMetaKls":
 
             assert V.Group1.Meta.name_to_group == {}
 
+        it "has field_metas", V:
+
+            class Together(metaclass=PacketSpecMetaKls):
+                fields = [("g1", V.Group1), ("g2", V.Group2), ("another", T.Bool)]
+
+            assert list(Together.Meta.field_metas) == ["one", "two", "three", "four", "another"]
+            for name, meta in Together.Meta.field_metas.items():
+                assert meta == Meta.empty().at(name)
+
+        it "makes lazy_attributes on first access", V:
+
+            class Together(metaclass=PacketSpecMetaKls):
+                fields = [("g1", V.Group1)]
+
+            make = mock.Mock(name="make", return_value="stuff")
+            Together.Meta.lazy_attributes = {"thing": make}
+            make.assert_not_called()
+
+            assert Together.Meta.thing == "stuff"
+            assert Together.Meta.thing == "stuff"
+            make.assert_called_once_with()
+            assert Together.Meta.lazy_attributes == {}
+
+            assert not hasattr(Together.Meta, "other")
+
         it "has all_names", V:
 
             class Together(metaclass=PacketSpecMetaKls):
@@ -224,12 +224,6 @@ describe "Packet attributes":
                 normalised = mock.Mock(name="normalised")
                 untransformed = mock.Mock(name="untransformed")
 
-                @hp.memoized_property
-                def initd_spec(s):
-                    initd_spec = mock.Mock(name="specd")
-                    initd_spec.normalise.return_value = s.normalised
-                    return initd_spec
-
                 @hp.memoized_property
                 def untransform(s):
                     return mock.Mock(name="untransform", return_value=s.untransformed)
@@ -237,7 +231,7 @@ describe "Packet attributes":
                 @hp.memoized_property
                 def typ(s):
                     typ = mock.Mock(name="typ", _allow_callable=False, untransform=s.untransform)
-                    typ.spec.return_value = s.initd_spec
+                    typ.normalise.return_value = s.normalised
                     return typ
 
                 def getitem_spec(s, pkt, actual, do_transform, allow_bitarray):
@@ -269,8 +263,7 @@ describe "Packet attributes":
             )
 
             actual.assert_called_with(V.parent, V.serial)
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), cald)
+            V.typ.normalise.assert_called_once_with(p, meta.at(V.key), cald, unpacking=V.unpacking)
             V.untransform.assert_called_with(p, V.normalised)
 
         it "does not call the value if it's not allowed to be callable and is callable", V:
@@ -286,8 +279,9 @@ describe "Packet attributes":
             )
 
             assert len(actual.mock_calls) == 0
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), actual, unpacking=V.unpacking
+            )
             V.untransform.assert_called_with(p, V.normalised)
 
         it "does not transform if do_transform is False", V:
@@ -303,8 +297,9 @@ describe "Packet attributes":
             )
 
             assert len(actual.mock_calls) == 0
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), actual, unpacking=V.unpacking
+            )
             assert len(V.untransform.mock_calls) == 0
 
         it "does not transform if the value from spec is sb.NotSpecified", V:
@@ -315,14 +310,15 @@ describe "Packet attributes":
             p = P()
             meta = Meta.empty()
 
-            V.initd_spec.normalise.return_value = sb.NotSpecified
+            V.typ.normalise.return_value = sb.NotSpecified
             assert (
                 V.getitem_spec(p, sb.NotSpecified, do_transform=True, allow_bitarray=True)
                 is sb.NotSpecified
             )
 
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), sb.NotSpecified)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), sb.NotSpecified, unpacking=V.unpacking
+            )
             assert len(V.untransform.mock_calls) == 0
 
         it "does not transform if the value from spec is Optional", V:
@@ -333,19 +329,20 @@ describe "Packet attributes":
             p = P()
             meta = Meta.empty()
 
-            V.initd_spec.normalise.return_value = Optional
+            V.typ.normalise.return_value = Optional
             assert (
                 V.getitem_spec(p, sb.NotSpecified, do_transform=True, allow_bitarray=True)
                 is Optional
             )
 
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), sb.NotSpecified)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), sb.NotSpecified, unpacking=V.unpacking
+            )
             assert len(V.untransform.mock_calls) == 0
 
         it "turns bitarrays into bytes if not allow_bitarray", V:
             actual = b"\x00"
-            V.initd_spec.normalise.return_value = bitarray("0000")
+            V.typ.normalise.return_value = bitarray("0000")
 
             class P(PacketSpecMixin):
                 pass
@@ -354,8 +351,9 @@ describe "Packet attributes":
             meta = Meta.empty()
             assert V.getitem_spec(p, actual, do_transform=False, allow_bitarray=False) == b"\x00"
 
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), actual, unpacking=V.unpacking
+            )
             assert len(V.untransform.mock_calls) == 0
 
         it "turns transformed values as bitarrays into bytes if not allow_bitarray", V:
@@ -369,8 +367,9 @@ describe "Packet attributes":
             meta = Meta.empty()
             assert V.getitem_spec(p, actual, do_transform=True, allow_bitarray=False) == b"\x00"
 
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), actual, unpacking=V.unpacking
+            )
             V.untransform.assert_called_with(p, V.normalised)
 
         it "keeps transformed values as bitarrays if allow_bitarray", V:
@@ -386,13 +385,14 @@ describe "Packet attributes":
                 "0000"
             )
 
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), actual, unpacking=V.unpacking
+            )
             V.untransform.assert_called_with(p, V.normalised)
 
         it "keeps untransformed values as bitarrays if allow_bitarray", V:
             actual = b"\x00"
-            V.initd_spec.normalise.return_value = bitarray("0000")
+            V.typ.normalise.return_value = bitarray("0000")
 
             class P(PacketSpecMixin):
                 pass
@@ -403,8 +403,9 @@ describe "Packet attributes":
                 "0000"
             )
 
-            V.typ.spec.assert_called_once_with(p, V.unpacking, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(
+                p, meta.at(V.key), actual, unpacking=V.unpacking
+            )
             assert len(V.untransform.mock_calls) == 0
 
         it "does not transform if we are not unpacking", V:
@@ -418,8 +419,7 @@ describe "Packet attributes":
             V.unpacking = False
             assert V.getitem_spec(p, actual, do_transform=True, allow_bitarray=True) == V.normalised
 
-            V.typ.spec.assert_called_once_with(p, False, transform=False)
-            V.initd_spec.normalise.assert_called_with(meta.at(V.key), actual)
+            V.typ.normalise.assert_called_once_with(p, meta.at(V.key), actual, unpacking=False)
             assert len(V.untransform.mock_calls) == 0
 
     describe "__getattr__":
@@ -70,6 +70,23 @@ describe "PacketSpecMixin":
 
                 pack.assert_called_once_with(packet, None, None, None)
 
+        describe "pack_many":
+            it "makes packets from dictionaries and uses the provided packing_kls", Packet, V:
+                res = mock.Mock(name="res")
+                V.packing_kls.pack_many.return_value = res
+
+                packet = Packet(one="hi", two=3, another=False)
+                r = Packet.pack_many(
+                    [packet, {"one": "wat", "two": 2, "another": True}],
+                    packing_kls=V.packing_kls,
+                )
+
+                assert r is res
+                V.packing_kls.pack_many.assert_called_once_with(Packet, mock.ANY)
+                pkts = V.packing_kls.pack_many.mock_calls[0][1][1]
+                assert pkts[0] is packet
+                assert pkts[1] == Packet(one="wat", two=2, another=True)
+
         describe "unpack":
             it "uses the provided packing_kls", Packet, V:
                 res = mock.Mock(name="res")
@@ -705,6 +722,40 @@ describe "PacketSpecMixin":
             assert q.things[2].actual("one") == 0
             assert q.as_dict() == {"things": [P(one=1000), P(one=2000), P(one=0)]}
 
+        it "is the same as getting each field":
+
+            class E(enum.Enum):
+                ONE = 1
+                TWO = 2
+
+            class G(dictobj.PacketSpec):
+                fields = [("one", T.Uint8.enum(E)), ("two", T.String(32).default("hi"))]
+
+            class P(dictobj.PacketSpec):
+                fields = [
+                    ("three", T.Uint16.optional()),
+                    ("g", G),
+                    ("four", T.Bytes(16)),
+                    ("five", T.Int8.allow_callable()),
+                ]
+
+            p = P.unpack(P(one=E.TWO, three=3, four=b"\x01\x02", five=4).pack())
+            p.five = lambda pkt, serial: 6
+
+            dct = p.as_dict()
+            assert dct == {
+                "three": 3,
+                "g": {"one": E.TWO, "two": "hi"},
+                "four": b"\x01\x02",
+                "five": 6,
+            }
+            assert list(dct) == ["three", "g", "four", "five"]
+
+            for name in P.Meta.all_names:
+                group = P.Meta.name_to_group.get(name)
+                got = dct[group][name] if group else dct[name]
+                assert got == p[name]
+
     describe "__repr__":
         it "converts bytes and bitarray to hexlified":
             payload = "d073d5"
@@ -1,6 +1,14 @@
 # coding: spec
 
-from photons_protocol.packing import val_to_bitarray, BitarraySlice, FieldInfo, PacketPacking
+from photons_protocol.packing import (
+    val_to_bitarray,
+    BitarraySlice,
+    FieldInfo,
+    PacketPacking,
+    PacketCodec,
+    Fallback,
+    unpack_values,
+)
 from photons_protocol.types import Type as T, Optional
 from photons_protocol.errors import BadConversion
 from photons_protocol.packets import dictobj
@@ -650,3 +658,196 @@ describe "PacketPacking":
             f = PacketPacking.unpack(P, val)
             assert f.__getitem__("payload", allow_bitarray=True) == expected
             assert f.one == -128
+
+describe "PacketCodec":
+
+    @pytest.fixture()
+    def P(self):
+        class P(dictobj.PacketSpec):
+            fields = [
+                ("one", T.Uint16),
+                ("two", T.Uint8.S(4)),
+                ("three", T.Bool),
+                ("four", T.Reserved(3)),
+                ("five", T.Bytes(16)),
+                ("six", T.Float),
+            ]
+
+        return P
+
+    def bitarray_pack(self, pkt):
+        for_kls = mock.Mock(name="for_kls", return_value=None)
+        with mock.patch.object(PacketCodec, "for_kls", for_kls):
+            return PacketPacking.pack(pkt)
+
+    it "is made once for fixed layout packets", P:
+        codec = PacketCodec.for_kls(P)
+        assert isinstance(codec, PacketCodec)
+        assert PacketCodec.for_kls(P) is codec
+        assert codec.size_bits == 16 + 8 + 16 + 32
+        assert codec.struct.format == "<HB2sf"
+
+    it "knows where the fields with their own slot are", P:
+        codec = PacketCodec.for_kls(P)
+        assert sorted(codec.offsets) == ["five", "one", "six"]
+
+        pkt = P(one=300, two=9, three=True, five=b"\x01\x02", six=1.5)
+        bts = bytearray(PacketPacking.pack(pkt).tobytes())
+
+        offset, slot = codec.offsets["one"]
+        assert (offset, slot.format) == (0, "<H")
+        slot.pack_into(bts, offset, 20)
+
+        offset, slot = codec.offsets["six"]
+        assert (offset, slot.format) == (5, "<f")
+        slot.pack_into(bts, offset, 3.5)
+
+        pkt.one = 20
+        pkt.six = 3.5
+        assert bytes(bts) == PacketPacking.pack(pkt).tobytes()
+
+    it "is None for packets with dynamic or multiple fields":
+
+        class Dynamic(dictobj.PacketSpec):
+            fields = [("one", T.Uint8), ("two", T.Bytes(lambda pkt: pkt.one * 8))]
+
+        class Multiple(dictobj.PacketSpec):
+            fields = [("one", T.Uint8.multiple(2))]
+
+        class Unaligned(dictobj.PacketSpec):
+            fields = [("one", T.Uint8), ("two", T.Bool)]
+
+        for kls in (Dynamic, Multiple, Unaligned):
+            assert PacketCodec.for_kls(kls) is None
+
+    it "packs the same as the bitarray path", P:
+        pkt = P(one=300, two=9, three=True, five=b"\x01\x02", six=1.5)
+        expected = self.bitarray_pack(pkt)
+        assert PacketPacking.pack(pkt) == expected
+
+        pkt = P(one=0, two=15, three=False, five=b"", six=-2.25)
+        expected = self.bitarray_pack(pkt)
+        assert PacketPacking.pack(pkt) == expected
+
+    it "falls back to the bitarray path for values it can't pack", P:
+        pkt = P(one=300, two=9, three=True, six=1.5)
+        with assertRaises(BadConversion, "Cannot pack an unspecified value", field="five"):
+            PacketPacking.pack(pkt)
+
+    it "unpacks the same as the bitarray path", P:
+        pkt = P(one=300, two=9, three=True, five=b"\x01\x02", six=1.5)
+        bts = PacketPacking.pack(pkt).tobytes()
+
+        unpacked = PacketPacking.unpack(P, bts)
+        expected, _ = PacketPacking.pkt_from_bitarray(P, ba(bts))
+
+        for name in P.Meta.all_names:
+            want = dictobj.__getitem__(expected, name)
+            got = dictobj.__getitem__(unpacked, name)
+            assert got == want
+            assert type(got) is type(want)
+
+    it "works with the LIFX frame":
+        from photons_messages import DeviceMessages
+
+        msg = DeviceMessages.SetPower(
+            level=65535, source=2, sequence=1, target="d073d5001337", ack_required=True
+        )
+        packed = msg.pack()
+        for_kls = mock.Mock(name="for_kls", return_value=None)
+        with mock.patch.object(PacketCodec, "for_kls", for_kls):
+            assert msg.pack() == packed
+
+        unpacked = DeviceMessages.SetPower.unpack(packed.tobytes())
+        assert unpacked.level == 65535
+        assert unpacked.serial == "d073d5001337"
+        assert unpacked.protocol == 1024
+        assert unpacked.addressable
+        assert not unpacked.tagged
+        assert unpacked.pack() == packed
+
+    it "can unpack many instances at once", P:
+        pkts = [
+            P(one=300, two=9, three=True, five=b"\x01\x02", six=1.5),
+            P(one=1, two=2, three=False, five=b"\x03\x04", six=-2.25),
+        ]
+        bts = b"".join(PacketPacking.pack(pkt).tobytes() for pkt in pkts)
+
+        unpacked = PacketCodec.for_kls(P).unpack_many(P, bts)
+        assert len(unpacked) == 2
+
+        for pkt, got in zip(pkts, unpacked):
+            assert type(got) is P
+            expected = PacketPacking.unpack(P, PacketPacking.pack(pkt).tobytes())
+            assert list(got.items()) == list(expected.items())
+            assert got.pack() == pkt.pack()
+
+describe "pack_many":
+    it "packs fixed layout packets into one buffer":
+
+        class P(dictobj.PacketSpec):
+            fields = [("one", T.Uint16), ("two", T.Bool), ("three", T.Reserved(7))]
+
+        pkts = [P(one=i, two=i % 2 == 0) for i in range(3)]
+        packed = PacketPacking.pack_many(P, pkts)
+
+        assert len(packed) == 3
+        assert all(isinstance(v, memoryview) for v in packed)
+        assert len(set(id(v.obj) for v in packed)) == 1
+        assert [bytes(v) for v in packed] == [pkt.pack().tobytes() for pkt in pkts]
+
+    it "uses the bitarray path for packets the codec can't pack":
+
+        class P(dictobj.PacketSpec):
+            fields = [("one", T.Uint16), ("two", T.Bytes(16))]
+
+        pkts = [P(one=1, two="0102"), P(one=2, two=b"\x03\x04")]
+        codec = PacketCodec.for_kls(P)
+        original = codec.pack_into
+
+        def pack_into(buf, offset, pkt, parent, serial):
+            if pkt is pkts[0]:
+                raise Fallback()
+            return original(buf, offset, pkt, parent, serial)
+
+        with mock.patch.object(codec, "pack_into", pack_into):
+            packed = PacketPacking.pack_many(P, pkts)
+
+        assert [bytes(v) for v in packed] == [b"\x01\x00\x01\x02", b"\x02\x00\x03\x04"]
+
+    it "joins packets without a fixed layout into one buffer":
+
+        class P(dictobj.PacketSpec):
+            fields = [("one", T.Uint8), ("two", T.Bytes(lambda pkt: pkt.one * 8))]
+
+        pkts = [P(one=1, two=b"\x05"), P(one=2, two=b"\x06\x07")]
+        packed = PacketPacking.pack_many(P, pkts)
+        assert len(set(id(v.obj) for v in packed)) == 1
+        assert [bytes(v) for v in packed] == [b"\x01\x05", b"\x02\x06\x07"]
+
+    it "adds the payload of parent packets after their fields":
+        from photons_messages import DeviceMessages
+
+        pkts = [
+            DeviceMessages.SetLabel(label="kitchen", source=1, sequence=1, target="d073d5000001"),
+            DeviceMessages.SetPower(level=65535, source=2, sequence=2, target="d073d5000002"),
+        ]
+        simplified = [pkt.simplify() for pkt in pkts]
+        assert PacketCodec.for_kls(type(simplified[0])) is not None
+
+        packed = PacketPacking.pack_many(type(simplified[0]), simplified)
+        assert len(set(id(v.obj) for v in packed)) == 1
+        assert [bytes(v) for v in packed] == [pkt.pack().tobytes() for pkt in pkts]
+
+describe "unpack_values":
+    it "unpacks many values with one struct":
+        val = ba(b"\x01\x00\x02\x00\x03\x01")
+        assert unpack_values(T.Uint16, val, 16, 3) == [1, 2, 259]
+        assert unpack_values(T.Int8, val, 8, 6) == [1, 0, 2, 0, 3, 1]
+
+    it "returns None if it can't use a struct":
+        val = ba(b"\x01\x00\x02\x00")
+        assert unpack_values(T.Uint16, val, 16, 3) is None
+        assert unpack_values(T.Uint16.S(12), val, 12, 2) is None
+        assert unpack_values(T.Bytes(16), val, 16, 2) is None
+        assert unpack_values(T.Bool, val, 1, 32) is None
@@ -13,8 +13,15 @@ from contextlib import contextmanager
 from bitarray import bitarray
 from unittest import mock
 import pytest
+import enum
 import json
 
+
+class Numbers(enum.Enum):
+    ONE = 1
+    TWO = 2
+
+
 describe "the json spec":
     it "can match just static types":
         for val in ("adsf", True, False, None, 0, 1, 1.2):
@@ -440,6 +447,68 @@ describe "Type":
             assert spec.normalise(Meta.empty(), cb) is cb
             assert spec.normalise(Meta.empty(), "hello") == "hello"
 
+    describe "static_spec":
+        it "memoizes a spec made without a packet":
+            t = T.Uint8.enum(Numbers)
+            spec = t.static_spec(unpacking=True)
+            assert spec.pkt is None
+            assert spec.spec.enum is Numbers
+            assert t.static_spec(unpacking=True) is spec
+
+            packing = t.static_spec(unpacking=False)
+            assert packing is not spec
+            assert packing.unpacking is False
+            assert t.static_spec(unpacking=False) is packing
+
+        it "returns None if the spec needs the packet":
+            for t in (
+                T.Uint8.enum(lambda pkt: Numbers),
+                T.Uint8.bitmask(lambda pkt: Numbers),
+                T.Bytes(lambda pkt: 8),
+                T.Bytes(16).dynamic(lambda pkt: []),
+                T.Uint8.multiple(2),
+            ):
+                assert t.static_spec(unpacking=True) is None
+                assert t.static_spec(unpacking=False) is None
+
+    describe "normalise":
+        it "is the same as normalising with the spec":
+            pkt = mock.Mock(name="pkt")
+            meta = Meta.empty()
+            cb = lambda: 1
+
+            for t, vals in [
+                (T.Uint8, [1, 2, sb.NotSpecified]),
+                (T.Uint8.default(20), [1, sb.NotSpecified]),
+                (T.Uint8.default(lambda pkt: 30), [1, sb.NotSpecified]),
+                (T.Uint8.override(40), [1, sb.NotSpecified]),
+                (T.Uint8.optional(), [1, sb.NotSpecified, Optional]),
+                (T.Uint8.allow_callable(), [1, cb, sb.NotSpecified]),
+                (T.Uint8.enum(Numbers), [1, "TWO", Numbers.ONE, sb.NotSpecified]),
+                (T.Bool, [True, False, 0]),
+                (T.String(32), ["hi", b"hi\x00", sb.NotSpecified]),
+            ]:
+                for unpacking in (True, False):
+                    for val in vals:
+                        want = t.spec(pkt, unpacking, transform=False).normalise(meta, val)
+                        assert t.normalise(pkt, meta, val, unpacking=unpacking) == want
+
+        it "uses spec if there isn't a static spec":
+            ret = mock.Mock(name="ret")
+            val = mock.Mock(name="val")
+            pkt = mock.Mock(name="pkt")
+            meta = Meta.empty()
+
+            spec = mock.Mock(name="spec")
+            spec.normalise.return_value = ret
+
+            t = T.Uint8.enum(lambda pkt: Numbers)
+            with mock.patch.object(t, "spec", return_value=spec) as make_spec:
+                assert t.normalise(pkt, meta, val, unpacking=True) is ret
+
+            make_spec.assert_called_once_with(pkt, True, transform=False)
+            spec.normalise.assert_called_once_with(meta, val)
+
     describe "dynamic_wrapper":
 
         @pytest.fixture()
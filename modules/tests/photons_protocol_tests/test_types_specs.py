@@ -268,6 +268,48 @@ describe "version_number_spec":
             with assertRaises(BadSpecValue, "Expected string to match", got="1"):
                 types.version_number_spec(unpacking=True).normalise(meta, "1")
 
+describe "EnumLookup":
+    it "is made once per enum":
+
+        class E(Enum):
+            ONE = 1
+
+        lookup = types.EnumLookup.for_enum(E)
+        assert types.EnumLookup.for_enum(E) is lookup
+        assert lookup.members == [("ONE", E.ONE)]
+        assert lookup.available == [("ONE", 1)]
+
+    it "finds members by name, repr and value":
+
+        class E(Enum):
+            ONE = 1
+            TWO = 2
+            THREE = "ONE"
+
+        lookup = types.EnumLookup.for_enum(E)
+        for val, want in [
+            ("ONE", E.ONE),
+            ("<E.TWO: 2>", E.TWO),
+            (2, E.TWO),
+            (1.0, E.ONE),
+            (True, E.ONE),
+            ("THREE", E.THREE),
+            (4, None),
+            ("FOUR", None),
+        ]:
+            assert lookup.find(val) is want
+
+        assert lookup.find(2, with_value=False) is None
+        assert lookup.find("TWO", with_value=False) is E.TWO
+
+    it "records the first member with a zero value":
+
+        class E(Enum):
+            ONE = 1
+            ZERO = 0
+
+        assert types.EnumLookup.for_enum(E).zero_name == "ZERO"
+
 describe "integer_spec":
     it "takes in many things":
         pkt = mock.Mock(name="pkt")
@@ -4,7 +4,7 @@ from photons_transport.comms.base import Communication, Found, FakeAck
 from photons_transport.errors import FailedToFindDevice
 from photons_transport.transports.base import Transport
 from photons_transport.comms.receiver import Receiver
-from photons_transport import RetryOptions
+from photons_transport import RetryOptions, TransportMetrics
 
 from photons_app.formatter import MergedOptionStringFormatter
 from photons_app.errors import FoundNoDevices, TimedOut
@@ -93,6 +93,9 @@ describe "Communication":
         assert V.communication.transport_target is V.transport_target
         assert V.communication.found == Found()
         assert isinstance(V.communication.receiver, Receiver)
+        assert isinstance(V.communication.metrics, TransportMetrics)
+        assert V.communication.receiver.metrics is V.communication.metrics
+        assert V.communication.metrics.receiver is V.communication.receiver
 
     async it "has a stop fut", V:
         assert not V.communication.stop_fut.done()
@@ -213,6 +216,53 @@ describe "Communication":
             assert V.communication.seq(target) == 0
             assert V.communication._seq == {target: 0}
 
+        async it "skips sequences that are in flight", V:
+            target = "d073d5000001"
+            V.communication.receiver.in_flight[target] = {1: 1, 2: 1, 4: 2}
+
+            assert V.communication.seq(target) == 3
+            assert V.communication.seq(target) == 5
+
+            V.communication._seq[target] = 255
+            V.communication.receiver.in_flight[target][0] = 1
+            assert V.communication.seq(target) == 3
+
+        async it "uses the next sequence if they are all in flight", V:
+            target = "d073d5000001"
+            V.communication.receiver.in_flight[target] = {i: 1 for i in range(256)}
+
+            assert V.communication.seq(target) == 1
+            assert V.communication.seq(target) == 2
+
+    describe "free_seq":
+        async it "returns a sequence straight away if there is one free", V:
+            target = "d073d5000001"
+            V.communication.receiver.in_flight[target] = {1: 1}
+            assert await V.communication.free_seq(target) == 2
+
+        async it "waits for a sequence to be released if they are all in flight", V:
+            target = "d073d5000001"
+            receiver = V.communication.receiver
+            receiver.in_flight[target] = {i: 1 for i in range(256)}
+
+            task = hp.async_as_background(V.communication.free_seq(target))
+            await asyncio.sleep(0.01)
+            assert not task.done()
+
+            receiver.release(target, 6)
+            assert await task == 6
+
+        async it "stops waiting when the session is finished", V:
+            target = "d073d5000001"
+            V.communication.receiver.in_flight[target] = {i: 1 for i in range(256)}
+
+            task = hp.async_as_background(V.communication.free_seq(target), silent=True)
+            await asyncio.sleep(0.01)
+            V.communication.stop_fut.cancel()
+
+            with assertRaises(asyncio.CancelledError):
+                await task
+
     describe "forget":
         async it "does nothing if serial not in found", V:
             serial = "d073d5000001"
@@ -338,6 +388,55 @@ describe "Communication":
             assert V.communication.found[serial] == {service: t1}
             make_transport.assert_called_once_with(serial, service, {"a": a})
 
+    describe "add_services":
+        async it "adds many services and closes replaced transports together", V:
+            service = mock.Mock(name="service")
+
+            closing = []
+            finish = asyncio.Future()
+
+            def make_old(name, error=None):
+                async def close():
+                    closing.append(name)
+                    if error:
+                        raise error
+                    await finish
+
+                return mock.Mock(name=f"old{name}", close=close)
+
+            old1 = make_old(1)
+            old2 = make_old(2, error=Exception("NOPE"))
+            old3 = make_old(3)
+
+            V.communication.found["d073d5000001"] = {service: old1}
+            V.communication.found["d073d5000002"] = {service: old2}
+            V.communication.found["d073d5000003"] = {service: old3}
+
+            transports = {}
+
+            async def make_transport(serial, service, kwargs):
+                t = transports[serial] = mock.Mock(name=f"transport_{serial}")
+                t.close = pytest.helpers.AsyncMock(name="close")
+                return t
+
+            services = {
+                ("d073d5000001", service): {"host": "192.168.0.1"},
+                ("d073d5000002", service): {"host": "192.168.0.2"},
+                ("d073d5000003", service): {"host": "192.168.0.3"},
+                ("d073d5000004", service): {"host": "192.168.0.4"},
+            }
+
+            with mock.patch.object(V.communication, "make_transport", make_transport):
+                task = hp.async_as_background(V.communication.add_services(services))
+                await asyncio.sleep(0.01)
+                assert sorted(closing) == [1, 2, 3]
+                assert not task.done()
+                finish.set_result(True)
+                await task
+
+            for serial, t in transports.items():
+                assert V.communication.found[serial] == {service: t}
+
     describe "find_devices":
         async it "uses find_specific_serials", V:
             a = mock.Mock(name="a")
@@ -867,6 +966,134 @@ describe "Communication":
                 "write",
             ]
 
+    describe "coalescing requests":
+
+        @pytest.fixture()
+        def sending(self, V):
+            info = {"calls": [], "futs": []}
+
+            async def _send_single(original, packet, **kwargs):
+                info["calls"].append((original, packet, kwargs))
+                fut = asyncio.Future()
+                info["futs"].append(fut)
+                return await fut
+
+            with mock.patch.object(V.communication, "_send_single", _send_single):
+                yield info
+
+        def send(self, V, original, **kwargs):
+            packet = original.clone()
+            packet.update(dict(source=1, sequence=V.communication.seq(packet.serial)))
+            kwargs.setdefault("timeout", 1)
+            return hp.async_as_background(
+                V.communication.send_single(original, packet, **kwargs), silent=True
+            )
+
+        async it "is off by default", V, sending:
+            assert not V.communication.coalesce_requests
+
+            t1 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            t2 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            await asyncio.sleep(0.01)
+            assert len(sending["calls"]) == 2
+
+            for fut in sending["futs"]:
+                fut.set_result([])
+            await asyncio.wait([t1, t2])
+
+        async it "gives the replies for a Get already in flight to the same device", V, sending:
+            V.communication.coalesce_requests = True
+
+            get1 = DeviceMessages.GetPower(target="d073d5000001")
+            get2 = DeviceMessages.GetPower(target="d073d5000001")
+            reply = DeviceMessages.StatePower(level=0, target="d073d5000001")
+            reply.Information.update(remote_addr=("192.168.0.1", 56700), sender_message=get1)
+
+            t1 = self.send(V, get1)
+            t2 = self.send(V, get2)
+            t3 = self.send(V, DeviceMessages.GetPower(target="d073d5000002"))
+            await asyncio.sleep(0.01)
+            assert len(sending["calls"]) == 2
+            assert len(V.communication.in_flight_requests) == 2
+
+            sending["futs"][0].set_result([reply])
+            sending["futs"][1].set_result([])
+
+            (r1,) = await t1
+            (r2,) = await t2
+            assert r1 == reply and r2 == reply
+            assert r1 is not r2
+
+            assert r1.Information.sender_message is get1
+            assert r2.Information.sender_message is get2
+            assert r2.Information.remote_addr == ("192.168.0.1", 56700)
+
+            assert await t3 == []
+            assert V.communication.in_flight_requests == {}
+
+            metrics = V.communication.metrics
+            assert metrics.for_serial("d073d5000001").coalesced == 1
+            assert metrics.for_serial("d073d5000002").coalesced == 0
+
+            # And once it's done we send again
+            t4 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            await asyncio.sleep(0.01)
+            assert len(sending["calls"]) == 3
+            sending["futs"][2].set_result([])
+            assert await t4 == []
+
+        async it "gives the same error to everyone waiting", V, sending:
+            V.communication.coalesce_requests = True
+
+            t1 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            t2 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            await asyncio.sleep(0.01)
+
+            error = TimedOut("Waiting for reply to a packet", serial="d073d5000001")
+            sending["futs"][0].set_exception(error)
+
+            for t in (t1, t2):
+                with assertRaises(TimedOut, "Waiting for reply to a packet"):
+                    await t
+
+        async it "keeps waiting when the first caller is cancelled", V, sending:
+            V.communication.coalesce_requests = True
+
+            t1 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            t2 = self.send(V, DeviceMessages.GetPower(target="d073d5000001"))
+            await asyncio.sleep(0.01)
+
+            t1.cancel()
+            await asyncio.sleep(0.01)
+            sending["futs"][0].set_result([])
+            assert await t2 == []
+            assert t1.cancelled()
+
+        async it "only coalesces identical Get messages sent to one device", V, sending:
+            V.communication.coalesce_requests = True
+
+            msgs = [
+                (DeviceMessages.GetPower(target="d073d5000001"), {}),
+                (DeviceMessages.GetPower(target="d073d5000001", ack_required=False), {}),
+                (DeviceMessages.GetPower(target="d073d5000001"), {"no_retry": True}),
+                (DeviceMessages.GetPower(target="d073d5000001"), {"timeout": 2}),
+                (DeviceMessages.GetPower(target="d073d5000001"), {"broadcast": True}),
+                (DeviceMessages.GetPower(target="d073d5000001"), {"transport": mock.ANY}),
+                (DeviceMessages.SetPower(level=0, target="d073d5000001"), {}),
+                (DeviceMessages.SetPower(level=0, target="d073d5000001"), {}),
+                (DeviceMessages.EchoRequest(echoing=b"a", target="d073d5000001"), {}),
+                (DeviceMessages.EchoRequest(echoing=b"b", target="d073d5000001"), {}),
+                (DeviceMessages.GetPower(), {}),
+            ]
+
+            ts = [self.send(V, msg, **kwargs) for msg, kwargs in msgs]
+            await asyncio.sleep(0.01)
+            assert len(sending["calls"]) == len(msgs)
+
+            for fut in sending["futs"]:
+                fut.set_result([])
+            await asyncio.wait(ts)
+
     describe "private transport_for_send":
 
         @pytest.fixture()
@@ -987,24 +1214,77 @@ describe "Communication":
             allow_zero = mock.Mock(name="allow_zero")
             addr = mock.Mock(name="addr")
 
-            def recv(pkt, addr, *, allow_zero):
+            def recv(pkt, addr, *, allow_zero, header):
+                assert pkt | DeviceMessages.StatePower
+                assert pkt.level == 100
+
+            recv = pytest.helpers.AsyncMock(name="recv", side_effect=recv)
+
+            with mock.patch.object(V.communication.receiver, "recv", recv):
+                pkt = DeviceMessages.StatePower(level=100, source=1, sequence=1, target=None)
+                data = pkt.pack().tobytes()
+                await V.communication.received_data(data, addr, allow_zero=allow_zero)
+
+            recv.assert_called_once_with(
+                mock.ANY, addr, allow_zero=allow_zero, header=mock.ANY
+            )
+
+        async it "unpacks lazily if the target says to", V:
+            assert not V.communication.unpack_lazily
+
+            V.transport_target.unpack_lazily = True
+            assert Communication(V.transport_target).unpack_lazily
+
+        async it "can unpack lazily", V:
+            allow_zero = mock.Mock(name="allow_zero")
+            addr = mock.Mock(name="addr")
+
+            def recv(pkt, addr, *, allow_zero, header):
                 assert pkt | DeviceMessages.StatePower
+                assert "_lazy_payload" in pkt.__dict__
                 assert pkt.level == 100
+                assert "_lazy_payload" not in pkt.__dict__
 
             recv = pytest.helpers.AsyncMock(name="recv", side_effect=recv)
 
+            V.communication.unpack_lazily = True
             with mock.patch.object(V.communication.receiver, "recv", recv):
                 pkt = DeviceMessages.StatePower(level=100, source=1, sequence=1, target=None)
                 data = pkt.pack().tobytes()
                 await V.communication.received_data(data, addr, allow_zero=allow_zero)
 
-            recv.assert_called_once_with(mock.ANY, addr, allow_zero=allow_zero)
+            recv.assert_called_once_with(
+                mock.ANY, addr, allow_zero=allow_zero, header=mock.ANY
+            )
+
+        async it "makes a FakeAck from the header for acks", V:
+            allow_zero = mock.Mock(name="allow_zero")
+            addr = mock.Mock(name="addr")
+
+            def recv(pkt, addr, *, allow_zero, header):
+                assert isinstance(pkt, FakeAck)
+                assert pkt.source == 2
+                assert pkt.sequence == 3
+                assert pkt.serial == "d073d5001337"
+                assert pkt.Information.remote_addr is addr
+                assert header.key == (2, 3, binascii.unhexlify("d073d50013370000"))
+
+            recv = pytest.helpers.AsyncMock(name="recv", side_effect=recv)
+
+            with mock.patch.object(V.communication.receiver, "recv", recv):
+                pkt = CoreMessages.Acknowledgement(source=2, sequence=3, target="d073d5001337")
+                data = pkt.pack().tobytes()
+                await V.communication.received_data(data, addr, allow_zero=allow_zero)
+
+            recv.assert_called_once_with(
+                mock.ANY, addr, allow_zero=allow_zero, header=mock.ANY
+            )
 
         async it "unpacks unknown packets", V:
             allow_zero = mock.Mock(name="allow_zero")
             addr = mock.Mock(name="addr")
 
-            def recv(pkt, addr, *, allow_zero):
+            def recv(pkt, addr, *, allow_zero, header):
                 assert isinstance(pkt, LIFXPacket)
                 assert pkt.pkt_type == 9001
                 assert pkt.payload == b"things"
@@ -1018,7 +1298,9 @@ describe "Communication":
                 data = pkt.pack().tobytes()
                 await V.communication.received_data(data, addr, allow_zero=allow_zero)
 
-            recv.assert_called_once_with(mock.ANY, addr, allow_zero=allow_zero)
+            recv.assert_called_once_with(
+                mock.ANY, addr, allow_zero=allow_zero, header=mock.ANY
+            )
 
         async it "ignores invalid data", V:
             allow_zero = mock.Mock(name="allow_zero")
@@ -1032,6 +1314,67 @@ describe "Communication":
 
             assert len(recv.mock_calls) == 0
 
+    describe "sync_received_data":
+        async it "gives the packet to the receiver without making a task", V:
+            addr = mock.Mock(name="addr")
+
+            def recv_sync(pkt, addr, *, allow_zero, header):
+                assert pkt | DeviceMessages.StatePower
+                assert pkt.level == 100
+                assert header.sequence == 1
+
+            recv_sync = mock.Mock(name="recv_sync", side_effect=recv_sync)
+
+            with mock.patch.object(V.communication.receiver, "recv_sync", recv_sync):
+                pkt = DeviceMessages.StatePower(level=100, source=1, sequence=1, target=None)
+                data = pkt.pack().tobytes()
+                assert V.communication.sync_received_data(data, addr) is None
+
+            recv_sync.assert_called_once_with(mock.ANY, addr, allow_zero=False, header=mock.ANY)
+            assert V.communication.received_data_tasks.ts == []
+
+        async it "records received bytes in the metrics", V:
+            pkt = DeviceMessages.StatePower(level=100, source=1, sequence=1, target="d073d5000001")
+            data = pkt.pack().tobytes()
+            V.communication.sync_received_data(data, mock.Mock(name="addr"))
+
+            metrics = V.communication.metrics.for_serial("d073d5000001")
+            assert metrics.received == 1
+            assert metrics.bytes_received == len(data)
+            assert metrics.unexpected == 1
+
+        async it "makes a task if the message_catcher is async", V:
+            addr = mock.Mock(name="addr")
+            caught = []
+
+            async def message_catcher(pkt):
+                caught.append(pkt.level)
+
+            V.communication.receiver.message_catcher = message_catcher
+
+            pkt = DeviceMessages.StatePower(level=100, source=1, sequence=1, target=None)
+            task = V.communication.sync_received_data(pkt.pack().tobytes(), addr)
+            assert V.communication.received_data_tasks.ts == [task]
+
+            await task
+            assert caught == [100]
+
+            # And finished tasks don't stay around
+            pkt = DeviceMessages.StatePower(level=200, source=1, sequence=2, target=None)
+            task2 = V.communication.sync_received_data(pkt.pack().tobytes(), addr)
+            assert V.communication.received_data_tasks.ts == [task2]
+
+            await V.communication.finish()
+            assert task2.done()
+
+        async it "ignores invalid data", V:
+            recv_sync = mock.Mock(name="recv_sync")
+
+            with mock.patch.object(V.communication.receiver, "recv_sync", recv_sync):
+                assert V.communication.sync_received_data("NOPE", ("127.0.0.1", 56700)) is None
+
+            assert len(recv_sync.mock_calls) == 0
+
     describe "private get_response":
 
         @pytest.fixture()
@@ -1083,3 +1426,59 @@ describe "Communication":
 
             with assertRaises(ValueError, "NOPE"):
                 await t
+
+        describe "with a limit that cares about each packet":
+
+            @pytest.fixture()
+            def limit(self):
+                class Slot:
+                    def __init__(s):
+                        s.called = []
+                        s.replied = mock.Mock(name="replied")
+                        s.timed_out = mock.Mock(name="timed_out")
+
+                    async def __aenter__(s):
+                        s.called.append("enter")
+
+                    async def __aexit__(s, exc_type, exc, tb):
+                        s.called.append("exit")
+
+                slot = Slot()
+                return mock.Mock(name="limit", slot=slot, for_packet=mock.Mock(return_value=slot))
+
+            async it "tells the slot about replies", V, packet, limit:
+                waiter = asyncio.Future()
+                waiter.writer = mock.Mock(name="writer", sent=1)
+
+                t = hp.async_as_background(
+                    V.communication._get_response(packet, 0.1, waiter, limit=limit)
+                )
+                asyncio.get_event_loop().call_later(0.01, waiter.set_result, [])
+
+                assert await t == []
+                limit.for_packet.assert_called_once_with(packet)
+                assert limit.slot.called == ["enter", "exit"]
+                limit.slot.replied.assert_called_once_with(retried=False)
+                assert len(limit.slot.timed_out.mock_calls) == 0
+
+            async it "tells the slot if we had to retry", V, packet, limit:
+                waiter = asyncio.Future()
+                waiter.writer = mock.Mock(name="writer", sent=3)
+                waiter.set_result([])
+
+                assert await V.communication._get_response(packet, 0.1, waiter, limit=limit) == []
+                limit.slot.replied.assert_called_once_with(retried=True)
+
+            async it "tells the slot about timeouts", V, packet, serial, limit:
+                waiter = asyncio.Future()
+
+                t = hp.async_as_background(
+                    V.communication._get_response(packet, 0.05, waiter, limit=limit)
+                )
+
+                with assertRaises(TimedOut, "Waiting for reply to a packet", serial=serial):
+                    await t
+
+                assert limit.slot.called == ["enter", "exit"]
+                limit.slot.timed_out.assert_called_once_with()
+                assert len(limit.slot.replied.mock_calls) == 0
@@ -4,6 +4,8 @@ from photons_transport.comms.receiver import Receiver
 
 from photons_app import helpers as hp
 
+from photons_protocol.messages import PacketTypeExtractor
+
 from photons_messages import LIFXPacket
 
 from unittest import mock
@@ -17,6 +19,8 @@ describe "Receiver":
         receiver = Receiver()
         assert receiver.loop is asyncio.get_event_loop()
         assert receiver.results == {}
+        assert receiver.in_flight == {}
+        assert receiver.metrics is None
         assert receiver.blank_target == b"\x00\x00\x00\x00\x00\x00\x00\x00"
 
     describe "Usage":
@@ -59,7 +63,7 @@ describe "Receiver":
                 assert V.receiver.results == {}
                 key = V.register(V.source, V.sequence, V.target)
 
-                loop = mock.Mock(name="loop")
+                wheel = mock.Mock(name="wheel")
                 fut = asyncio.Future()
                 other = mock.Mock(name="other")
                 called = []
@@ -74,9 +78,9 @@ describe "Receiver":
                     cb()
                     fut.set_result(True)
 
-                loop.call_later.side_effect = call_later
+                wheel.call_later.side_effect = call_later
 
-                with mock.patch.object(Receiver, "loop", loop):
+                with mock.patch.object(Receiver, "wheel", wheel):
                     assert called == []
 
                     V.result.set_result([])
@@ -102,6 +106,22 @@ describe "Receiver":
                 assert V.packet.Information.remote_addr is V.addr
                 assert V.packet.Information.sender_message is V.original
 
+            async it "uses the header for the key if one is provided", V:
+                V.register(V.source, V.sequence, V.target)
+
+                packet = mock.Mock(name="packet", spec=["Information", "represents_ack"])
+                packet.represents_ack = False
+                packet.Information = V.packet.Information
+
+                data = V.packet.pack().tobytes()
+                header = PacketTypeExtractor.header(data)
+
+                await V.receiver.recv(packet, V.addr, header=header)
+                V.result.add_packet.assert_called_once_with(packet)
+
+                assert V.packet.Information.remote_addr is V.addr
+                assert V.packet.Information.sender_message is V.original
+
             async it "does nothing if it can't find the key", V:
                 V.register(1, 2, binascii.unhexlify("d073d5000001"))
                 await V.receiver.recv(V.packet, V.addr)
@@ -141,3 +161,103 @@ describe "Receiver":
 
                 assert V.packet.Information.remote_addr is V.addr
                 assert V.packet.Information.sender_message is V.original
+
+            async it "can use a message_catcher that isn't async", V:
+                message_catcher = mock.Mock(name="message_catcher", return_value=None)
+                V.receiver.message_catcher = message_catcher
+                await V.receiver.recv(V.packet, V.addr)
+                message_catcher.assert_called_once_with(V.packet)
+
+        describe "recv_sync":
+            async it "adds the packet to the result straight away", V:
+                V.register(V.source, V.sequence, V.target)
+                assert V.receiver.recv_sync(V.packet, V.addr) is None
+                V.result.add_packet.assert_called_once_with(V.packet)
+
+            async it "only gives back what message_catcher returns if it's awaitable", V:
+                message_catcher = mock.Mock(name="message_catcher", return_value=None)
+                V.receiver.message_catcher = message_catcher
+                assert V.receiver.recv_sync(V.packet, V.addr) is None
+                message_catcher.assert_called_once_with(V.packet)
+
+                message_catcher = pytest.helpers.AsyncMock(name="message_catcher")
+                V.receiver.message_catcher = message_catcher
+                caught = V.receiver.recv_sync(V.packet, V.addr)
+                assert message_catcher.mock_calls == [mock.call(V.packet)]
+                await caught
+
+            async it "records unexpected messages in the metrics", V:
+                V.receiver.metrics = mock.Mock(name="metrics")
+                V.register(V.source, V.sequence, V.target)
+                V.receiver.recv_sync(V.packet, V.addr)
+                assert len(V.receiver.metrics.unexpected.mock_calls) == 0
+
+                other = LIFXPacket(source=V.source, pkt_type=20, sequence=V.sequence + 1, target=V.target)
+                V.receiver.recv_sync(other, V.addr)
+                V.receiver.metrics.unexpected.assert_called_once_with(other.serial)
+
+        describe "in flight sequences":
+            async it "records sequences from register till the result is cleaned up", V:
+                serial = binascii.hexlify(V.target[:6]).decode()
+                removers = []
+
+                wheel = mock.Mock(name="wheel")
+                wheel.call_later.side_effect = lambda t, cb: removers.append(cb)
+
+                with mock.patch.object(Receiver, "wheel", wheel):
+                    V.register(V.source, V.sequence, V.target)
+                    assert V.receiver.sequence_in_use(serial, V.sequence)
+                    assert V.receiver.in_flight == {serial: {V.sequence: 1}}
+
+                    freed = V.receiver.sequence_freed(serial)
+                    assert V.receiver.sequence_freed(serial) is freed
+
+                    V.result.set_result([])
+                    await asyncio.sleep(0)
+                    assert len(removers) == 1
+
+                    removers[0]()
+                    assert not V.receiver.sequence_in_use(serial, V.sequence)
+                    assert V.receiver.in_flight == {}
+                    assert V.receiver.results == {}
+                    assert freed.done()
+
+            async it "keeps broadcasts under the broadcast serial", V:
+                removers = []
+
+                wheel = mock.Mock(name="wheel")
+                wheel.call_later.side_effect = lambda t, cb: removers.append(cb)
+
+                with mock.patch.object(Receiver, "wheel", wheel):
+                    packet = LIFXPacket(source=V.source, sequence=V.sequence)
+                    assert packet.serial is None
+
+                    V.receiver.register(packet, V.result, V.original)
+                    assert V.receiver.in_flight == {"000000000000": {V.sequence: 1}}
+                    assert V.receiver.sequence_in_use(None, V.sequence)
+                    assert V.receiver.sequence_in_use("000000000000", V.sequence)
+                    assert V.receiver.sequences_for(None) == {V.sequence: 1}
+
+                    V.result.set_result([])
+                    await asyncio.sleep(0)
+                    removers[0]()
+                    assert V.receiver.in_flight == {}
+
+            async it "doesn't remove a newer registration for the same key", V:
+                removers = []
+
+                wheel = mock.Mock(name="wheel")
+                wheel.call_later.side_effect = lambda t, cb: removers.append(cb)
+
+                with mock.patch.object(Receiver, "wheel", wheel):
+                    key = V.register(V.source, V.sequence, V.target)
+                    V.result.set_result([])
+                    await asyncio.sleep(0)
+
+                    result2 = asyncio.Future()
+                    packet = LIFXPacket(source=V.source, sequence=V.sequence, target=V.target)
+                    V.receiver.register(packet, result2, V.original)
+
+                    removers[0]()
+                    assert V.receiver.results == {key: (V.original, result2)}
+                    assert V.receiver.sequence_in_use(packet.serial, V.sequence)
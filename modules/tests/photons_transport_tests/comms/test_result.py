@@ -1,6 +1,7 @@
 # coding: spec
 
 from photons_transport.comms.result import Result
+from photons_transport.metrics import DeviceMetrics
 from photons_transport import RetryOptions
 
 from photons_app import helpers as hp
@@ -66,6 +67,37 @@ describe "Result":
         result = Result(V.request, False, RetryOptions())
         assert (await result) == []
 
+    describe "recording round trip times":
+        async it "records the round trip time of the first reply", V:
+            retry_options = RetryOptions()
+            retry_options.record_rtt = mock.Mock(name="record_rtt")
+            result = Result(V.request, False, retry_options)
+            assert result.sent_at is None
+
+            pkt = mock.NonCallableMock(name="pkt", represents_ack=True, spec=["represents_ack"])
+            result.add_packet(pkt)
+            assert len(retry_options.record_rtt.mock_calls) == 0
+
+            result.sent_at = time.time() - 0.1
+            result.add_packet(pkt)
+            result.add_packet(pkt)
+
+            retry_options.record_rtt.assert_called_once_with(mock.ANY)
+            assert retry_options.record_rtt.mock_calls[0][1][0] == pytest.approx(0.1, abs=0.05)
+            assert result.sent_at is None
+
+        async it "records the round trip time in the metrics for the device", V:
+            metrics = DeviceMetrics()
+            result = Result(V.request, False, RetryOptions(), metrics=metrics)
+
+            result.sent_at = time.time() - 0.1
+            pkt = mock.NonCallableMock(name="pkt", represents_ack=True, spec=["represents_ack"])
+            result.add_packet(pkt)
+            result.add_packet(pkt)
+
+            assert metrics.rtt.count == 1
+            assert metrics.rtt.sum == pytest.approx(0.1, abs=0.05)
+
     describe "add_packet":
 
         @pytest.fixture()
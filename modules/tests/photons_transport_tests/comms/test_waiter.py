@@ -302,6 +302,33 @@ describe "Waiter":
 
                 assert (await result1) == res
 
+        describe "finishing":
+            async it "cancels results that aren't done so their sequences are released", V:
+                done = asyncio.Future()
+                done.set_result([])
+                pending = asyncio.Future()
+
+                V.waiter.results = [done, pending]
+                V.waiter.cancel()
+                await asyncio.sleep(0)
+
+                assert pending.cancelled()
+                assert not done.cancelled()
+                assert V.waiter.results == []
+
+            async it "cancels a result it gets after it's already done", V:
+                result = asyncio.Future()
+
+                async def writer():
+                    V.waiter.cancel()
+                    return result
+
+                V.writer.side_effect = writer
+                await V.waiter.do_write()
+
+                assert result.cancelled()
+                assert V.waiter.results == []
+
         describe "future":
             async it "cancel the final future on cancel", V:
                 assert not V.waiter.final_future.done()
@@ -424,15 +451,16 @@ describe "Waiter":
 
             async it "calls the writer if no results yet and schedules for V.retry_options.next_time in future", V:
                 writings_cb = mock.Mock(name="writings_cb")
-                original_call_later = V.loop.call_later
+                original_call_later = hp.timer_wheel(V.loop).call_later
 
                 called = []
 
                 def cl(t, cb, *args):
                     if cb is writings_cb:
                         called.append((t, args))
+                        return mock.Mock(name="timer")
                     else:
-                        original_call_later(t, cb, *args)
+                        return original_call_later(t, cb, *args)
 
                 V.waiter._writings_cb = writings_cb
 
@@ -449,7 +477,7 @@ describe "Waiter":
                 V.writer.side_effect = write
 
                 with mock.patch.object(RetryOptions, "next_time", 15):
-                    with mock.patch.object(V.loop, "call_later", cl):
+                    with mock.patch.object(hp.timer_wheel(V.loop), "call_later", cl):
                         await V.waiter.writings()
 
                 await fut
@@ -458,15 +486,16 @@ describe "Waiter":
 
             async it "does not call writer if we have a partial result", V:
                 writings_cb = mock.Mock(name="writings_cb")
-                original_call_later = V.loop.call_later
+                original_call_later = hp.timer_wheel(V.loop).call_later
 
                 called = []
 
                 def cl(t, cb, *args):
                     if cb is writings_cb:
                         called.append((t, args))
+                        return mock.Mock(name="timer")
                     else:
-                        original_call_later(t, cb, *args)
+                        return original_call_later(t, cb, *args)
 
                 result = asyncio.Future()
                 result.wait_for_result = lambda: True
@@ -481,7 +510,7 @@ describe "Waiter":
                 V.waiter.retry_options.next_check_after_wait_for_result = 9001
 
                 with mock.patch.object(RetryOptions, "next_time", 2):
-                    with mock.patch.object(V.loop, "call_later", cl):
+                    with mock.patch.object(hp.timer_wheel(V.loop), "call_later", cl):
                         with mock.patch.object(V.waiter, "do_write", do_write):
                             await V.waiter.writings()
 
@@ -491,15 +520,16 @@ describe "Waiter":
 
             async it "calls writer if we have results that we shouldn't wait for", V:
                 writings_cb = mock.Mock(name="writings_cb")
-                original_call_later = V.loop.call_later
+                original_call_later = hp.timer_wheel(V.loop).call_later
 
                 called = []
 
                 def cl(t, cb, *args):
                     if cb is writings_cb:
                         called.append((t, args))
+                        return mock.Mock(name="timer")
                     else:
-                        original_call_later(t, cb, *args)
+                        return original_call_later(t, cb, *args)
 
                 result = asyncio.Future()
                 result.wait_for_result = lambda: False
@@ -510,7 +540,7 @@ describe "Waiter":
                 do_write = pytest.helpers.AsyncMock(name="do_write")
 
                 with mock.patch.object(RetryOptions, "next_time", 9002):
-                    with mock.patch.object(V.loop, "call_later", cl):
+                    with mock.patch.object(hp.timer_wheel(V.loop), "call_later", cl):
                         with mock.patch.object(V.waiter, "do_write", do_write):
                             await V.waiter.writings()
 
@@ -518,6 +548,41 @@ describe "Waiter":
                 assert V.waiter.results == [result]
                 do_write.assert_called_with()
 
+            async it "only keeps the latest timer", V:
+                writings_cb = mock.Mock(name="writings_cb")
+                original_call_later = hp.timer_wheel(V.loop).call_later
+
+                timers = []
+
+                def cl(t, cb, *args):
+                    if cb is writings_cb:
+                        timer = mock.Mock(name="timer")
+                        timers.append(timer)
+                        return timer
+                    else:
+                        return original_call_later(t, cb, *args)
+
+                result = asyncio.Future()
+                result.wait_for_result = lambda: True
+
+                V.waiter._writings_cb = writings_cb
+                V.waiter.results = [result]
+
+                with mock.patch.object(hp.timer_wheel(V.loop), "call_later", cl):
+                    for _ in range(3):
+                        await V.waiter.writings()
+
+                assert len(timers) == 3
+                for timer in timers[:2]:
+                    timer.cancel.assert_called_once_with()
+                timers[2].cancel.assert_not_called()
+                assert V.waiter.timer is timers[2]
+
+                V.waiter.cancel()
+                await asyncio.sleep(0)
+                timers[2].cancel.assert_called_once_with()
+                assert V.waiter.timer is None
+
             async it "passes on errors from do_write", V:
                 V.waiter.results = []
 
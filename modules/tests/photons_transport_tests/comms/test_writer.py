@@ -4,8 +4,13 @@ from photons_transport.comms.writer import Writer
 
 from photons_app import helpers as hp
 
+from photons_messages import DeviceMessages
+
+from delfick_project.errors_pytest import assertRaises
 from unittest import mock
+import asyncio
 import pytest
+import time
 
 describe "Writer":
 
@@ -60,19 +65,44 @@ describe "Writer":
             return call
 
         modify_sequence = mock.Mock(name="modify_sequence", side_effect=caller("modify_sequence"))
+        ensure_free_sequence = pytest.helpers.AsyncMock(
+            name="ensure_free_sequence", side_effect=caller("ensure_free_sequence")
+        )
         register = mock.Mock(name="register", side_effect=caller("register", result))
         write = pytest.helpers.AsyncMock(name="write", side_effect=caller("write", b"asdf"))
 
-        mods = {"modify_sequence": modify_sequence, "register": register, "write": write}
+        mods = {
+            "modify_sequence": modify_sequence,
+            "ensure_free_sequence": ensure_free_sequence,
+            "register": register,
+            "write": write,
+        }
 
         with mock.patch.multiple(V.writer, **mods):
             assert await V.writer() is result
 
-        assert called == ["modify_sequence", "register", "write"]
+        assert called == ["modify_sequence", "ensure_free_sequence", "register", "write"]
 
         modify_sequence.assert_called_once_with()
+        ensure_free_sequence.assert_called_once_with()
         register.assert_called_once_with()
-        write.assert_called_once_with()
+        write.assert_called_once_with(result)
+
+    async it "cancels the result if the write fails", V:
+        result = asyncio.Future()
+
+        mods = {
+            "modify_sequence": mock.Mock(name="modify_sequence"),
+            "ensure_free_sequence": pytest.helpers.AsyncMock(name="ensure_free_sequence"),
+            "register": mock.Mock(name="register", return_value=result),
+            "write": pytest.helpers.AsyncMock(name="write", side_effect=ValueError("NOPE")),
+        }
+
+        with mock.patch.multiple(V.writer, **mods):
+            with assertRaises(ValueError, "NOPE"):
+                await V.writer()
+
+        assert result.cancelled()
 
     describe "modify_sequence":
         async it "modifies sequence after first modify_sequence", V:
@@ -98,6 +128,31 @@ describe "Writer":
             assert V.writer.clone.sequence is other_sequence
             seq.assert_called_once_with(V.original.serial)
 
+    describe "ensure_free_sequence":
+        async it "does nothing if the sequence isn't in use", V:
+            V.receiver.sequence_in_use.return_value = False
+            sequence = V.writer.clone.sequence
+
+            await V.writer.ensure_free_sequence()
+
+            assert V.writer.clone.sequence is sequence
+            V.receiver.sequence_in_use.assert_called_once_with(
+                V.writer.clone.serial, V.writer.clone.sequence
+            )
+            assert len(V.session.free_seq.mock_calls) == 0
+
+        async it "gets a free sequence if the sequence is in use", V:
+            V.receiver.sequence_in_use.return_value = True
+            serial = V.writer.clone.serial
+
+            free_seq = pytest.helpers.AsyncMock(name="free_seq", return_value=9)
+            V.session.free_seq = free_seq
+
+            await V.writer.ensure_free_sequence()
+
+            assert V.writer.clone.sequence == 9
+            free_seq.assert_called_once_with(serial)
+
     describe "register":
         async it "does not register if the Result is already done", V:
             result = mock.Mock(name="result", spec=["done"])
@@ -108,7 +163,13 @@ describe "Writer":
                 assert V.writer.register() is result
 
             result.done.assert_called_once_with()
-            FakeResult.assert_called_once_with(V.original, V.did_broadcast, V.retry_options)
+            FakeResult.assert_called_once_with(
+                V.original,
+                V.did_broadcast,
+                V.retry_options,
+                metrics=V.session.metrics.for_serial.return_value,
+            )
+            V.session.metrics.for_serial.assert_called_once_with(V.writer.clone.serial)
             assert len(V.receiver.register.mock_calls) == 0
 
         async it "registers if the Result is not already done", V:
@@ -120,13 +181,19 @@ describe "Writer":
                 assert V.writer.register() is result
 
             result.done.assert_called_once_with()
-            FakeResult.assert_called_once_with(V.original, V.did_broadcast, V.retry_options)
+            FakeResult.assert_called_once_with(
+                V.original,
+                V.did_broadcast,
+                V.retry_options,
+                metrics=V.session.metrics.for_serial.return_value,
+            )
+            V.session.metrics.for_serial.assert_called_once_with(V.writer.clone.serial)
             V.receiver.register.assert_called_once_with(V.writer.clone, result, V.original)
             result.add_done_callback.assert_called_once_with(hp.silent_reporter)
 
     describe "write":
         async it "spawns a transport and writes to it", V:
-            bts = mock.Mock(name="bts")
+            bts = b"bts"
             V.writer.clone.tobytes.return_value = bts
 
             t = mock.Mock(name="t")
@@ -134,7 +201,64 @@ describe "Writer":
             V.transport.spawn = pytest.helpers.AsyncMock(name="spawn", return_value=t)
             V.transport.write = pytest.helpers.AsyncMock(name="write")
 
+            assert V.writer.sent_at is None
+            before = time.time()
             assert await V.writer.write() is bts
+            assert V.writer.sent_at >= before
 
             V.transport.spawn.assert_called_once_with(V.original, timeout=V.connect_timeout)
             V.transport.write.assert_called_once_with(t, bts, V.original)
+            V.session.metrics.sent.assert_called_once_with(
+                V.writer.clone.serial, len(bts), retry=False
+            )
+
+        async it "tells the result when it was sent before writing", V:
+            V.writer.clone.tobytes.return_value = b"bts"
+            result = mock.Mock(name="result", sent_at=None)
+
+            def write(t, bts, original):
+                assert result.sent_at == V.writer.sent_at
+
+            V.transport.spawn = pytest.helpers.AsyncMock(name="spawn")
+            V.transport.write = pytest.helpers.AsyncMock(name="write", side_effect=write)
+
+            await V.writer.write(result)
+            assert result.sent_at is not None
+            assert result.sent_at == V.writer.sent_at
+            V.transport.write.assert_called_once_with(mock.ANY, b"bts", V.original)
+
+        async it "records retries in the session metrics", V:
+            V.writer.sent = 2
+            V.writer.clone.tobytes.return_value = b"bts"
+            V.transport.spawn = pytest.helpers.AsyncMock(name="spawn")
+            V.transport.write = pytest.helpers.AsyncMock(name="write")
+
+            await V.writer.write()
+            V.session.metrics.sent.assert_called_once_with(
+                V.writer.clone.serial, 3, retry=True
+            )
+
+    describe "tobytes":
+        @pytest.mark.parametrize("simplify", [False, True])
+        async it "only packs the clone once", V, simplify:
+            V.packet = DeviceMessages.SetLabel(
+                label="kitchen", source=2, sequence=1, target="d073d5001337"
+            )
+            if simplify:
+                V.packet = V.packet.simplify()
+            assert V.writer.tobytes() == V.packet.pack().tobytes()
+
+            V.writer.clone.sequence = 200
+            V.writer.clone.source = 3000
+
+            with mock.patch.object(V.writer.clone, "tobytes") as tobytes:
+                bts = V.writer.tobytes()
+            assert len(tobytes.mock_calls) == 0
+
+            expected = V.packet.clone(overrides={"sequence": 200, "source": 3000})
+            assert bts == expected.pack().tobytes()
+
+        async it "packs every time if the clone doesn't have a fixed header", V:
+            V.writer.clone.tobytes.side_effect = [b"one", b"two"]
+            assert V.writer.tobytes() == b"one"
+            assert V.writer.tobytes() == b"two"
@@ -0,0 +1,57 @@
+# coding: spec
+
+from photons_transport.session.discovery_cache import DiscoveryCache
+
+from photons_app import helpers as hp
+
+import json
+import os
+
+describe "DiscoveryCache":
+    it "knows where devices are":
+        cache = DiscoveryCache("~/somewhere.json")
+        assert cache.filename == os.path.expanduser("~/somewhere.json")
+        assert cache.devices == {}
+
+        cache.update("d073d5000001", "192.168.0.1", 56700)
+        assert "d073d5000001" in cache
+        assert cache.devices == {"d073d5000001": {"host": "192.168.0.1", "port": 56700}}
+
+        cache.remove("d073d5000001")
+        cache.remove("d073d5000002")
+        assert "d073d5000001" not in cache
+
+    it "can save and load devices":
+        with hp.a_temp_file() as fle:
+            fle.close()
+            os.remove(fle.name)
+
+            cache = DiscoveryCache(fle.name)
+            cache.load()
+            assert cache.devices == {}
+
+            cache.update("d073d5000001", "192.168.0.1", 56700)
+            cache.update("d073d5000002", "192.168.0.2", 56701)
+            cache.save()
+
+            with open(fle.name) as f:
+                assert json.load(f) == {
+                    "d073d5000001": {"host": "192.168.0.1", "port": 56700},
+                    "d073d5000002": {"host": "192.168.0.2", "port": 56701},
+                }
+
+            cache = DiscoveryCache(fle.name)
+            cache.load()
+            assert cache.devices == {
+                "d073d5000001": {"host": "192.168.0.1", "port": 56700},
+                "d073d5000002": {"host": "192.168.0.2", "port": 56701},
+            }
+
+    it "ignores a file it can't understand":
+        with hp.a_temp_file() as fle:
+            fle.write(b"[1, 2")
+            fle.close()
+
+            cache = DiscoveryCache(fle.name)
+            cache.load()
+            assert cache.devices == {}
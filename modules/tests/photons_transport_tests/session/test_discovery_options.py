@@ -272,7 +272,59 @@ describe "serial_filter_spec":
         with assertRaises(BadSpecValue, _errors=[e]):
             spec.normalise(meta, "e073d5001339")
 
+describe "subnets_spec":
+
+    @pytest.fixture()
+    def spec(self):
+        return do.subnets_spec()
+
+    it "returns sb.NotSpecified and None as is", meta, spec:
+        assert spec.normalise(meta, sb.NotSpecified) is sb.NotSpecified
+        assert spec.normalise(meta, None) is None
+
+    it "turns values into a list of networks", meta, spec:
+        assert spec.normalise(meta, "192.168.0.0/24") == ["192.168.0.0/24"]
+        assert spec.normalise(meta, ["10.0.5.6/16", "192.168.1.1"]) == [
+            "10.0.0.0/16",
+            "192.168.1.1/32",
+        ]
+
+    it "complains about things that aren't networks", meta, spec:
+        for bad in ("nope", "192.168.0.0/33", "fe80::/64"):
+            with assertRaises(BadSpecValue, "Expected an ipv4 network like 192.168.0.0/24"):
+                spec.normalise(meta, ["192.168.0.0/24", bad])
+
 describe "DiscoveryOptions":
+    it "can sweep subnets":
+        options = do.DiscoveryOptions.FieldSpec().empty_normalise()
+        assert not options.has_subnets
+        assert options.sweep_rate == 1000
+
+        options = do.DiscoveryOptions.FieldSpec().empty_normalise(
+            subnets=["192.168.0.0/30", "10.0.0.8/29"], subnet_sweep_rate=20
+        )
+        assert options.has_subnets
+        assert options.sweep_rate == 20
+
+        assert list(options.sweep_hosts()) == [
+            "192.168.0.1",
+            "192.168.0.2",
+            "10.0.0.9",
+            "10.0.0.10",
+            "10.0.0.11",
+            "10.0.0.12",
+            "10.0.0.13",
+            "10.0.0.14",
+        ]
+        assert list(options.sweep_hosts(skip={"192.168.0.2", "10.0.0.10"})) == [
+            "192.168.0.1",
+            "10.0.0.9",
+            "10.0.0.11",
+            "10.0.0.12",
+            "10.0.0.13",
+            "10.0.0.14",
+        ]
+
     async it "has serial_filter and hardcoded_discovery":
         with modified_env(
             HARDCODED_DISCOVERY='{"d073d5001337": "192.168.0.1"}', SERIAL_FILTER="d073d5001337"
@@ -390,6 +442,11 @@ describe "NoDiscoveryOptions":
         options = do.NoDiscoveryOptions.FieldSpec().empty_normalise()
         assert not options.hardcoded_discovery
 
+    it "has no subnets":
+        options = do.NoDiscoveryOptions.FieldSpec().empty_normalise(subnets=["192.168.0.0/24"])
+        assert options.subnets is None
+        assert not options.has_subnets
+
     it "wants all serials":
         options = do.NoDiscoveryOptions.FieldSpec().empty_normalise()
         assert options.want("d073d5000001")
@@ -459,6 +516,26 @@ describe "discovery_options_spec":
             else:
                 assert options.serial_filter == gl
 
+    it "can override global subnets", meta, spec:
+        options = do.DiscoveryOptions.FieldSpec().empty_normalise(
+            subnets="192.168.0.0/24", subnet_sweep_rate=20
+        )
+        meta.everything["discovery_options"] = options
+
+        res = spec.normalise(meta, sb.NotSpecified)
+        assert res.subnets == ["192.168.0.0/24"]
+        assert res.subnet_sweep_rate == 20
+        res.subnets.append("10.0.0.0/24")
+        assert options.subnets == ["192.168.0.0/24"]
+
+        res = spec.normalise(meta, {"subnets": None, "subnet_sweep_rate": 30})
+        assert res.subnets is None
+        assert res.subnet_sweep_rate == 30
+
+        res = spec.normalise(meta, {"subnets": ["10.0.0.0/24"]})
+        assert res.subnets == ["10.0.0.0/24"]
+        assert res.subnet_sweep_rate == 20
+
     it "can override global hardcoded_discovery", meta, spec:
         for gl in (None, sb.NotSpecified):
             options = do.DiscoveryOptions.FieldSpec().empty_normalise(hardcoded_discovery=gl)
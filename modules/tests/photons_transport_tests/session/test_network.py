@@ -2,19 +2,25 @@
 
 from photons_transport.session.discovery_options import NoDiscoveryOptions, NoEnvDiscoveryOptions
 from photons_transport.errors import NoDesiredService, UnknownService, InvalidBroadcast
-from photons_transport.session.network import NetworkSession, UDPRetryOptions
-from photons_transport.transports.udp import UDP
+from photons_transport.session.network import (
+    NetworkSession,
+    UDPRetryOptions,
+    AdaptiveUDPRetryOptions,
+)
+from photons_transport.retry_options import RTTProfiles
+from photons_transport.transports.udp import UDP, SharedUDP, WriteQueue
 from photons_transport.comms.base import Found
 
 from photons_app import helpers as hp
 
-from photons_messages import Services, DeviceMessages, DiscoveryMessages
+from photons_messages import Services, DeviceMessages, DiscoveryMessages, protocol_register
 
 from delfick_project.errors_pytest import assertRaises
 from contextlib import contextmanager
 from unittest import mock
 import binascii
 import asyncio
+import json
 import pytest
 
 describe "NetworkSession":
@@ -54,7 +60,10 @@ describe "NetworkSession":
 
     async it "has properties", V:
         assert V.session.UDPTransport is UDP
+        assert V.session.SharedUDPTransport is SharedUDP
         assert V.session.broadcast_transports == {}
+        assert V.session.shared_sockets == {}
+        assert V.session.num_shared_sockets == 0
 
     describe "finish":
         async it "closes all the broadcast_transports", V:
@@ -76,6 +85,30 @@ describe "NetworkSession":
             b2.close.assert_called_once_with()
             b3.close.assert_called_once_with()
 
+    describe "write queues":
+        async it "doesn't coalesce writes by default", V:
+            assert V.session.coalesce_writes is False
+
+        async it "has one queue per socket and flushes them when finished", V:
+            V.transport_target.coalesce_writes = True
+            session = NetworkSession(V.transport_target)
+            assert session.coalesce_writes is True
+
+            t1 = mock.Mock(name="t1", spec=["sendto", "is_closing"])
+            t1.is_closing.return_value = False
+            t2 = mock.Mock(name="t2", spec=["sendto", "is_closing"])
+            t2.is_closing.return_value = False
+
+            queue = session.write_queue_for(t1)
+            assert isinstance(queue, WriteQueue)
+            assert queue.transport is t1
+            assert session.write_queue_for(t1) is queue
+            assert session.write_queue_for(t2) is not queue
+
+            queue.sendto(b"hello", ("1.2.3.4", 56700))
+            await session.finish()
+            t1.sendto.assert_called_once_with(b"hello", ("1.2.3.4", 56700))
+
     describe "retry_options_for":
         async it "returns a UDPRetryOptions if it's a UDP transport", V:
             kwargs = {"host": "192.168.0.3", "port": 56700}
@@ -92,6 +125,43 @@ describe "NetworkSession":
 
             assert uro1 is not uro2
 
+        async it "returns adaptive retry options if the target wants them", V:
+            V.session.rtt_profiles = RTTProfiles()
+            transport = mock.Mock(name="transport")
+
+            packet = DeviceMessages.GetPower(target="d073d5000001")
+            options = V.session.retry_options_for(packet, transport)
+            assert isinstance(options, AdaptiveUDPRetryOptions)
+            assert isinstance(options, UDPRetryOptions)
+            assert options.estimator is V.session.rtt_profiles.for_serial("d073d5000001")
+
+            packet = DeviceMessages.GetPower(target=None)
+            options = V.session.retry_options_for(packet, transport)
+            assert not isinstance(options, AdaptiveUDPRetryOptions)
+
+    describe "rtt profiles":
+        async it "doesn't have profiles by default", V:
+            assert V.session.rtt_profiles is None
+
+        async it "loads and saves profiles if the target has a file for them", V:
+            with hp.a_temp_file() as fle:
+                fle.write(b'{"d073d5000001": {"srtt": 0.1, "rttvar": 0.02, "samples": 3}}')
+                fle.close()
+
+                V.transport_target.adaptive_retries = False
+                V.transport_target.rtt_profiles_file = fle.name
+                session = NetworkSession(V.transport_target)
+
+                estimator = session.rtt_profiles.for_serial("d073d5000001")
+                assert estimator.srtt == 0.1
+                estimator.add(0.2)
+
+                await session.finish()
+
+                with open(fle.name) as f:
+                    saved = json.load(f)
+                assert saved == {"d073d5000001": estimator.as_dict()}
+
     describe "determine_needed_transport":
         async it "says udp", V:
             services = mock.NonCallableMock(name="services", spec=[])
@@ -257,6 +327,39 @@ describe "NetworkSession":
                 )
             }
 
+        async it "adds found devices in batches and ignores repeated replies", V, mocks:
+
+            async def run(*args, **kwargs):
+                for serial, ip in [
+                    ("d073d5000001", "192.168.0.3"),
+                    ("d073d5000002", "192.168.0.4"),
+                    ("d073d5000001", "192.168.0.3"),
+                    ("d073d5000003", "192.168.0.5"),
+                ]:
+                    s = DiscoveryMessages.StateService(service=Services.UDP, port=56, target=serial)
+                    s.Information.update(
+                        remote_addr=(ip, 56700), sender_message=DiscoveryMessages.GetService()
+                    )
+                    yield s
+
+            batches = []
+            original = V.session.add_services
+
+            async def add_services(services):
+                batches.append(sorted(serial for serial, _ in services))
+                await original(services)
+
+            V.session.discovery_batch_size = 2
+            with mock.patch.object(V.session, "add_services", add_services):
+                with mocks(20, run):
+                    fn = await V.session._do_search(
+                        ["d073d5000001", "d073d5000002", "d073d5000003"], 20
+                    )
+
+            assert batches == [["d073d5000001", "d073d5000002"], ["d073d5000003"]]
+            assert len(fn) == 3
+            assert V.session.found.serials == ["d073d5000001", "d073d5000002", "d073d5000003"]
+
         async it "can filter serials", V, mocks:
 
             async def run(*args, **kwargs):
@@ -508,6 +611,257 @@ describe "NetworkSession":
             assert fn == [binascii.unhexlify("d073d5000001")]
             assert V.session.found.serials == ["d073d5000001"]
 
+    describe "discovery cache":
+
+        def state_service(self, serial, host, port=56700):
+            pkt = DiscoveryMessages.StateService(service=Services.UDP, port=port, target=serial)
+            pkt.Information.update(
+                remote_addr=(host, 56700), sender_message=DiscoveryMessages.GetService()
+            )
+            return pkt
+
+        def echo_response(self, serial):
+            return DeviceMessages.EchoResponse(echoing=b"photons", target=serial)
+
+        @pytest.fixture()
+        def cache_file(self, V):
+            with hp.a_temp_file() as fle:
+                json.dump(
+                    {
+                        "d073d5000001": {"host": "192.168.0.1", "port": 56700},
+                        "d073d5000002": {"host": "192.168.0.2", "port": 56700},
+                    },
+                    open(fle.name, "w"),
+                )
+                V.transport_target.discovery_cache_file = fle.name
+                yield fle.name
+
+        @pytest.fixture()
+        def session(self, V, cache_file):
+            return NetworkSession(V.transport_target)
+
+        @pytest.fixture()
+        def sent(self, V):
+            sent = []
+
+            def script(msg):
+                script = mock.Mock(name="script", spec=["run"])
+
+                async def run(reference, session, **kwargs):
+                    sent.append((msg.__class__.__name__, reference, kwargs))
+                    for pkt in V.replies(reference):
+                        yield pkt
+
+                script.run = run
+                return script
+
+            V.transport_target.script.side_effect = script
+            return sent
+
+        async it "doesn't have a cache by default", V:
+            assert V.session.discovery_cache is None
+
+        async it "uses devices from the cache and refreshes in the background", V, session, sent:
+
+            def replies(reference):
+                if reference is None:
+                    yield self.state_service("d073d5000002", "192.168.0.5")
+                    yield self.state_service("d073d5000003", "192.168.0.3")
+                else:
+                    yield self.echo_response("d073d5000001")
+
+            V.replies = replies
+
+            try:
+                assert sorted(session.discovery_cache.devices) == ["d073d5000001", "d073d5000002"]
+
+                fn = await session._do_search(None, 20)
+                assert fn == [binascii.unhexlify("d073d5000001")]
+
+                assert sent[0] == (
+                    "EchoRequest",
+                    ["d073d5000001", "d073d5000002"],
+                    {"accept_found": True, "error_catcher": [], "message_timeout": 1},
+                )
+
+                # The device that didn't reply isn't cached or found anymore
+                assert "d073d5000002" not in session.discovery_cache
+                assert "d073d5000002" not in session.found
+
+                await session.discovery_refresh
+                assert sent[1][1] is None
+                assert sent[1][2]["broadcast"] is True
+                assert len(sent) == 2
+
+                assert session.discovery_cache.devices == {
+                    "d073d5000001": {"host": "192.168.0.1", "port": 56700},
+                    "d073d5000002": {"host": "192.168.0.5", "port": 56700},
+                    "d073d5000003": {"host": "192.168.0.3", "port": 56700},
+                }
+                assert "d073d5000003" in session.found
+
+                # Only one refresh per session
+                await session._do_search(None, 20)
+                assert len(sent) == 3
+                assert sorted(sent[2][1]) == ["d073d5000001", "d073d5000002", "d073d5000003"]
+            finally:
+                await session.finish()
+
+            # Only d073d5000001 replied to the last search
+            with open(session.discovery_cache.filename) as fle:
+                assert json.load(fle) == {"d073d5000001": {"host": "192.168.0.1", "port": 56700}}
+
+        async it "doesn't lose found devices it wasn't asked about", V, session, sent:
+
+            def replies(reference):
+                if reference is None:
+                    yield self.state_service("d073d5000001", "192.168.0.1")
+                    yield self.state_service("d073d5000002", "192.168.0.2")
+                else:
+                    for serial in reference:
+                        yield self.echo_response(serial)
+
+            V.replies = replies
+
+            try:
+                await session.find_devices()
+                assert session.found.serials == ["d073d5000001", "d073d5000002"]
+                await session.discovery_refresh
+
+                found, missing = await session.find_specific_serials(["d073d5000001"])
+                assert missing == []
+                assert found.serials == ["d073d5000001", "d073d5000002"]
+                assert sent[-1][:2] == ("EchoRequest", ["d073d5000001"])
+            finally:
+                await session.finish()
+
+        async it "doesn't keep devices from the cache that don't reply", V, session, sent:
+
+            def replies(reference):
+                if reference is None:
+                    yield self.state_service("d073d5000001", "192.168.0.1")
+                else:
+                    yield self.echo_response("d073d5000001")
+
+            V.replies = replies
+
+            try:
+                found, missing = await session.find_specific_serials(
+                    ["d073d5000001", "d073d5000002"], ignore_lost=True, timeout=0.1
+                )
+                assert missing == ["d073d5000002"]
+                assert found.serials == ["d073d5000001"]
+                assert "d073d5000002" not in session.discovery_cache
+            finally:
+                await session.finish()
+
+        async it "broadcasts for devices that aren't in the cache", V, session, sent:
+
+            def replies(reference):
+                if reference is None:
+                    yield self.state_service("d073d5000001", "192.168.0.1")
+                    yield self.state_service("d073d5000003", "192.168.0.3")
+                else:
+                    yield self.echo_response("d073d5000001")
+
+            V.replies = replies
+
+            try:
+                fn = await session._do_search(["d073d5000001", "d073d5000003"], 20)
+                assert sorted(fn) == [
+                    binascii.unhexlify("d073d5000001"),
+                    binascii.unhexlify("d073d5000003"),
+                ]
+
+                assert [reference for _, reference, _ in sent] == [["d073d5000001"], None]
+                assert session.discovery_refresh is None
+                assert "d073d5000003" in session.discovery_cache
+            finally:
+                await session.finish()
+
+    describe "subnet sweep":
+
+        @pytest.fixture()
+        def devices(self):
+            return {"10.0.0.2": "d073d5000001", "10.0.0.5": "d073d5000002"}
+
+        @pytest.fixture()
+        def sock(self, V, devices):
+            sock = mock.Mock(name="sock", spec=["sendto"])
+
+            def sendto(bts, addr):
+                assert addr[1] == 56700
+                serial = devices.get(addr[0])
+                if serial is not None:
+                    get_service = DiscoveryMessages.GetService.unpack(bts)
+                    reply = DiscoveryMessages.StateService(
+                        service=Services.UDP,
+                        port=56700,
+                        source=get_service.source,
+                        sequence=get_service.sequence,
+                        target=serial,
+                    )
+                    V.session.sync_received_data(reply.pack().tobytes(), addr)
+
+            sock.sendto.side_effect = sendto
+            return sock
+
+        @pytest.fixture()
+        def sweep(self, V, sock):
+            V.transport_target.discovery_options = NoEnvDiscoveryOptions.FieldSpec().empty_normalise(
+                subnets="10.0.0.0/29", subnet_sweep_rate=100
+            )
+            V.transport_target.protocol_register = protocol_register
+
+            async def iterator(timeout):
+                yield 10, 0.01
+                yield 9, 0.01
+
+            shared_udp_socket = pytest.helpers.AsyncMock(name="shared_udp_socket", return_value=sock)
+
+            with mock.patch.object(V.session, "shared_udp_socket", shared_udp_socket):
+                with mock.patch.object(V.session, "_search_retry_iterator", iterator):
+                    yield
+
+        async it "sends a GetService to every address", V, sock, sweep:
+            fn = await V.session._do_search(None, 20)
+            assert sorted(fn) == [
+                binascii.unhexlify("d073d5000001"),
+                binascii.unhexlify("d073d5000002"),
+            ]
+
+            hosts = [call[1][1][0] for call in sock.sendto.mock_calls]
+            assert hosts == [f"10.0.0.{i}" for i in range(1, 7)]
+
+            assert V.session.found.serials == ["d073d5000001", "d073d5000002"]
+            assert V.session.found["d073d5000002"] == {
+                Services.UDP: await V.session.make_transport(
+                    "d073d5000002", Services.UDP, {"host": "10.0.0.5", "port": 56700}
+                )
+            }
+
+            assert V.session.metrics.for_serial(None).sent == 6
+
+        async it "only sends to addresses we haven't heard from when it tries again", V, sock, devices, sweep:
+            fn = await V.session._do_search(["d073d5000001", "d073d5000003"], 20)
+            assert sorted(fn) == [
+                binascii.unhexlify("d073d5000001"),
+                binascii.unhexlify("d073d5000002"),
+            ]
+
+            hosts = [call[1][1][0] for call in sock.sendto.mock_calls]
+            first = [f"10.0.0.{i}" for i in range(1, 7)]
+            second = [h for h in first if h not in ("10.0.0.2", "10.0.0.5")]
+            assert hosts == first + second
+
+        async it "stops when it has all the serials it wants", V, sock, sweep:
+            fn = await V.session._do_search(["d073d5000001"], 20)
+            assert fn == [binascii.unhexlify("d073d5000001")]
+
+            # We check after every message when the rate is 100 a second
+            hosts = [call[1][1][0] for call in sock.sendto.mock_calls]
+            assert hosts == ["10.0.0.1", "10.0.0.2"]
+
     describe "private _search_retry_iterator":
 
         async it "returns an iterator", V:
@@ -590,6 +944,127 @@ describe "NetworkSession":
                 assert await V.session.make_transport(serial, service, kwargs) is transport
             FakeUDPTransport.assert_called_once_with(V.session, host, port, serial=serial)
 
+        async it "creates shared UDP transports if the target wants shared sockets", V:
+            V.transport_target.shared_sockets = 1
+            session = NetworkSession(V.transport_target)
+
+            try:
+                kwargs = {"host": "127.0.0.1", "port": 56700}
+                transport = await session.make_transport("d073d5000001", Services.UDP, kwargs)
+                assert isinstance(transport, SharedUDP)
+                assert transport.serial == "d073d5000001"
+
+                broadcast = await session.make_broadcast_transport(True)
+                assert isinstance(broadcast, SharedUDP)
+            finally:
+                await session.finish()
+
+    describe "shared sockets":
+
+        @pytest.fixture()
+        def devices(self):
+            class Devices:
+                def __init__(s):
+                    s.received = []
+                    s.remotes = []
+
+                async def start(s, amount):
+                    ports = []
+
+                    for _ in range(amount):
+                        port = pytest.helpers.free_port()
+
+                        class ServerProtocol(asyncio.Protocol):
+                            def connection_made(sp, transport):
+                                sp.transport = transport
+
+                            def datagram_received(sp, data, addr, port=port):
+                                s.received.append((port, data, addr))
+                                sp.transport.sendto(data + b"-reply", addr)
+
+                        remote, _ = await asyncio.get_event_loop().create_datagram_endpoint(
+                            ServerProtocol, local_addr=("127.0.0.1", port)
+                        )
+                        s.remotes.append(remote)
+                        ports.append(port)
+
+                    return ports
+
+                def finish(s):
+                    for remote in s.remotes:
+                        remote.close()
+
+            devices = Devices()
+            try:
+                yield devices
+            finally:
+                devices.finish()
+
+        async it "sends to every device from one socket", V, devices:
+            V.transport_target.shared_sockets = 1
+            session = NetworkSession(V.transport_target)
+
+            replies = []
+            got_replies = asyncio.Future()
+
+            def sync_received_data(data, addr):
+                replies.append((data, addr))
+                if len(replies) == 3:
+                    got_replies.set_result(True)
+
+            try:
+                port1, port2, port3 = await devices.start(3)
+
+                transports = [
+                    SharedUDP(session, "127.0.0.1", port, serial=f"d073d500000{i}")
+                    for i, port in enumerate((port1, port2, port3))
+                ]
+                spawned = [await t.spawn(None, timeout=1) for t in transports]
+                assert all(s is spawned[0] for s in spawned)
+                assert len(session.shared_sockets) == 1
+
+                with mock.patch.object(session, "sync_received_data", sync_received_data):
+                    for i, (t, s) in enumerate(zip(transports, spawned)):
+                        await t.write(s, b"hello" + str(i).encode(), None)
+                    await asyncio.wait_for(got_replies, timeout=1)
+
+                # All the devices saw the same source address
+                assert len(set(addr for _, _, addr in devices.received)) == 1
+                assert sorted(replies) == [
+                    (b"hello0-reply", ("127.0.0.1", port1)),
+                    (b"hello1-reply", ("127.0.0.1", port2)),
+                    (b"hello2-reply", ("127.0.0.1", port3)),
+                ]
+
+                # Closing one device doesn't close the socket for everyone
+                await transports[0].close()
+                assert not spawned[0].is_closing()
+                assert await transports[1].is_transport_active(None, spawned[1])
+            finally:
+                await session.finish()
+
+            assert spawned[0].is_closing()
+
+        async it "can spread addresses over several sockets", V:
+            V.transport_target.shared_sockets = 3
+            session = NetworkSession(V.transport_target)
+
+            try:
+                sockets = set()
+                for port in range(56700, 56720):
+                    sockets.add(await session.shared_udp_socket(("127.0.0.1", port), 1))
+
+                assert len(session.shared_sockets) > 1
+                assert len(sockets) == len(session.shared_sockets)
+                assert set(session.shared_sockets) <= {0, 1, 2}
+
+                again = await session.shared_udp_socket(("127.0.0.1", 56700), 1)
+                assert again in sockets
+            finally:
+                await session.finish()
+
+            assert all(s.is_closing() for s in sockets)
+
     describe "make_broadcast_transport":
         async it "uses default_broadcast if broadcast is True", V:
             transport = await V.session.make_broadcast_transport(True)
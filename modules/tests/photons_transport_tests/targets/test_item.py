@@ -1,6 +1,6 @@
 # coding: spec
 
-from photons_transport.targets.item import Item
+from photons_transport.targets.item import Item, FannedPacket
 from photons_transport.comms.base import Found
 
 from photons_app.errors import (
@@ -12,7 +12,7 @@ from photons_app.errors import (
 from photons_app.special import SpecialReference
 from photons_app import helpers as hp
 
-from photons_messages import DeviceMessages
+from photons_messages import DeviceMessages, LIFXPacket
 
 from delfick_project.errors_pytest import assertRaises
 from delfick_project.norms import sb
@@ -148,6 +148,80 @@ describe "Item":
                 c5.update.assert_called_once_with(dict(source=c5source, sequence=1))
                 c5.actual.assert_called_once_with("source")
 
+            async it "packs a part once when sending it to many serials":
+                sender = mock.Mock(name="sender", source=9001)
+
+                seqs = {}
+
+                def seq_maker(t):
+                    seqs[t] = seqs.get(t, 0) + 1
+                    return seqs[t]
+
+                sender.seq.side_effect = seq_maker
+
+                serials = ["d073d5000001", "d073d5000002", "d073d5000003"]
+                part = DeviceMessages.SetLabel(label="kitchen")
+
+                packets = Item([part]).make_packets(sender, serials)
+                assert len(packets) == 3
+
+                # The first serial gets a clone that is used as the template
+                assert not isinstance(packets[0][1], FannedPacket)
+                assert all(isinstance(p, FannedPacket) for _, p in packets[1:])
+
+                for i, (original, packet) in enumerate(packets):
+                    assert original is part
+                    assert packet.serial == serials[i]
+                    assert (packet.source, packet.sequence) == (9001, 1)
+
+                    expected = part.clone()
+                    expected.update(dict(target=serials[i], source=9001, sequence=1))
+                    assert packet.tobytes(None) == expected.pack().tobytes()
+
+                    clone = packet.clone()
+                    clone.sequence = 20
+                    assert packet.sequence == 1
+                    expected.sequence = 20
+                    assert clone.tobytes(None) == expected.pack().tobytes()
+
+            it "packs parts that already have targets together":
+                sender = mock.Mock(name="sender", source=9001)
+
+                seqs = {}
+
+                def seq_maker(t):
+                    seqs[t] = seqs.get(t, 0) + 1
+                    return seqs[t]
+
+                sender.seq.side_effect = seq_maker
+
+                parts = [
+                    DeviceMessages.SetLabel(label="kitchen", target="d073d5000001"),
+                    DeviceMessages.SetLabel(label="lounge", target="d073d5000002"),
+                    DeviceMessages.SetPower(level=0, target="d073d5000001"),
+                    DeviceMessages.SetLabel(label="hall", target="d073d5000001"),
+                ]
+
+                pack_many = mock.Mock(name="pack_many", side_effect=LIFXPacket.pack_many)
+
+                with mock.patch.object(LIFXPacket, "pack_many", pack_many):
+                    packets = Item(parts).make_packets(sender, [])
+
+                # The simplified parts are all packed into one buffer
+                assert len(pack_many.mock_calls) == 1
+                assert len(pack_many.mock_calls[0][1][0]) == 4
+                assert all(isinstance(p, FannedPacket) for _, p in packets)
+
+                for part, (original, packet) in zip(parts, packets):
+                    assert original is part
+                    assert packet.serial == part.serial
+
+                    expected = part.clone()
+                    expected.update(dict(source=9001, sequence=packet.sequence))
+                    assert packet.tobytes(None) == expected.pack().tobytes()
+
+                assert [p.sequence for _, p in packets] == [1, 1, 2, 3]
+
         describe "search":
 
             @pytest.fixture()
@@ -545,6 +619,58 @@ describe "Item":
 
                 assert res == [V.results[i] for i in (0, 6)]
 
+            async it "only sends as many packets at once as there are workers", item, V:
+                sending = []
+                most = []
+
+                async def send_single(original, packet, **kwargs):
+                    sending.append(original)
+                    most.append(len(sending))
+                    await asyncio.sleep(0.01)
+                    sending.remove(original)
+
+                    if original is V.o2:
+                        raise ValueError("NOPE")
+                    elif original is V.o3:
+                        raise asyncio.CancelledError()
+                    return [V.results[V.packets.index((original, packet))]]
+
+                V.sender.send_single.side_effect = send_single
+                V.kwargs["workers"] = 2
+
+                res = []
+                async for r in item.write_messages(V.sender, V.packets, V.kwargs):
+                    res.append(r)
+
+                assert max(most) == 2
+                assert sorted(res, key=V.results.index) == [V.results[0], V.results[3]]
+                assert [type(e) for e in V.error_catcher] == [ValueError, TimedOut]
+                assert V.error_catcher[1].kwargs["serial"] == V.p3.serial
+
+                sent = [c[1][0] for c in V.sender.send_single.mock_calls]
+                assert sent == [V.o1, V.o2, V.o3, V.o4]
+
+            async it "stops the workers when the generator is closed", item, V:
+                started = []
+
+                async def send_single(original, packet, **kwargs):
+                    started.append(original)
+                    if original is V.o1:
+                        return [V.results[0]]
+                    await asyncio.sleep(10)
+
+                V.sender.send_single.side_effect = send_single
+                V.kwargs["workers"] = 2
+
+                gen = item.write_messages(V.sender, V.packets, V.kwargs)
+                assert await gen.__anext__() is V.results[0]
+                await asyncio.sleep(0.01)
+                assert started == [V.o1, V.o2, V.o3]
+
+                await gen.aclose()
+                await asyncio.sleep(0.01)
+                assert started == [V.o1, V.o2, V.o3]
+
         describe "private find":
 
             @pytest.fixture()
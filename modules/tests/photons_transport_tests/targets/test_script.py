@@ -2,9 +2,10 @@
 
 from photons_transport.targets.script import SenderWrapper, ScriptRunner
 
-from photons_app.errors import PhotonsAppError, BadRunWithResults
+from photons_app.errors import PhotonsAppError, BadRunWithResults, BadOption
 from photons_app import helpers as hp
 
+from delfick_project.errors_pytest import assertRaises
 from delfick_project.norms import sb
 from unittest import mock
 import asyncio
@@ -103,6 +104,25 @@ describe "SenderWrapper":
         assert kwargs == {"b": a, "limit": limit}
         assert V.called == []
 
+    async it "passes on workers if it is a positive integer", V:
+        kwargs = {"workers": 3, "limit": None}
+        sender = mock.NonCallableMock(name="sender")
+
+        async with SenderWrapper(V.target, sender, kwargs) as result:
+            assert result is sender
+
+        assert kwargs == {"workers": 3, "limit": None}
+
+    async it "complains if workers isn't a positive integer", V:
+        for workers in (0, -1, "2", 1.5, True):
+            kwargs = {"workers": workers}
+
+            with assertRaises(BadOption, "workers must be a positive integer", got=workers):
+                async with SenderWrapper(V.target, sb.NotSpecified, kwargs):
+                    assert False, "Shouldn't get here"
+
+        assert V.called == []
+
     async it "creates and closes the sender if none provided", V:
         a = mock.Mock(name="a")
         kwargs = {"b": a}
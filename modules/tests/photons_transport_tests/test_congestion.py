@@ -0,0 +1,149 @@
+# coding: spec
+
+from photons_transport.congestion import CongestionLimit, Window
+
+from photons_app import helpers as hp
+
+from unittest import mock
+import asyncio
+import pytest
+
+describe "Window":
+    async it "hands out slots up to it's size":
+        window = Window(2, 1, 10)
+        await window.acquire()
+        await window.acquire()
+        assert window.in_flight == 2
+        assert window.locked()
+
+        t = hp.async_as_background(window.acquire())
+        await asyncio.sleep(0)
+        assert not t.done()
+
+        window.release()
+        await t
+        assert window.in_flight == 2
+
+    async it "gives slots to waiters in order":
+        window = Window(1, 1, 10)
+        await window.acquire()
+
+        got = []
+
+        async def get(i):
+            await window.acquire()
+            got.append(i)
+
+        ts = [hp.async_as_background(get(i)) for i in range(3)]
+        await asyncio.sleep(0)
+
+        for _ in range(3):
+            window.release()
+            await asyncio.sleep(0)
+
+        await asyncio.wait(ts)
+        assert got == [0, 1, 2]
+
+    async it "doesn't lose a slot if a waiter is cancelled":
+        window = Window(1, 1, 10)
+        await window.acquire()
+
+        t = hp.async_as_background(window.acquire(), silent=True)
+        await asyncio.sleep(0)
+        t.cancel()
+        await asyncio.wait([t])
+
+        window.release()
+        assert window.in_flight == 0
+
+    async it "grows by one for a full window of replies":
+        window = Window(4, 1, 5)
+        for _ in range(4):
+            window.grow()
+        assert window.size == pytest.approx(5, abs=0.1)
+
+        for _ in range(10):
+            window.grow()
+        assert window.size == 5
+
+    async it "shrinks once for the messages in flight when it shrank", FakeTime:
+        window = Window(8, 1, 10)
+
+        with FakeTime() as t:
+            t.set(10)
+            window.shrink(5)
+            assert window.size == 4
+
+            # Messages started before that shrink don't shrink it again
+            window.shrink(6)
+            assert window.size == 4
+
+            window.shrink(11)
+            assert window.size == 2
+
+            t.set(20)
+            window.shrink(21)
+            window.shrink(22)
+            assert window.size == 1
+
+    async it "gives waiting messages slots when it grows":
+        window = Window(1, 1, 10)
+        await window.acquire()
+
+        t = hp.async_as_background(window.acquire())
+        await asyncio.sleep(0)
+        assert not t.done()
+
+        window.grow()
+        await t
+        assert window.in_flight == 2
+
+describe "CongestionLimit":
+    async it "has a window per device and for everything":
+        limit = CongestionLimit(initial=2, initial_total=3)
+
+        one = limit.for_packet(mock.Mock(name="packet", serial="d073d5000001"))
+        two = limit.for_packet(mock.Mock(name="packet", serial="d073d5000001"))
+        three = limit.for_packet(mock.Mock(name="packet", serial="d073d5000002"))
+
+        assert one.window is two.window
+        assert one.window is not three.window
+        assert one.window.size == 2
+        assert limit.total.size == 3
+
+        async with one:
+            async with two:
+                async with three:
+                    assert one.window.in_flight == 2
+                    assert three.window.in_flight == 1
+                    assert limit.total.in_flight == 3
+                    assert limit.locked()
+
+        assert one.window.in_flight == 0
+        assert three.window.in_flight == 0
+        assert limit.total.in_flight == 0
+
+    async it "changes windows based on replies and timeouts":
+        limit = CongestionLimit(initial=4, initial_total=8)
+        slot = limit.for_packet(mock.Mock(name="packet", serial="d073d5000001"))
+
+        async with slot:
+            slot.replied()
+        assert slot.window.size == 4.25
+        assert limit.total.size == 8.125
+
+        async with slot:
+            slot.replied(retried=True)
+        assert slot.window.size == 2.125
+        assert limit.total.size == 4.0625
+
+        async with slot:
+            slot.timed_out()
+        assert slot.window.size == 1.0625
+        assert limit.total.size == 4.0625
+
+    async it "can be used like a semaphore":
+        limit = CongestionLimit(initial_total=1)
+        async with limit:
+            assert limit.locked()
+        assert not limit.locked()
@@ -0,0 +1,191 @@
+# coding: spec
+
+from photons_transport.metrics import Histogram, TransportMetrics
+from photons_transport.comms.receiver import Receiver
+from photons_transport.targets import MemoryTarget
+from photons_transport.fake import FakeDevice
+
+from photons_messages import DeviceMessages, protocol_register
+from photons_control import test_helpers as chp
+from photons_products import Products
+
+import asyncio
+import json
+import pytest
+
+describe "Histogram":
+    it "counts values into cumulative buckets":
+        histogram = Histogram([0.1, 1.0])
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(2.65)
+        assert histogram.cumulative() == [(0.1, 2), (1.0, 3), ("+Inf", 4)]
+        assert histogram.as_dict() == {
+            "buckets": {"0.1": 2, "1.0": 3, "+Inf": 4},
+            "count": 4,
+            "sum": histogram.sum,
+        }
+
+describe "TransportMetrics":
+    it "records numbers for each device":
+        metrics = TransportMetrics()
+        metrics.sent("d073d5000001", 36)
+        metrics.sent("d073d5000001", 36, retry=True)
+        metrics.sent(None, 36)
+        metrics.received("d073d5000001", 40)
+        metrics.for_serial("d073d5000001").rtt.observe(0.03)
+        metrics.timed_out("d073d5000002")
+        metrics.unexpected("d073d5000001")
+
+        one = metrics.for_serial("d073d5000001")
+        assert (one.sent, one.retries, one.bytes_sent) == (2, 1, 72)
+        assert (one.received, one.bytes_received, one.unexpected) == (1, 40, 1)
+        assert one.rtt.count == 1
+
+        assert metrics.for_serial("d073d5000002").timeouts == 1
+        assert metrics.for_serial("000000000000").sent == 1
+        assert sorted(metrics.as_dict()) == ["000000000000", "d073d5000001", "d073d5000002"]
+
+    it "gets in flight counts from the receiver":
+        receiver = Receiver()
+        receiver.in_flight = {"d073d5000001": {1: 1, 2: 2}, "000000000000": {3: 1}}
+        metrics = TransportMetrics(receiver)
+        metrics.sent("d073d5000001", 36)
+
+        assert metrics.in_flight("d073d5000001") == 3
+        assert metrics.in_flight("d073d5000002") == 0
+        assert metrics.in_flight(None) == 1
+        assert metrics.in_flight("000000000000") == 1
+        assert metrics.as_dict()["d073d5000001"]["in_flight"] == 3
+        assert TransportMetrics().in_flight("d073d5000001") == 0
+
+    it "can be dumped as json":
+        metrics = TransportMetrics()
+        metrics.sent("d073d5000001", 36)
+        assert json.loads(metrics.as_json()) == metrics.as_dict()
+
+    it "can be dumped as openmetrics":
+        metrics = TransportMetrics()
+        metrics.sent("d073d5000001", 36, retry=True)
+        metrics.for_serial("d073d5000001").rtt.observe(0.02)
+
+        lines = metrics.as_openmetrics().split("\n")
+        assert lines[-2:] == ["# EOF", ""]
+        assert "# TYPE photons_sent counter" in lines
+        assert 'photons_sent_total{serial="d073d5000001"} 1' in lines
+        assert 'photons_retries_total{serial="d073d5000001"} 1' in lines
+        assert 'photons_bytes_sent_total{serial="d073d5000001"} 36' in lines
+        assert 'photons_in_flight{serial="d073d5000001"} 0' in lines
+        assert "# TYPE photons_rtt_seconds histogram" in lines
+        assert 'photons_rtt_seconds_bucket{serial="d073d5000001",le="0.01"} 0' in lines
+        assert 'photons_rtt_seconds_bucket{serial="d073d5000001",le="0.025"} 1' in lines
+        assert 'photons_rtt_seconds_bucket{serial="d073d5000001",le="+Inf"} 1' in lines
+        assert 'photons_rtt_seconds_count{serial="d073d5000001"} 1' in lines
+
+describe "Metrics from a session":
+    async it "records what happens when we send messages":
+        device = FakeDevice(
+            "d073d5001337", chp.default_responders(Products.LCM2_A19), use_sockets=True
+        )
+
+        async with device:
+            options = {"final_future": asyncio.Future(), "protocol_register": protocol_register}
+            target = MemoryTarget.create(options, {"devices": device})
+
+            async with target.session() as sender:
+                await sender(DeviceMessages.EchoRequest(echoing=b"hi"), device.serial)
+
+                metrics = sender.metrics.for_serial(device.serial)
+                assert metrics.sent >= 1
+                assert metrics.received >= 1
+                assert metrics.bytes_sent > 0
+                assert metrics.bytes_received > 0
+                assert metrics.rtt.count >= 1
+                assert metrics.timeouts == 0
+
+            options["final_future"].cancel()
+
+    async it "records messages that time out":
+        device = FakeDevice(
+            "d073d5001337", chp.default_responders(Products.LCM2_A19), use_sockets=True
+        )
+
+        async with device:
+            options = {"final_future": asyncio.Future(), "protocol_register": protocol_register}
+            target = MemoryTarget.create(options, {"devices": device})
+
+            async with target.session() as sender:
+                await sender.find_specific_serials([device.serial])
+                with device.offline():
+                    await sender(
+                        DeviceMessages.GetPower(),
+                        device.serial,
+                        message_timeout=0.5,
+                        error_catcher=[],
+                    )
+
+                metrics = sender.metrics.for_serial(device.serial)
+                assert metrics.timeouts == 1
+                assert metrics.retries >= 1
+
+            options["final_future"].cancel()
+
+    @pytest.mark.async_timeout(3)
+    async it "doesn't count messages that timed out as in flight":
+        device = FakeDevice(
+            "d073d5001337", chp.default_responders(Products.LCM2_A19), use_sockets=True
+        )
+
+        async with device:
+            options = {"final_future": asyncio.Future(), "protocol_register": protocol_register}
+            target = MemoryTarget.create(options, {"devices": device})
+
+            async with target.session() as sender:
+                await sender.find_specific_serials([device.serial])
+                with device.offline():
+                    await sender(
+                        DeviceMessages.GetPower(),
+                        device.serial,
+                        message_timeout=0.1,
+                        error_catcher=[],
+                    )
+
+                metrics = sender.metrics
+                assert metrics.for_serial(device.serial).timeouts == 1
+                assert metrics.in_flight(device.serial) > 0
+
+                # The receiver lets go of a sequence a little after it's done
+                while metrics.in_flight(device.serial) > 0:
+                    await asyncio.sleep(0.05)
+
+                assert metrics.as_dict()[device.serial]["in_flight"] == 0
+
+            options["final_future"].cancel()
+
+    async it "records messages that were coalesced":
+        device = FakeDevice(
+            "d073d5001337", chp.default_responders(Products.LCM2_A19), use_sockets=True
+        )
+
+        async with device:
+            options = {"final_future": asyncio.Future(), "protocol_register": protocol_register}
+            target = MemoryTarget.create(options, {"devices": device})
+
+            async with target.session() as sender:
+                await sender.find_specific_serials([device.serial])
+                sender.coalesce_requests = True
+                device.reset_received()
+
+                replies = await asyncio.gather(
+                    *[sender(DeviceMessages.GetPower(), device.serial) for _ in range(3)]
+                )
+                for pkts in replies:
+                    assert len(pkts) == 1
+                    assert pkts[0] | DeviceMessages.StatePower
+
+                assert len(device.received) == 1
+                assert sender.metrics.for_serial(device.serial).coalesced == 2
+
+            options["final_future"].cancel()
@@ -1,11 +1,16 @@
 # coding: spec
 
+from photons_transport.retry_options import AdaptiveRetryOptions, RTTEstimator, RTTProfiles
 from photons_transport import RetryOptions, RetryIterator
 
+from photons_app import helpers as hp
+
 from contextlib import contextmanager
 from unittest import mock
 import pytest
+import json
 import time
+import os
 
 describe "RetryOptions":
     it "can be given a different timeouts":
@@ -221,3 +226,123 @@ describe "RetryIterator":
             ], calls
 
             assert next_times == []
+
+describe "RTTEstimator":
+    it "starts with nothing":
+        estimator = RTTEstimator()
+        assert estimator.srtt is None
+        assert estimator.rto is None
+        assert estimator.samples == 0
+
+    it "smooths round trip times like TCP":
+        estimator = RTTEstimator()
+
+        estimator.add(0.1)
+        assert estimator.srtt == 0.1
+        assert estimator.rttvar == 0.05
+        assert estimator.rto == pytest.approx(0.3)
+
+        estimator.add(0.2)
+        assert estimator.rttvar == pytest.approx(0.75 * 0.05 + 0.25 * 0.1)
+        assert estimator.srtt == pytest.approx(0.875 * 0.1 + 0.125 * 0.2)
+        assert estimator.samples == 2
+
+    it "keeps rto between a minimum and maximum":
+        estimator = RTTEstimator(srtt=0.001, rttvar=0)
+        assert estimator.rto == RTTEstimator.minimum
+
+        estimator = RTTEstimator(srtt=20, rttvar=1)
+        assert estimator.rto == RTTEstimator.maximum
+
+describe "RTTProfiles":
+    it "has an estimator per serial":
+        profiles = RTTProfiles()
+        estimator = profiles.for_serial("d073d5000001")
+        assert isinstance(estimator, RTTEstimator)
+        assert profiles.for_serial("d073d5000001") is estimator
+        assert profiles.for_serial("d073d5000002") is not estimator
+
+    it "does nothing to load or save without a filename":
+        profiles = RTTProfiles()
+        profiles.for_serial("d073d5000001").add(0.1)
+        profiles.load()
+        profiles.save()
+        assert list(profiles.estimators) == ["d073d5000001"]
+
+    it "can save and load profiles":
+        with hp.a_temp_file() as fle:
+            fle.close()
+            os.remove(fle.name)
+
+            profiles = RTTProfiles(fle.name)
+            profiles.load()
+            assert profiles.estimators == {}
+
+            profiles.for_serial("d073d5000001").add(0.1)
+            profiles.for_serial("d073d5000002")
+            profiles.save()
+
+            with open(fle.name) as f:
+                assert json.load(f) == {
+                    "d073d5000001": {"srtt": 0.1, "rttvar": 0.05, "samples": 1}
+                }
+
+            profiles = RTTProfiles(fle.name)
+            profiles.load()
+            assert profiles.for_serial("d073d5000001").as_dict() == {
+                "srtt": 0.1,
+                "rttvar": 0.05,
+                "samples": 1,
+            }
+
+    it "ignores files it can't read":
+        with hp.a_temp_file() as fle:
+            fle.write(b"{not json")
+            fle.close()
+
+            profiles = RTTProfiles(fle.name)
+            profiles.load()
+            assert profiles.estimators == {}
+
+describe "AdaptiveRetryOptions":
+    it "is like RetryOptions until there is a round trip time":
+        options = AdaptiveRetryOptions(RTTEstimator())
+        normal = RetryOptions()
+
+        for attr in (
+            "finish_multi_gap",
+            "gap_between_results",
+            "gap_between_ack_and_res",
+            "next_check_after_wait_for_result",
+        ):
+            assert getattr(options, attr) == getattr(normal, attr)
+
+        assert [options.next_time for _ in range(5)] == [normal.next_time for _ in range(5)]
+
+    it "uses the round trip time for backoff":
+        estimator = RTTEstimator(srtt=0.02, rttvar=0.005)
+        options = AdaptiveRetryOptions(estimator)
+        normal = RetryOptions()
+
+        # The round trip time is usually for the acknowledgement, which
+        # doesn't tell us how long the device takes to make its replies
+        for attr in ("finish_multi_gap", "gap_between_results", "gap_between_ack_and_res"):
+            assert getattr(options, attr) == getattr(normal, attr)
+
+        assert options.next_check_after_wait_for_result == pytest.approx(0.02)
+
+        times = [options.next_time for _ in range(10)]
+        assert times[:4] == [pytest.approx(t) for t in (0.04, 0.08, 0.16, 0.32)]
+        assert times[-1] == 5
+
+    it "doesn't make gaps longer than normal for slow devices":
+        options = AdaptiveRetryOptions(RTTEstimator(srtt=1, rttvar=0.5))
+        assert options.gap_between_ack_and_res == RetryOptions.gap_between_ack_and_res
+        assert options.gap_between_results == RetryOptions.gap_between_results
+        assert options.next_time == 3
+
+    it "records round trip times on the estimator":
+        estimator = RTTEstimator()
+        options = AdaptiveRetryOptions(estimator)
+        options.record_rtt(0.1)
+        assert estimator.srtt == 0.1
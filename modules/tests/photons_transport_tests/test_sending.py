@@ -171,3 +171,20 @@ describe "Sending messages":
                 assert sender_message is original
                 got[pkt.serial].append(pkt.payload.as_dict())
             assert dict(got) == {V.device.serial: [{"echoing": b"hi" + b"\x00" * 62}]}
+
+    describe "timeouts":
+
+        @pytest.mark.async_timeout(5)
+        async it "still sends after many messages to a device time out", V:
+            async with V.target.session() as sender:
+                await sender.find_specific_serials([V.device.serial])
+
+                with V.device.offline():
+                    msgs = [DeviceMessages.GetPower() for _ in range(300)]
+                    await sender(msgs, V.device.serial, message_timeout=0.03, error_catcher=[])
+
+                assert sender.metrics.for_serial(V.device.serial).timeouts == 300
+
+                pkts = await sender(DeviceMessages.GetPower(), V.device.serial, message_timeout=1)
+                assert len(pkts) == 1
+                assert pkts[0] | DeviceMessages.StatePower
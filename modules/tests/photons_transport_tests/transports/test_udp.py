@@ -1,6 +1,6 @@
 # coding: spec
 
-from photons_transport.transports.udp import UDP
+from photons_transport.transports.udp import UDP, WriteQueue
 
 from photons_app import helpers as hp
 
@@ -31,6 +31,58 @@ class FakeDevice:
         self.remote.close()
 
 
+describe "WriteQueue":
+
+    @pytest.fixture()
+    def transport(self):
+        transport = mock.Mock(name="transport", spec=["sendto", "is_closing"])
+        transport.is_closing.return_value = False
+        return transport
+
+    async it "sends everything queued in one go on the next loop iteration", transport:
+        queue = WriteQueue(transport)
+
+        queue.sendto(b"one", ("1.2.3.4", 56700))
+        queue.sendto(b"two", ("1.2.3.5", 56700))
+        queue.sendto(b"three", ("1.2.3.4", 56700))
+
+        assert queue.depth == 3
+        transport.sendto.assert_not_called()
+
+        await asyncio.sleep(0)
+        assert transport.sendto.mock_calls == [
+            mock.call(b"one", ("1.2.3.4", 56700)),
+            mock.call(b"two", ("1.2.3.5", 56700)),
+            mock.call(b"three", ("1.2.3.4", 56700)),
+        ]
+        assert queue.depth == 0
+        assert (queue.flushes, queue.sent, queue.last_flush, queue.largest_flush) == (1, 3, 3, 3)
+
+        queue.sendto(b"four", ("1.2.3.4", 56700))
+        await asyncio.sleep(0)
+        assert (queue.flushes, queue.sent, queue.last_flush, queue.largest_flush) == (2, 4, 1, 3)
+
+    async it "can be flushed early", transport:
+        queue = WriteQueue(transport)
+        queue.sendto(b"one", ("1.2.3.4", 56700))
+        queue.flush()
+        transport.sendto.assert_called_once_with(b"one", ("1.2.3.4", 56700))
+        assert queue.handle is None
+
+        await asyncio.sleep(0)
+        assert queue.flushes == 1
+        assert len(transport.sendto.mock_calls) == 1
+
+    async it "drops datagrams for a closed socket", transport:
+        queue = WriteQueue(transport)
+        queue.sendto(b"one", ("1.2.3.4", 56700))
+        transport.is_closing.return_value = True
+
+        await asyncio.sleep(0)
+        transport.sendto.assert_not_called()
+        assert queue.depth == 0
+        assert queue.flushes == 0
+
 describe "UDP":
 
     @pytest.fixture()
@@ -135,6 +187,18 @@ describe "UDP":
         finally:
             await device.finish()
 
+    async it "uses the session write queue if the session coalesces writes", V:
+        queue = mock.Mock(name="queue", spec=["sendto"])
+        V.session.coalesce_writes = True
+        V.session.write_queue_for.return_value = queue
+
+        transport = mock.Mock(name="transport", spec=["sendto"])
+        await V.transport.write(transport, b"hello", V.original_message)
+
+        V.session.write_queue_for.assert_called_once_with(transport)
+        queue.sendto.assert_called_once_with(b"hello", (V.host, V.port))
+        transport.sendto.assert_not_called()
+
     async it "can close the transport", V:
         device = FakeDevice(V.port, lambda b, a: [])
         await device.start()